@@ -0,0 +1,265 @@
+import asyncio
+import time
+
+import can
+from OHandSerialAPI import (
+    CMD_ERROR_MASK,
+    HAND_CMD_GET_SELF_TEST_LEVEL,
+    HAND_PROTOCOL_UART,
+    HAND_RESP_HAND_ERROR,
+    HAND_RESP_SUCCESS,
+    HAND_RESP_TIMEOUT,
+    NOT_READY_STATUS,
+    PROBE_TIMEOUT,
+    READY_POLL_INTERVAL,
+    READY_PROBE_TIMEOUT,
+    RECV_MODE_EVENT,
+    RTO_CEILING,
+    RTO_FLOOR,
+    SETTLE_POLL_INTERVAL,
+    OHandSerialAPI,
+    SettleTracker,
+)
+from can_interface import (
+    ADDRESS_MASTER,
+    CAN_Init,
+    delay_milli_seconds_impl,
+    get_milli_seconds_impl,
+    send_data_impl,
+    send_prepared_impl,
+)
+
+# OHandSerialAPI methods that do not talk to the hand, they are not mirrored as coroutines
+LOCAL_METHODS = {
+    "HAND_ProtocolLRC",
+    "HAND_SendCmd",
+    "HAND_PrepareCmd",
+    "HAND_SendPreparedCmd",
+    "HAND_SetSendPreparedFunction",
+    "HAND_SetCancelFunction",
+    "HAND_GetResponse",
+    "HAND_SetTimerFunction",
+    "HAND_GetTick",
+    "HAND_SetCommandTimeOut",
+    "HAND_SetAdaptiveTimeout",
+    "HAND_SetProbeTimeout",
+    "HAND_GetRttEstimates",
+    "HAND_SetRecvMode",
+    "HAND_SetPacketHandler",
+    "HAND_OnData",
+    "HAND_OnBytes",
+    "HAND_OnPacket",
+    "HAND_WaitUntilSettled",
+    "HAND_WaitUntilReady",
+}
+
+
+class _ResponsePending(Exception):
+    pass
+
+
+class _ReplayAPI(OHandSerialAPI):
+    """
+    Runs an unchanged OHandSerialAPI command method in two passes:
+    the first pass validates, encodes and sends, then stops at HAND_GetResponse;
+    the second pass replays the method against the awaited response packet to decode it.
+    """
+
+    def __init__(self, owner):
+        super().__init__(owner.bus, HAND_PROTOCOL_UART, owner.address_master, send_data_impl)
+        self.HAND_SetTimerFunction(get_milli_seconds_impl, delay_milli_seconds_impl)
+        self.HAND_SetSendPreparedFunction(send_prepared_impl)
+        self.HAND_SetRecvMode(RECV_MODE_EVENT)
+        self.owner = owner
+        self.pending = None  # (addr, cmd, time_out) of the request sent in the first pass
+        self.replaying = False
+        self.replay_packet = None
+
+    def HAND_SendCmd(self, addr, cmd, data, nb_data):
+        if self.replaying:
+            return HAND_RESP_SUCCESS  # Already sent in the first pass
+        self.owner._register(addr, cmd)
+        return super().HAND_SendCmd(addr, cmd, data, nb_data)
+
+    def HAND_SendPreparedCmd(self, prepared):
+        if self.replaying:
+            return HAND_RESP_SUCCESS
+        self.owner._register(prepared.addr, prepared.cmd)
+        return super().HAND_SendPreparedCmd(prepared)
+
+    def HAND_GetResponse(self, addr, cmd, time_out, resp_bytes, remote_err):
+        if not self.replaying:
+            self.pending = (addr, cmd, time_out)
+            raise _ResponsePending()
+        if self.replay_packet is None:
+            self._rtt_timeout(addr, cmd)
+            return HAND_RESP_TIMEOUT
+        self.HAND_OnPacket(self.replay_packet)
+        return super().HAND_GetResponse(addr, cmd, time_out, resp_bytes, remote_err)
+
+
+class AsyncOHandAPI(can.Listener):
+    """
+    asyncio版本的OHand接口：与OHandSerialAPI的HAND_*命令同名同参数，但均为协程，
+    一个事件循环即可同时驱动多只手，例如：
+
+        api = AsyncOHandAPI(bus)          # 需在运行中的事件循环内创建
+        results = await asyncio.gather(*(api.HAND_GetFingerPosAll(node_id, ...) for node_id in node_ids))
+
+    接收由can.Notifier投递到事件循环完成，总线支持fileno时直接注册到事件循环，
+    否则python-can使用一个只负责转发CAN帧的接收线程。
+    同一(节点ID, 命令ID)同一时刻只能有一个未完成的请求。
+    """
+
+    def __init__(self, bus, address_master=ADDRESS_MASTER, timeout=255):
+        self.bus = bus
+        self.address_master = address_master
+        self.timeout = timeout
+        self.loop = asyncio.get_running_loop()
+        self.waiters = {}  # (node_id, cmd) -> (asyncio.Future resolved with the response packet, perf_counter() at send)
+        self.api = _ReplayAPI(self)
+        self.api.HAND_SetCommandTimeOut(timeout)
+        self.decoder = OHandSerialAPI(None, HAND_PROTOCOL_UART, address_master, None)
+        self.decoder.HAND_SetPacketHandler(self._dispatch)
+        self.notifier = can.Notifier(bus, [self], timeout=0.1, loop=self.loop)
+
+    @classmethod
+    async def open(cls, port_name, baudrate=1000000, **kwargs):
+        """打开PCAN通道并创建异步接口，失败返回None"""
+        bus = CAN_Init(port_name=port_name, baudrate=baudrate)
+        if bus is None:
+            return None
+        return cls(bus, **kwargs)
+
+    def HAND_SetCommandTimeOut(self, timeout):
+        self.timeout = timeout
+        self.api.HAND_SetCommandTimeOut(timeout)
+
+    def HAND_SetAdaptiveTimeout(self, enable, floor=RTO_FLOOR, ceiling=RTO_CEILING):
+        """按实测往返时间自动设置每个请求的超时，见OHandSerialAPI.HAND_SetAdaptiveTimeout"""
+        self.api.HAND_SetAdaptiveTimeout(enable, floor, ceiling)
+
+    def HAND_SetProbeTimeout(self, timeout=PROBE_TIMEOUT):
+        self.api.HAND_SetProbeTimeout(timeout)
+
+    def HAND_GetRttEstimates(self):
+        return self.api.HAND_GetRttEstimates()
+
+    def HAND_PrepareCmd(self, hand_id, cmd, args=()):
+        """预编译命令，返回的PreparedCommand可反复传给HAND_SendPrepared"""
+        return self.api.HAND_PrepareCmd(hand_id, cmd, args)
+
+    async def HAND_WaitUntilSettled(self, hand_id, targets=None, tolerance=0, timeout=RTO_CEILING * 8,
+                                    poll_interval=SETTLE_POLL_INTERVAL, remote_err=None):
+        """等待所有电机到达目标位置并停止运动，见OHandSerialAPI.HAND_WaitUntilSettled，轮询间隔内不占用事件循环"""
+        tracker = SettleTracker(targets, tolerance)
+        deadline = self.loop.time() + timeout / 1000.0
+        while True:
+            result = await self.HAND_ReadFingerPosAll(hand_id, remote_err)
+            if tracker.update(result):
+                return HAND_RESP_SUCCESS, tracker.positions
+            if result.err == HAND_RESP_HAND_ERROR:
+                return result.err, tracker.positions
+            remaining = deadline - self.loop.time()
+            if remaining <= 0:
+                return HAND_RESP_TIMEOUT, tracker.positions
+            await asyncio.sleep(min(poll_interval / 1000.0, remaining))
+
+    async def HAND_WaitUntilReady(self, hand_id, timeout, probe_cmd=HAND_CMD_GET_SELF_TEST_LEVEL,
+                                  probe_timeout=READY_PROBE_TIMEOUT, poll_interval=READY_POLL_INTERVAL, remote_err=None):
+        """
+        等待节点复位、初始化或校正后重新接受命令，见OHandSerialAPI.HAND_WaitUntilReady。
+        整机架复位后可用asyncio.gather同时等待所有节点
+        """
+        prepared = self.api.HAND_PrepareCmd(hand_id, probe_cmd)
+        deadline = self.loop.time() + timeout / 1000.0
+        status = None
+        while True:
+            if self.api.HAND_SendPreparedCmd(prepared) == HAND_RESP_SUCCESS:
+                future, _ = self.waiters[(prepared.addr, prepared.cmd)]
+                try:
+                    packet = await asyncio.wait_for(future, probe_timeout / 1000.0)
+                except asyncio.TimeoutError:
+                    self.waiters.pop((prepared.addr, prepared.cmd), None)
+                    packet = None
+                if packet is not None:
+                    # packet: [addressed node id, own node id, command id, byte count, data..., lrc]
+                    if not packet[2] & CMD_ERROR_MASK:
+                        return HAND_RESP_SUCCESS
+                    status = packet[4]
+                    if status not in NOT_READY_STATUS:
+                        return HAND_RESP_SUCCESS
+            remaining = deadline - self.loop.time()
+            if remaining <= 0:
+                if status is not None and remote_err is not None:
+                    remote_err.append(status)
+                return HAND_RESP_TIMEOUT
+            await asyncio.sleep(min(poll_interval / 1000.0, remaining))
+
+    def _register(self, addr, cmd):
+        # The send time is kept per request, _ReplayAPI.sent_at is shared by all coroutines
+        self.waiters[(addr, cmd)] = (self.loop.create_future(), time.perf_counter())
+
+    def _dispatch(self, packet):
+        # packet: [addressed node id, own node id, command id, byte count, data..., lrc]
+        waiter = self.waiters.pop((packet[1], packet[2] & ~CMD_ERROR_MASK), None)
+        if waiter is not None and not waiter[0].done():
+            waiter[0].set_result(bytes(packet))
+
+    def on_message_received(self, msg):
+        if msg.arbitration_id == self.address_master:
+            self.decoder.HAND_OnBytes(msg.data)
+
+    def on_error(self, exc):
+        print(f"CAN接收错误: {exc}")
+
+    async def _transact(self, name, args):
+        api = self.api
+        method = getattr(api, name)
+        api.replaying = False
+        try:
+            return method(*args)  # Returned before sending, e.g. invalid arguments
+        except _ResponsePending:
+            addr, cmd, time_out = api.pending
+
+        future, sent_at = self.waiters[(addr, cmd)]
+        try:
+            packet = await asyncio.wait_for(future, time_out / 1000.0)
+        except asyncio.TimeoutError:
+            self.waiters.pop((addr, cmd), None)
+            packet = None
+
+        # The replay pass never awaits, so coroutines sharing this instance can not interleave inside it
+        api.replaying = True
+        api.replay_packet = packet
+        api.sent_at = sent_at  # RTT sample of this request, not of the last one sent
+        try:
+            return method(*args)
+        finally:
+            api.replaying = False
+            api.replay_packet = None
+
+    def shutdown(self):
+        """停止接收并关闭总线"""
+        if self.notifier is not None:
+            self.notifier.stop()
+            self.notifier = None
+        for future, _ in self.waiters.values():
+            future.cancel()
+        self.waiters.clear()
+        self.bus.shutdown()
+
+
+def _make_command(name):
+    async def command(self, *args):
+        return await self._transact(name, args)
+
+    command.__name__ = name
+    command.__qualname__ = f"AsyncOHandAPI.{name}"
+    command.__doc__ = f"Coroutine version of OHandSerialAPI.{name}"
+    return command
+
+
+for _name in dir(OHandSerialAPI):
+    if _name.startswith("HAND_") and _name not in LOCAL_METHODS:
+        setattr(AsyncOHandAPI, _name, _make_command(_name))
@@ -0,0 +1,96 @@
+"""
+发送/接收路径的内存分配基准测试：每个命令新增的内存块数、GC次数和耗时。
+
+- send only：HAND_SetFingerPos编码并发送到丢弃所有帧的总线对象
+- round trip：对虚拟总线上的模拟节点执行HAND_GetFingerPosAll（含后台接收和解码）
+
+运行方式（在仓库根目录下）：
+    python benchmarks/bench_alloc.py
+"""
+import gc
+import os
+import sys
+import time
+
+import can
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from OHandSerialAPI import HAND_CMD_SET_FINGER_POS, HAND_PROTOCOL_UART, HAND_RESP_SUCCESS, MAX_MOTOR_CNT, OHandSerialAPI
+from can_interface import CAN_StartReceiver, delay_milli_seconds_impl, get_milli_seconds_impl, send_data_impl
+from sim_hand import ADDRESS_MASTER, SimulatedHand
+
+HAND_ID = 2
+SEND_ROUNDS = 50000
+TRIP_ROUNDS = 2000
+
+
+class NullBus:
+    """丢弃所有帧的总线，只用于测量发送路径的主机侧开销"""
+
+    def send(self, msg):
+        pass
+
+
+def make_api(bus):
+    api = OHandSerialAPI(bus, HAND_PROTOCOL_UART, ADDRESS_MASTER, send_data_impl)
+    api.HAND_SetTimerFunction(get_milli_seconds_impl, delay_milli_seconds_impl)
+    api.HAND_SetCommandTimeOut(255)
+    return api
+
+
+def run(call, rounds):
+    call()  # Warm up caches
+    gc.collect()
+    collections = gc.get_stats()[0]["collections"]
+    blocks = sys.getallocatedblocks()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        call()
+    elapsed = time.perf_counter() - start
+    return (
+        elapsed / rounds,
+        (sys.getallocatedblocks() - blocks) / rounds,
+        gc.get_stats()[0]["collections"] - collections,
+    )
+
+
+def send_only():
+    api = make_api(NullBus())
+    # Only the send half of HAND_SetFingerPos, the NullBus never answers
+    return run(lambda: api.HAND_SendCmd(HAND_ID, HAND_CMD_SET_FINGER_POS, b"\x01\xe8\x03\x64", 4), SEND_ROUNDS)
+
+
+def round_trip():
+    channel = "bench_alloc"
+    hand = SimulatedHand(channel, node_id=HAND_ID).start()
+    bus = can.Bus(interface="virtual", channel=channel)
+    api = make_api(bus)
+    CAN_StartReceiver(bus, api)
+    target_pos, current_pos, motor_cnt = [0] * MAX_MOTOR_CNT, [0] * MAX_MOTOR_CNT, [MAX_MOTOR_CNT]
+    failed = []
+
+    def call():
+        motor_cnt[0] = MAX_MOTOR_CNT
+        if api.HAND_GetFingerPosAll(HAND_ID, target_pos, current_pos, motor_cnt, [])[0] != HAND_RESP_SUCCESS:
+            failed.append(1)
+
+    try:
+        result = run(call, TRIP_ROUNDS)
+    finally:
+        api.shutdown()
+        bus.shutdown()
+        hand.stop()
+    return result + (len(failed),)
+
+
+def main():
+    print(f"{'path':>10} {'us/cmd':>8} {'blocks/cmd':>11} {'gc gen0':>8}")
+    per_cmd, blocks, collections = send_only()
+    print(f"{'send only':>10} {per_cmd * 1e6:>8.2f} {blocks:>11.3f} {collections:>8}")
+    per_cmd, blocks, collections, failed = round_trip()
+    print(f"{'round trip':>10} {per_cmd * 1e6:>8.2f} {blocks:>11.3f} {collections:>8}  failed={failed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+多设备轮询基准测试：比较"每只手一个线程"(ThreadPoolExecutor + 事件模式OHandSerialAPI)与
+"单事件循环"(AsyncOHandAPI + asyncio.gather)两种方式，统计每轮的耗时与进程线程数。
+
+运行方式（在仓库根目录下）：
+    python benchmarks/bench_async.py
+"""
+import asyncio
+import concurrent.futures
+import os
+import sys
+import threading
+import time
+
+import can
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from AsyncOHandAPI import AsyncOHandAPI
+from OHandSerialAPI import HAND_PROTOCOL_UART, HAND_RESP_SUCCESS, MAX_MOTOR_CNT, OHandSerialAPI
+from can_interface import CAN_StartReceiver, delay_milli_seconds_impl, get_milli_seconds_impl, recv_data_impl, send_data_impl
+from sim_hand import ADDRESS_MASTER, SimulatedHand
+
+HAND_COUNT = 16
+HAND_ID = 2
+ROUNDS = 50
+COMMANDS_PER_ROUND = 6
+
+
+def start_hands(prefix):
+    return [SimulatedHand(f"{prefix}_{i}", node_id=HAND_ID).start() for i in range(HAND_COUNT)]
+
+
+def run_threads():
+    hands = start_hands("bench_async_threads")
+    apis = []
+    for i in range(HAND_COUNT):
+        bus = can.Bus(interface="virtual", channel=f"bench_async_threads_{i}")
+        api = OHandSerialAPI(bus, HAND_PROTOCOL_UART, ADDRESS_MASTER, send_data_impl, recv_data_impl)
+        api.HAND_SetTimerFunction(get_milli_seconds_impl, delay_milli_seconds_impl)
+        CAN_StartReceiver(bus, api)
+        apis.append(api)
+
+    def one_port(api):
+        ok = 0
+        for _ in range(COMMANDS_PER_ROUND):
+            err, _, _ = api.HAND_GetFingerPosAll(HAND_ID, [0] * MAX_MOTOR_CNT, [0] * MAX_MOTOR_CNT, [MAX_MOTOR_CNT], [])
+            ok += err == HAND_RESP_SUCCESS
+        return ok
+
+    ok = 0
+    peak_threads = 0
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        with concurrent.futures.ThreadPoolExecutor(max_workers=64) as executor:
+            futures = [executor.submit(one_port, api) for api in apis]
+            peak_threads = max(peak_threads, threading.active_count())
+            ok += sum(future.result() for future in futures)
+    elapsed = time.perf_counter() - start
+
+    for api in apis:
+        api.shutdown()
+        api.private_data.shutdown()
+    for hand in hands:
+        hand.stop()
+    return ok, elapsed / ROUNDS, peak_threads
+
+
+async def run_asyncio():
+    hands = start_hands("bench_async_loop")
+    apis = [AsyncOHandAPI(can.Bus(interface="virtual", channel=f"bench_async_loop_{i}")) for i in range(HAND_COUNT)]
+
+    async def one_port(api):
+        ok = 0
+        for _ in range(COMMANDS_PER_ROUND):
+            err, _, _ = await api.HAND_GetFingerPosAll(HAND_ID, [0] * MAX_MOTOR_CNT, [0] * MAX_MOTOR_CNT, [MAX_MOTOR_CNT], [])
+            ok += err == HAND_RESP_SUCCESS
+        return ok
+
+    ok = 0
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        ok += sum(await asyncio.gather(*(one_port(api) for api in apis)))
+    elapsed = time.perf_counter() - start
+    peak_threads = threading.active_count()
+
+    for api in apis:
+        api.shutdown()
+    for hand in hands:
+        hand.stop()
+    return ok, elapsed / ROUNDS, peak_threads
+
+
+def main():
+    # 模拟手自身各占一个线程，两种方式都包含这部分线程
+    print(f"{HAND_COUNT} hands, {COMMANDS_PER_ROUND} commands per hand per round, {ROUNDS} rounds")
+    print(f"{'mode':>8} {'ok':>6} {'ms/round':>9} {'threads':>8}")
+    for name, runner in (("threads", run_threads), ("asyncio", lambda: asyncio.run(run_asyncio()))):
+        ok, per_round, threads = runner()
+        print(f"{name:>8} {ok:>6} {per_round * 1000:>9.2f} {threads:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+检查点基准测试：
+- 保存开销：16个端口已运行不同轮次后，ResultSink.state() + RunCheckpoint.save()（同步到磁盘、原子替换）的耗时和检查点文件大小
+- 崩溃恢复：保存检查点后继续写入若干轮，再在结果文件末尾留下半行（模拟写入时断电），
+  用ResultSink.resume()恢复，与不中断地写入同样轮次的结果比较各端口汇总、电流统计、ResultStore和续测的轮次编号
+- 中断续测：DeviceRunner运行模拟手，CONTROL.stop(resumable=True)后从检查点继续，检查各端口的轮次编号连续、不重复
+
+运行方式（在仓库根目录下）：
+    python benchmarks/bench_checkpoint.py
+"""
+import datetime
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import bench_process_runner as script
+from OHandSerialAPI import MAX_MOTOR_CNT
+from checkpoint import RunCheckpoint
+from device_runner import DeviceRound, DeviceRunner
+from result_sink import ResultSink, read_results
+from result_store import ResultStore
+from run_control import CONTROL
+
+PORTS = [f'PCAN_USBBUS{i}' for i in range(1, 17)]
+NODE_ID = 2
+ROUNDS = [100, 1000, 10000]
+SAVES = 20
+CRASH_ROUNDS = 500  # 检查点之前的轮次
+LOST_ROUNDS = 37  # 检查点之后、崩溃之前写入的轮次
+RUN_S = 2
+START = datetime.datetime(2024, 1, 1)  # 模拟结果的时间戳按轮次生成，两次写入相同轮次时结果一致
+
+
+def make_record(port, round_num):
+    gesture = {
+        "timestamp": (START + datetime.timedelta(seconds=round_num * 10)).strftime('%Y-%m-%d %H:%M:%S'),
+        "description": '抓握',
+        "expected": '',
+        "content": [round(random.gauss(60, 10), 3) for _ in range(MAX_MOTOR_CNT)],
+        "positions": [random.randint(0, 200) for _ in range(MAX_MOTOR_CNT)],
+        "result": '不通过' if random.random() < 0.01 else '通过',
+        "comment": '无',
+    }
+    connected = random.random() > 0.005
+    return DeviceRound(port, NODE_ID, round_num, {'port': port, 'gestures': [gesture] if connected else []}, connected)
+
+
+def fill(sink, first_round, last_round):
+    for round_num in range(first_round, last_round + 1):
+        for port in PORTS:
+            sink.add(make_record(port, round_num))
+
+
+def bench_save(folder):
+    print(f"{len(PORTS)} ports, {SAVES} saves each")
+    print(f"{'rounds':>7} {'save ms':>8} {'KB':>6}")
+    for rounds in ROUNDS:
+        random.seed(1)
+        path = os.path.join(folder, f'save_{rounds}.jsonl')
+        checkpoint = RunCheckpoint(os.path.join(folder, f'save_{rounds}.json'))
+        with ResultSink(path) as sink:
+            fill(sink, 1, rounds)
+            start = time.perf_counter()
+            for _ in range(SAVES):
+                checkpoint.save({'elapsed_s': 0, 'sink': sink.state()})
+            save_ms = (time.perf_counter() - start) * 1e3 / SAVES
+        print(f"{rounds:>7} {save_ms:>8.2f} {os.path.getsize(checkpoint.path) / 1024:>6.1f}")
+
+
+def bench_crash(folder):
+    random.seed(2)
+    path = os.path.join(folder, 'crash.jsonl')
+    checkpoint = RunCheckpoint(os.path.join(folder, 'crash.json'))
+    sink = ResultSink(path, store=ResultStore())
+    fill(sink, 1, CRASH_ROUNDS)
+    checkpoint.save({'sink': sink.state()})
+    fill(sink, CRASH_ROUNDS + 1, CRASH_ROUNDS + LOST_ROUNDS)
+    sink.file.write('{"port": "PCAN_USBBUS1", "node_id": 2, "round": 99')  # 写入一半时断电
+    sink.file.close()
+
+    random.seed(2)
+    with ResultSink(os.path.join(folder, 'reference.jsonl'), store=ResultStore()) as reference:
+        fill(reference, 1, CRASH_ROUNDS + LOST_ROUNDS)
+
+    start = time.perf_counter()
+    resumed = ResultSink.resume(checkpoint.load()['sink'], store=ResultStore())
+    resume_ms = (time.perf_counter() - start) * 1e3
+    resumed.close()
+    checks = {
+        'results': resumed.results() == reference.results(),
+        'aggregates': [a.to_dict() for a in resumed.ports.values()] == [a.to_dict() for a in reference.ports.values()],
+        'store': resumed.store.summary() == reference.store.summary(),
+        'last_rounds': resumed.last_rounds() == reference.last_rounds() == {port: CRASH_ROUNDS + LOST_ROUNDS for port in PORTS},
+        'partial line removed': open(path, 'rb').read().endswith(b'\n'),
+    }
+    print(f"crash after {CRASH_ROUNDS}+{LOST_ROUNDS} rounds: resume {resume_ms:.0f} ms, "
+          + ', '.join(f"{name} {'ok' if ok else 'MISMATCH'}" for name, ok in checks.items()))
+
+
+def bench_interrupt(folder):
+    devices = [(f'bench_checkpoint_{i}', NODE_ID) for i in range(4)]
+    checkpoint = RunCheckpoint(os.path.join(folder, 'interrupt.json'))
+    runner = DeviceRunner(script.create_test, script.run_port_round, control=CONTROL, log=script.logger)
+    sink = ResultSink(os.path.join(folder, 'interrupt.jsonl'))
+    for attempt in range(2):
+        CONTROL.start()
+        threading.Timer(RUN_S, CONTROL.stop, kwargs={'resumable': True}).start()
+        for record in runner.run(devices, time.time() + 60, sink.last_rounds()):
+            sink.add(record)
+        checkpoint.save({'sink': sink.state()})
+        sink.close()
+        print(f"run {attempt + 1}: stopped (resumable={CONTROL.resumable}), rounds per port: {sorted(sink.last_rounds().values())}")
+        sink = ResultSink.resume(checkpoint.load()['sink'])
+    sink.close()
+    rounds = {}
+    for record in read_results(sink.path):
+        rounds.setdefault(record['port'], []).append(record['round'])
+    contiguous = all(sorted(numbers) == list(range(1, len(numbers) + 1)) for numbers in rounds.values())
+    print(f"round numbers contiguous across resume: {'ok' if contiguous else 'MISMATCH'}")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as folder:
+        bench_save(folder)
+        bench_crash(folder)
+        bench_interrupt(folder)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+电机电流采集基准测试：模拟手的各电机电流为带噪声的随机值（均值已知），比较
+- legacy：原count_motor_curtent，逐指HAND_GetFingerCurrent，每次读取前等待200ms，共3轮取平均
+- sampler：CurrentSampler以100Hz通过HAND_GetSnapshot一次事务读取全部电机，采集0.5秒并在线统计
+的耗时、样本数和均值误差，sampler另给出标准差和P95。
+
+运行方式（在仓库根目录下）：
+    python benchmarks/bench_current.py
+"""
+import os
+import random
+import struct
+import sys
+import time
+
+import can
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from OHandSerialAPI import (
+    HAND_CMD_GET_FINGER_CURRENT,
+    HAND_CMD_SET_CUSTOM,
+    HAND_RESP_SUCCESS,
+    MAX_MOTOR_CNT,
+    SUB_CMD_GET_CURRENT,
+)
+from can_interface import delay_milli_seconds_impl
+from can_session import CanBusSession
+from current_sampler import CurrentSampler
+from sim_hand import SimulatedHand
+
+HAND_ID = 2
+MEAN_CURRENTS = [40, 55, 62, 48, 35, 80]  # mA
+NOISE_MA = 12
+DELAY_MS = 200
+AVERAGE_TIMES = 3
+
+
+class NoisyHand(SimulatedHand):
+    """电流读数为MEAN_CURRENTS加高斯噪声"""
+
+    def current(self, finger_id):
+        return max(0, int(random.gauss(MEAN_CURRENTS[finger_id], NOISE_MA)))
+
+    def response(self, cmd):
+        if cmd == HAND_CMD_SET_CUSTOM and self.decoder.packet_data[4] == SUB_CMD_GET_CURRENT:
+            return struct.pack(f"<{MAX_MOTOR_CNT}H", *(self.current(finger_id) for finger_id in range(MAX_MOTOR_CNT)))
+        if cmd == HAND_CMD_GET_FINGER_CURRENT:
+            finger_id = self.decoder.packet_data[4]
+            return struct.pack("<BH", finger_id, self.current(finger_id))
+        return super().response(cmd)
+
+
+def legacy(api):
+    sums = [0.0] * MAX_MOTOR_CNT
+    for _ in range(AVERAGE_TIMES):
+        for finger_id in range(MAX_MOTOR_CNT):
+            delay_milli_seconds_impl(DELAY_MS)
+            err, current = api.HAND_GetFingerCurrent(HAND_ID, finger_id, [0], [])
+            if err == HAND_RESP_SUCCESS:
+                sums[finger_id] += current
+    return [value / AVERAGE_TIMES for value in sums], AVERAGE_TIMES, None
+
+
+def sampled(api):
+    def read_currents():
+        err, snapshot = api.HAND_GetSnapshot(HAND_ID, fields=SUB_CMD_GET_CURRENT, remote_err=[])
+        return list(snapshot.current) if err == HAND_RESP_SUCCESS else [None] * MAX_MOTOR_CNT
+
+    sampler = CurrentSampler(read_currents, rate_hz=100)
+    stats = sampler.run(duration_s=0.5)
+    return [s.mean for s in stats], sampler.ticks, stats
+
+
+def main():
+    random.seed(1)
+    channel = "bench_current"
+    hand = NoisyHand(channel, node_id=HAND_ID).start()
+    session = CanBusSession(can.Bus(interface="virtual", channel=channel))
+    api = session.open_node(HAND_ID)
+    try:
+        print(f"{'mode':>8} {'seconds':>8} {'samples':>8} {'max |mean err| mA':>18}")
+        for name, run in (("legacy", legacy), ("sampler", sampled)):
+            start = time.perf_counter()
+            means, samples, stats = run(api)
+            elapsed = time.perf_counter() - start
+            error = max(abs(mean - expected) for mean, expected in zip(means, MEAN_CURRENTS))
+            print(f"{name:>8} {elapsed:>8.2f} {samples:>8} {error:>18.2f}")
+        for finger_id, motor in enumerate(stats):
+            print(f"  motor {finger_id}: mean={motor.mean:.1f} std={motor.std:.1f} min={motor.min} max={motor.max} p95={motor.p95:.1f}")
+    finally:
+        session.shutdown()
+        hand.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+解码吞吐量基准测试：比较逐字节HAND_OnData与整帧HAND_OnBytes两种接收路径，单位为每秒解码的数据包数。
+
+运行方式（在仓库根目录下）：
+    python benchmarks/bench_decode.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from OHandSerialAPI import HAND_CMD_GET_FINGER_POS_ALL, HAND_PROTOCOL_UART, MAX_PROTOCOL_DATA_SIZE, OHandSerialAPI
+
+ADDRESS_MASTER = 0x01
+HAND_ID = 0x02
+CAN_FRAME_SIZE = 8
+PACKET_COUNT = 20000
+
+
+class LegacyDecoder:
+    """改造前HAND_OnData使用的逐字节字符串状态机，仅作为基准对照"""
+
+    def __init__(self, address_master):
+        self.address_master = address_master
+        self.packet_data = bytearray(MAX_PROTOCOL_DATA_SIZE + 5)
+        self.is_whole_packet = False
+        self.decode_state = "WAIT_ON_HEADER_0"
+        self.byte_count = 0
+
+    def HAND_OnData(self, data):
+        if self.is_whole_packet:
+            return
+        if self.decode_state == "WAIT_ON_HEADER_0":
+            if data == 0x55:
+                self.decode_state = "WAIT_ON_HEADER_1"
+        elif self.decode_state == "WAIT_ON_HEADER_1":
+            if data == 0xAA:
+                self.decode_state = "WAIT_ON_ADDRESSED_NODE_ID"
+            else:
+                self.decode_state = "WAIT_ON_HEADER_0"
+        elif self.decode_state == "WAIT_ON_ADDRESSED_NODE_ID":
+            self.packet_data[0] = data
+            self.decode_state = "WAIT_ON_OWN_NODE_ID"
+        elif self.decode_state == "WAIT_ON_OWN_NODE_ID":
+            self.packet_data[1] = data
+            self.decode_state = "WAIT_ON_COMMAND_ID"
+        elif self.decode_state == "WAIT_ON_COMMAND_ID":
+            self.packet_data[2] = data
+            self.decode_state = "WAIT_ON_BYTECOUNT"
+        elif self.decode_state == "WAIT_ON_BYTECOUNT":
+            self.packet_data[3] = data
+            self.byte_count = data
+            if self.byte_count > MAX_PROTOCOL_DATA_SIZE:
+                self.decode_state = "WAIT_ON_HEADER_0"
+            elif self.byte_count > 0:
+                self.decode_state = "WAIT_ON_DATA"
+            else:
+                self.decode_state = "WAIT_ON_LRC"
+        elif self.decode_state == "WAIT_ON_DATA":
+            index = 4 + self.packet_data[3] - self.byte_count
+            self.packet_data[index] = data
+            self.byte_count -= 1
+            if self.byte_count == 0:
+                self.decode_state = "WAIT_ON_LRC"
+        elif self.decode_state == "WAIT_ON_LRC":
+            index = 4 + self.packet_data[3]
+            self.packet_data[index] = data
+            if self.packet_data[0] == self.address_master:
+                self.is_whole_packet = True
+            self.decode_state = "WAIT_ON_HEADER_0"
+
+
+def build_frames(payload_size):
+    """构造一个应答包（主机地址、手地址、命令、数据、LRC），并按CAN帧8字节拆分"""
+    packet = bytearray([0x55, 0xAA, ADDRESS_MASTER, HAND_ID, HAND_CMD_GET_FINGER_POS_ALL, payload_size])
+    packet += bytes(i & 0xFF for i in range(payload_size))
+    lrc = 0
+    for byte in packet[2:]:
+        lrc ^= byte
+    packet.append(lrc)
+    return [bytes(packet[i : i + CAN_FRAME_SIZE]) for i in range(0, len(packet), CAN_FRAME_SIZE)]
+
+
+def run_per_byte(decoder, frames):
+    decoded = 0
+    start = time.perf_counter()
+    for _ in range(PACKET_COUNT):
+        for frame in frames:
+            for byte in frame:
+                decoder.HAND_OnData(byte)
+        if decoder.is_whole_packet:
+            decoded += 1
+            decoder.is_whole_packet = False
+    return decoded / (time.perf_counter() - start)
+
+
+def run_per_frame(api, frames):
+    decoded = 0
+    start = time.perf_counter()
+    for _ in range(PACKET_COUNT):
+        for frame in frames:
+            api.HAND_OnBytes(frame)
+        if api.is_whole_packet:
+            decoded += 1
+            api.is_whole_packet = False
+    return decoded / (time.perf_counter() - start)
+
+
+def new_api():
+    return OHandSerialAPI(None, HAND_PROTOCOL_UART, ADDRESS_MASTER, None)
+
+
+def main():
+    print(f"{'payload':>8} {'frames':>6} {'legacy OnData':>15} {'OnData wrapper':>15} {'OnBytes':>15} {'speedup':>8}")
+    for payload_size in (0, 5, 24, MAX_PROTOCOL_DATA_SIZE - 1):
+        frames = build_frames(payload_size)
+        legacy = run_per_byte(LegacyDecoder(ADDRESS_MASTER), frames)
+        wrapper = run_per_byte(new_api(), frames)
+        bulk = run_per_frame(new_api(), frames)
+        print(
+            f"{payload_size:>8} {len(frames):>6} {legacy:>11.0f} p/s {wrapper:>11.0f} p/s {bulk:>11.0f} p/s {bulk / legacy:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
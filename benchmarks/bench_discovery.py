@@ -0,0 +1,100 @@
+"""
+节点发现基准测试：虚拟总线上挂3个模拟节点，比较逐个节点ID调用HAND_GetFirmwareVersion
+（固定255ms超时 / 20ms探测超时）与CAN_DiscoverNodes一次性探测的耗时。
+
+逐个探测在SWEEP_IDS范围内测量后按247个ID折算，CAN_DiscoverNodes直接扫描2..247。
+另用发送队列只有TX_QUEUE_FRAMES帧的总线（队列满时send抛出CanError，模拟PCAN连续发送探测帧）检查仍能找到全部节点。
+
+运行方式（在仓库根目录下）：
+    python benchmarks/bench_discovery.py
+"""
+import os
+import sys
+import time
+
+import can
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from OHandSerialAPI import HAND_PROTOCOL_UART, HAND_RESP_SUCCESS, OHandSerialAPI
+from can_interface import CAN_DiscoverNodes, CAN_StartReceiver, delay_milli_seconds_impl, get_milli_seconds_impl, send_data_impl
+from sim_hand import ADDRESS_MASTER, SimulatedHand
+
+CHANNEL = "bench_discovery"
+NODE_IDS = (2, 9, 120)
+ALL_IDS = range(2, 248)
+SWEEP_IDS = range(2, 14)
+TX_QUEUE_FRAMES = 32
+TX_FRAME_MS = 0.25  # 1Mbit/s下一帧约0.1~0.13ms，留有余量
+
+
+class SmallTxQueueBus:
+    """发送队列按TX_FRAME_MS每帧排空，队列满时send抛出CanError"""
+
+    def __init__(self, bus):
+        self.bus = bus
+        self.sent = []  # 最近发送的时间(ms)
+        self.rejected = 0
+
+    def send(self, msg, timeout=None):
+        now = get_milli_seconds_impl()
+        self.sent = [t for t in self.sent if now - t < TX_QUEUE_FRAMES * TX_FRAME_MS]
+        if len(self.sent) >= TX_QUEUE_FRAMES:
+            self.rejected += 1
+            raise can.CanError("transmit buffer full")
+        self.sent.append(now)
+        self.bus.send(msg, timeout)
+
+    def recv(self, timeout=None):
+        return self.bus.recv(timeout)
+
+
+def sweep(probe):
+    bus = can.Bus(interface="virtual", channel=CHANNEL)
+    api = OHandSerialAPI(bus, HAND_PROTOCOL_UART, ADDRESS_MASTER, send_data_impl)
+    api.HAND_SetTimerFunction(get_milli_seconds_impl, delay_milli_seconds_impl)
+    api.HAND_SetCommandTimeOut(255)
+    if probe:
+        api.HAND_SetProbeTimeout()
+    CAN_StartReceiver(bus, api)
+    try:
+        start = time.perf_counter()
+        found = [node_id for node_id in SWEEP_IDS if api.HAND_GetFirmwareVersion(node_id, [0], [0], [0], [])[0] == HAND_RESP_SUCCESS]
+        elapsed = time.perf_counter() - start
+    finally:
+        api.shutdown()
+        bus.shutdown()
+    return elapsed * len(ALL_IDS) / len(SWEEP_IDS), found
+
+
+def discover(small_tx_queue=False):
+    bus = can.Bus(interface="virtual", channel=CHANNEL)
+    target = SmallTxQueueBus(bus) if small_tx_queue else bus
+    try:
+        start = time.perf_counter()
+        nodes = CAN_DiscoverNodes(target, ALL_IDS)
+        elapsed = time.perf_counter() - start
+    finally:
+        bus.shutdown()
+    return elapsed, sorted(nodes), getattr(target, 'rejected', 0)
+
+
+def main():
+    hands = [SimulatedHand(CHANNEL, node_id=node_id).start() for node_id in NODE_IDS]
+    try:
+        print(f"nodes on bus: {NODE_IDS}, scanning {len(ALL_IDS)} ids")
+        elapsed, found = sweep(probe=False)
+        print(f"  sequential, 255 ms timeout   {elapsed:8.2f} s (extrapolated)  found in {SWEEP_IDS}: {found}")
+        elapsed, found = sweep(probe=True)
+        print(f"  sequential, 20 ms probe      {elapsed:8.2f} s (extrapolated)  found in {SWEEP_IDS}: {found}")
+        elapsed, found, _ = discover()
+        print(f"  CAN_DiscoverNodes            {elapsed:8.2f} s                 found: {found}")
+        elapsed, found, rejected = discover(small_tx_queue=True)
+        print(f"  CAN_DiscoverNodes, {TX_QUEUE_FRAMES}-frame TX {elapsed:8.2f} s                 found: {found}  ({rejected} sends rejected)")
+    finally:
+        for hand in hands:
+            hand.stop()
+
+
+if __name__ == "__main__":
+    main()
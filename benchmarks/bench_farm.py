@@ -0,0 +1,130 @@
+"""
+多主机测试基准测试：在localhost上启动2个测试代理子进程（python farm.py），每个代理8个模拟端口，
+协调端另在本机运行8个模拟端口，测试脚本使用bench_process_runner（每轮固定次数的HAND_ReadFingerPosAll事务）。
+检查：
+- 协调端通过设备查询列出全部远程端口（"代理名/端口"）
+- 本机和远程端口的逐轮结果和日志合并到同一个ResultSink和日志记录器，每个端口都有结果
+- 协调端CONTROL.stop()后各代理停止、run()结束的耗时
+- 代理拒绝口令错误、脚本不在测试脚本目录中或设备不属于本代理的计划
+
+运行方式（在仓库根目录下）：
+    python benchmarks/bench_farm.py
+"""
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import bench_process_runner as script
+from device_runner import DeviceRunner
+from farm import FARM, read_messages, send_message
+from result_sink import ResultSink
+from run_control import CONTROL
+
+AGENTS = {'line1': 7611, 'line2': 7612}
+PORTS_PER_HOST = 8
+NODE_ID = 2
+DURATION_S = 5
+TOKEN = 'bench'
+
+
+class CountingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.agents = {}
+
+    def emit(self, record):
+        message = record.getMessage()
+        agent = message[1:message.index(']')] if message.startswith('[') and not message.startswith('[port') else 'local'
+        self.agents[agent] = self.agents.get(agent, 0) + 1
+
+
+def start_agent(name, port):
+    devices = ','.join(f'{name}_{i}:{NODE_ID}' for i in range(PORTS_PER_HOST))
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT_DIR, 'farm.py'), '--name', name, '--bind', f'127.0.0.1:{port}',
+         '--devices', devices, '--script-dir', BENCH_DIR, '--token', TOKEN],
+        cwd=ROOT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f'agent {name} did not start')
+
+
+def rejected(port, message):
+    """直接向代理发送计划，返回代理的错误消息，未拒绝时返回None"""
+    with socket.create_connection(('127.0.0.1', port), timeout=5) as conn:
+        send_message(conn, message)
+        for reply in read_messages(conn):
+            if reply.get('type') == 'error':
+                return reply['message']
+            if reply.get('type') == 'done':
+                return None
+
+
+def run(devices, stop_after=None):
+    """返回(各端口轮次数, 停止耗时ms)"""
+    CONTROL.start()
+    runner = FARM.runner(script.__name__, DeviceRunner(script.create_test, script.run_port_round, control=CONTROL,
+                                                       log=script.logger), log=script.logger)
+    stopped_at = []
+    if stop_after is not None:
+        threading.Timer(stop_after, lambda: (stopped_at.append(time.perf_counter()), CONTROL.stop())).start()
+    with tempfile.TemporaryDirectory() as folder:
+        with ResultSink(os.path.join(folder, 'results.jsonl')) as sink:
+            for record in runner.run(devices, time.time() + DURATION_S):
+                sink.add(record)
+            rounds = {aggregate.port: aggregate.rounds for aggregate in sink.ports.values()}
+    stop_ms = (time.perf_counter() - stopped_at[0]) * 1e3 if stopped_at else None
+    return rounds, stop_ms
+
+
+def main():
+    agents = [start_agent(name, port) for name, port in AGENTS.items()]
+    counter = CountingHandler()
+    script.logger.addHandler(counter)
+    try:
+        FARM.configure(', '.join(f'{name}=127.0.0.1:{port}' for name, port in AGENTS.items()), TOKEN)
+        remote_ports = FARM.list_ports()
+        local_ports = [f'local_{i}' for i in range(PORTS_PER_HOST)]
+        print(f"remote ports: {len(remote_ports)} ({remote_ports[0]} ...), local ports: {len(local_ports)}")
+        devices = [(port, FARM.devices(port)[0][0]) for port in remote_ports] + [(port, NODE_ID) for port in local_ports]
+
+        rounds, _ = run(devices)
+        print(f"{'host':>6} {'ports':>6} {'rounds':>7} {'logs':>6}")
+        for host in ['local', *AGENTS]:
+            ports = [port for port in rounds if (FARM.split(port)[0] or 'local') == host]
+            print(f"{host:>6} {len(ports):>6} {sum(rounds[port] for port in ports):>7} {counter.agents.get(host, 0):>6}")
+        print(f"ports with results: {len(rounds)}/{len(devices)}")
+
+        _, stop_ms = run(devices, stop_after=2)
+        print(f"stop -> run() returned in {stop_ms:.0f} ms")
+
+        port = AGENTS['line1']
+        plan = {'type': 'plan', 'script': script.__name__, 'devices': [['line1_0', NODE_ID]], 'duration_s': 1}
+        for name, message in (("wrong token", dict(plan, token='x')),
+                              ("script not allowed", dict(plan, script='os', token=TOKEN)),
+                              ("foreign device", dict(plan, devices=[['PCAN_USBBUS1', NODE_ID]], token=TOKEN))):
+            print(f"{name}: {rejected(port, message) or 'NOT REJECTED'}")
+    finally:
+        for agent in agents:
+            agent.terminate()
+            agent.wait()
+
+
+if __name__ == "__main__":
+    main()
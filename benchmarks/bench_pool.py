@@ -0,0 +1,82 @@
+"""
+会话池基准测试：模拟测试脚本的每一轮（借用通道、对一个节点执行HAND_GetFingerPosAll、归还），
+比较每轮打开/关闭CanBusSession与从TransportPool借用已打开会话的每轮耗时。
+虚拟总线打开本身几乎没有开销，差值主要来自接收线程的启动和停止；真实PCAN通道每次打开还要再加数十毫秒。
+
+另外验证会话运行期间可以通过session.tap()在同一通道上执行节点发现。
+
+运行方式（在仓库根目录下）：
+    python benchmarks/bench_pool.py
+"""
+import os
+import sys
+import time
+
+import can
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from OHandSerialAPI import HAND_RESP_SUCCESS, MAX_MOTOR_CNT
+from can_interface import CAN_DiscoverNodes
+from can_session import CanBusSession
+from sim_hand import SimulatedHand
+from transport_pool import TransportPool
+
+HAND_ID = 2
+ROUNDS = 50
+
+
+def one_round(session):
+    api = session.open_node(HAND_ID)
+    err, _, _ = api.HAND_GetFingerPosAll(HAND_ID, [0] * MAX_MOTOR_CNT, [0] * MAX_MOTOR_CNT, [MAX_MOTOR_CNT], [])
+    return err == HAND_RESP_SUCCESS
+
+
+def measure(pooled):
+    channel = f"bench_pool_{int(pooled)}"
+    hand = SimulatedHand(channel, node_id=HAND_ID).start()
+    pool = TransportPool()
+    open_session = lambda: CanBusSession(can.Bus(interface="virtual", channel=channel))
+    try:
+        ok = 0
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            if pooled:
+                session = pool.acquire(channel, open_session)
+                try:
+                    ok += one_round(session)
+                finally:
+                    pool.release(channel)
+            else:
+                session = open_session()
+                try:
+                    ok += one_round(session)
+                finally:
+                    session.shutdown()
+        per_round = (time.perf_counter() - start) / ROUNDS
+        opens = pool.stats().get(channel, (0, ROUNDS))[1]
+
+        found = None
+        if pooled:
+            # 会话仍由池持有并在运行，通过tap在同一通道上发现节点
+            session = pool.acquire(channel, open_session)
+            with session.tap() as bus:
+                found = CAN_DiscoverNodes(bus, range(2, 10))
+            pool.release(channel)
+    finally:
+        pool.close_all()
+        hand.stop()
+    return per_round, ok, opens, found
+
+
+def main():
+    print(f"{'mode':>10} {'ms/round':>9} {'ok':>4} {'opens':>6}")
+    for name, pooled in (("reopen", False), ("pooled", True)):
+        per_round, ok, opens, found = measure(pooled)
+        print(f"{name:>10} {per_round * 1e3:>9.3f} {ok:>4} {opens:>6}")
+        if found is not None:
+            print(f"discovery through tap: {found}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+预编译命令基准测试：比较每次调用HAND_SetFingerPos（校验、打包、计算LRC、分帧）与
+HAND_PrepareCmd预编译后HAND_SendPrepared直接发送的开销。
+
+- send only：发送到丢弃所有帧的总线对象，只统计主机侧编码和分帧开销
+- round trip：对虚拟总线上的模拟节点执行完整的6指手势（含应答）
+
+运行方式（在仓库根目录下）：
+    python benchmarks/bench_prepared.py
+"""
+import os
+import sys
+import time
+
+import can
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from OHandSerialAPI import COMMAND_CODECS, HAND_CMD_SET_FINGER_POS, HAND_PROTOCOL_UART, HAND_RESP_SUCCESS, MAX_MOTOR_CNT, OHandSerialAPI
+from can_interface import CAN_StartReceiver, delay_milli_seconds_impl, get_milli_seconds_impl, send_data_impl, send_prepared_impl
+from sim_hand import ADDRESS_MASTER, SimulatedHand
+
+HAND_ID = 2
+SPEED = 100
+GESTURE = [36044, 62258, 62258, 62258, 62258, 728]
+SEND_ROUNDS = 20000
+TRIP_ROUNDS = 300
+
+
+class NullBus:
+    """丢弃所有帧的总线，只用于测量发送路径的主机侧开销"""
+
+    def send(self, msg):
+        pass
+
+
+def make_api(bus):
+    api = OHandSerialAPI(bus, HAND_PROTOCOL_UART, ADDRESS_MASTER, send_data_impl)
+    api.HAND_SetTimerFunction(get_milli_seconds_impl, delay_milli_seconds_impl)
+    api.HAND_SetSendPreparedFunction(send_prepared_impl)
+    api.HAND_SetCommandTimeOut(255)
+    return api
+
+
+def prepare(api):
+    return [api.HAND_PrepareCmd(HAND_ID, HAND_CMD_SET_FINGER_POS, (i, GESTURE[i], SPEED)) for i in range(MAX_MOTOR_CNT)]
+
+
+def send_only():
+    api = make_api(NullBus())
+    prepared = prepare(api)
+    request = COMMAND_CODECS[HAND_CMD_SET_FINGER_POS].request
+
+    start = time.perf_counter()
+    for _ in range(SEND_ROUNDS):
+        for i in range(MAX_MOTOR_CNT):
+            data = request.pack(i, GESTURE[i], SPEED)
+            api.HAND_SendCmd(HAND_ID, HAND_CMD_SET_FINGER_POS, data, len(data))
+    per_cmd = (time.perf_counter() - start) / (SEND_ROUNDS * MAX_MOTOR_CNT)
+
+    start = time.perf_counter()
+    for _ in range(SEND_ROUNDS):
+        for i in range(MAX_MOTOR_CNT):
+            api.HAND_SendPreparedCmd(prepared[i])
+    per_prepared = (time.perf_counter() - start) / (SEND_ROUNDS * MAX_MOTOR_CNT)
+    return per_cmd, per_prepared
+
+
+def round_trip():
+    channel = "bench_prepared"
+    hand = SimulatedHand(channel, node_id=HAND_ID).start()
+    bus = can.Bus(interface="virtual", channel=channel)
+    api = make_api(bus)
+    CAN_StartReceiver(bus, api)
+    prepared = prepare(api)
+
+    try:
+        ok = 0
+        start = time.perf_counter()
+        for _ in range(TRIP_ROUNDS):
+            for i in range(MAX_MOTOR_CNT):
+                ok += api.HAND_SetFingerPos(HAND_ID, i, GESTURE[i], SPEED, []) == HAND_RESP_SUCCESS
+        per_call = (time.perf_counter() - start) / TRIP_ROUNDS, ok
+
+        ok = 0
+        start = time.perf_counter()
+        for _ in range(TRIP_ROUNDS):
+            for i in range(MAX_MOTOR_CNT):
+                ok += api.HAND_SendPrepared(prepared[i], []) == HAND_RESP_SUCCESS
+        per_prepared = (time.perf_counter() - start) / TRIP_ROUNDS, ok
+    finally:
+        api.shutdown()
+        bus.shutdown()
+        hand.stop()
+    return per_call, per_prepared
+
+
+def main():
+    per_cmd, per_prepared = send_only()
+    print("send only (per command)")
+    print(f"  pack + HAND_SendCmd   {per_cmd * 1e6:8.2f} us")
+    print(f"  HAND_SendPreparedCmd  {per_prepared * 1e6:8.2f} us")
+
+    (t_call, ok_call), (t_prepared, ok_prepared) = round_trip()
+    print(f"round trip (per {MAX_MOTOR_CNT}-finger gesture, {TRIP_ROUNDS} gestures)")
+    print(f"  HAND_SetFingerPos     {t_call * 1e3:8.3f} ms  ok={ok_call}")
+    print(f"  HAND_SendPrepared     {t_prepared * 1e3:8.3f} ms  ok={ok_prepared}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+多进程运行模式基准测试：16个端口各一个模拟手，每轮执行固定次数的HAND_ReadFingerPosAll事务，比较
+- threads：DeviceRunner，本进程内每台设备一个线程
+- processes N：ProcessRunner，端口分给N个子进程（每个子进程在自己的虚拟总线上运行分到的模拟手）
+在固定时长内完成的事务数，以及进程模式下界面调用CONTROL.stop()到run()结束的耗时。
+每个子进程的日志经队列回到主进程，计数检查各端口的轮次和日志均已送达。
+吞吐量随进程数的提升取决于CPU核数，单核机器上进程模式不会更快。
+
+运行方式（在仓库根目录下）：
+    python benchmarks/bench_process_runner.py
+"""
+import logging
+import os
+import sys
+import threading
+import time
+
+import can
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from OHandSerialAPI import HAND_RESP_SUCCESS
+from can_session import CanBusSession
+from device_runner import DeviceRunner
+from process_runner import ProcessRunner
+from run_control import CONTROL
+from sim_hand import SimulatedHand
+
+PORTS = [f'bench_process_{i}' for i in range(16)]
+NODE_ID = 2
+TRANSACTIONS_PER_ROUND = 20
+DURATION_S = 5
+PROCESSES = [2, 4]
+
+logger = logging.getLogger('bench_process_runner')
+logger.setLevel(logging.INFO)
+
+
+class SimTest:
+    """与测试脚本的测试类接口相同：connect_device()时在该端口的虚拟总线上启动模拟手"""
+
+    def __init__(self, port, node_id):
+        self.port = port
+        self.node_id = node_id
+        self.hand = None
+        self.session = None
+        self.api = None
+
+    def connect_device(self):
+        self.hand = SimulatedHand(self.port, self.node_id).start()
+        self.session = CanBusSession(can.Bus(interface="virtual", channel=self.port))
+        self.api = self.session.open_node(self.node_id)
+        return True
+
+    def disConnect_device(self):
+        self.session.shutdown()
+        self.hand.stop()
+
+
+def create_test(port, node_id):
+    return SimTest(port, node_id)
+
+
+def run_port_round(test):
+    ok = 0
+    for _ in range(TRANSACTIONS_PER_ROUND):
+        CONTROL.checkpoint()
+        ok += test.api.HAND_ReadFingerPosAll(test.node_id).err == HAND_RESP_SUCCESS
+    logger.info(f'[port = {test.port}]{ok}/{TRANSACTIONS_PER_ROUND}')
+    return {'port': test.port, 'gestures': [{'result': '通过' if ok == TRANSACTIONS_PER_ROUND else '不通过'}]}
+
+
+class CountingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+
+    def emit(self, record):
+        self.count += 1
+
+
+def run(runner, stop_after=None):
+    """返回(事务数, 端口数, 通过轮次比例, 停止耗时ms)"""
+    CONTROL.start()
+    rounds = passed = 0
+    ports = set()
+    stopped_at = []
+    if stop_after is not None:
+        threading.Timer(stop_after, lambda: (stopped_at.append(time.perf_counter()), CONTROL.stop())).start()
+    for record in runner.run(((port, NODE_ID) for port in PORTS), time.time() + DURATION_S):
+        rounds += 1
+        passed += record.port_result['gestures'][0]['result'] == '通过'
+        ports.add(record.port)
+    stop_ms = (time.perf_counter() - stopped_at[0]) * 1e3 if stopped_at else None
+    return rounds * TRANSACTIONS_PER_ROUND, len(ports), passed / max(rounds, 1), stop_ms
+
+
+def main():
+    counter = CountingHandler()
+    logger.addHandler(counter)
+    print(f"{len(PORTS)} ports, {os.cpu_count()} CPUs, {DURATION_S} s")
+    print(f"{'mode':>12} {'txn/s':>8} {'ports':>6} {'passed':>7} {'logs':>6}")
+    modes = [("threads", DeviceRunner(create_test, run_port_round, control=CONTROL, log=logger))]
+    modes += [(f"processes {n}", ProcessRunner(__name__, processes=n, control=CONTROL, log=logger)) for n in PROCESSES]
+    for name, runner in modes:
+        counter.count = 0
+        transactions, ports, passed, _ = run(runner)
+        print(f"{name:>12} {transactions / DURATION_S:>8.0f} {ports:>6} {passed:>7.0%} {counter.count:>6}")
+    _, _, _, stop_ms = run(ProcessRunner(__name__, processes=PROCESSES[-1], control=CONTROL, log=logger), stop_after=2)
+    print(f"stop -> run() returned in {stop_ms:.0f} ms (processes {PROCESSES[-1]})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+复位后就绪检测基准测试：模拟整机架复位，各模拟手启动耗时不同（启动期间不应答，随后一段时间应答ERR_STATUS_INIT），
+比较原测试固定等待DELAY_MS_DEVICE_REBOOT与CanBusSession.wait_until_ready同时轮询全部节点的等待时间，
+并检查返回时各节点确实已接受命令。
+
+运行方式（在仓库根目录下）：
+    python benchmarks/bench_ready.py
+"""
+import os
+import sys
+import time
+
+import can
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from OHandSerialAPI import CMD_ERROR_MASK, ERR_STATUS_INIT, HAND_RESP_SUCCESS
+from can_session import CanBusSession
+from sim_hand import SimulatedHand
+
+DELAY_MS_DEVICE_REBOOT = 15000  # test_can_api.py中复位后的固定等待
+BOOT_SECONDS = [0.3, 0.5, 0.8, 1.1, 1.4, 1.8]  # 各节点启动（不应答）耗时
+INIT_SECONDS = 0.4  # 启动后应答ERR_STATUS_INIT的时间
+
+
+class RebootingHand(SimulatedHand):
+    """reset()后boot_s秒内不应答，之后init_s秒内对所有命令应答ERR_STATUS_INIT"""
+
+    def __init__(self, channel, node_id, boot_s, init_s):
+        super().__init__(channel, node_id)
+        self.boot_s = boot_s
+        self.init_s = init_s
+        self.reset_at = None
+
+    def reset(self):
+        self.reset_at = time.perf_counter()
+
+    def ready(self):
+        return time.perf_counter() - self.reset_at >= self.boot_s + self.init_s
+
+    def response(self, cmd):
+        elapsed = time.perf_counter() - self.reset_at
+        if elapsed < self.boot_s:
+            return None
+        if elapsed < self.boot_s + self.init_s:
+            self._reply(cmd | CMD_ERROR_MASK, bytes([ERR_STATUS_INIT]))
+            return None
+        return super().response(cmd)
+
+
+def main():
+    channel = "bench_ready"
+    hands = [RebootingHand(channel, node_id, boot_s, INIT_SECONDS).start() for node_id, boot_s in enumerate(BOOT_SECONDS, start=2)]
+    session = CanBusSession(can.Bus(interface="virtual", channel=channel))
+    try:
+        for hand in hands:
+            hand.reset()
+        start = time.perf_counter()
+        results = session.wait_until_ready([hand.node_id for hand in hands], DELAY_MS_DEVICE_REBOOT)
+        elapsed = time.perf_counter() - start
+        ready = sum(results[hand.node_id] == HAND_RESP_SUCCESS and hand.ready() for hand in hands)
+        print(f"{len(hands)} nodes, slowest ready after {(max(BOOT_SECONDS) + INIT_SECONDS) * 1e3:.0f} ms")
+        print(f"{'mode':>8} {'wait ms':>8} {'ready':>6}")
+        print(f"{'fixed':>8} {DELAY_MS_DEVICE_REBOOT:>8} {len(hands):>3}/{len(hands)}")
+        print(f"{'polled':>8} {elapsed * 1e3:>8.0f} {ready:>3}/{len(hands)}")
+    finally:
+        session.shutdown()
+        for hand in hands:
+            hand.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+命令往返时延基准测试：比较HAND_GetResponse轮询模式(RECV_MODE_POLL)与事件模式(RECV_MODE_EVENT)，
+对模拟节点发送HAND_GetFingerPosAll，统计p50/p99往返时间。
+
+运行方式（在仓库根目录下）：
+    python benchmarks/bench_response.py
+"""
+import os
+import statistics
+import sys
+import time
+
+import can
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from OHandSerialAPI import HAND_PROTOCOL_UART, HAND_RESP_SUCCESS, MAX_MOTOR_CNT, OHandSerialAPI
+from can_interface import CAN_StartReceiver, delay_milli_seconds_impl, get_milli_seconds_impl, recv_data_impl, send_data_impl
+from sim_hand import ADDRESS_MASTER, SimulatedHand
+
+HAND_ID = 2
+ROUNDS = 500
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def measure(event_mode):
+    channel = f"bench_response_{int(event_mode)}"
+    hand = SimulatedHand(channel, node_id=HAND_ID).start()
+    bus = can.Bus(interface="virtual", channel=channel)
+    api = OHandSerialAPI(bus, HAND_PROTOCOL_UART, ADDRESS_MASTER, send_data_impl, recv_data_impl)
+    api.HAND_SetTimerFunction(get_milli_seconds_impl, delay_milli_seconds_impl)
+    api.HAND_SetCommandTimeOut(255)
+    if event_mode:
+        CAN_StartReceiver(bus, api)
+
+    samples = []
+    try:
+        for _ in range(ROUNDS):
+            target_pos, current_pos = [0] * MAX_MOTOR_CNT, [0] * MAX_MOTOR_CNT
+            start = time.perf_counter()
+            err, _, _ = api.HAND_GetFingerPosAll(HAND_ID, target_pos, current_pos, [MAX_MOTOR_CNT], [])
+            elapsed = time.perf_counter() - start
+            if err == HAND_RESP_SUCCESS:
+                samples.append(elapsed * 1000)
+    finally:
+        api.shutdown()
+        bus.shutdown()
+        hand.stop()
+    return samples
+
+
+def main():
+    print(f"{'mode':>6} {'ok':>5} {'p50 ms':>8} {'p99 ms':>8} {'mean ms':>8}")
+    for name, event_mode in (("poll", False), ("event", True)):
+        samples = measure(event_mode)
+        print(
+            f"{name:>6} {len(samples):>5} {percentile(samples, 50):>8.3f} {percentile(samples, 99):>8.3f} {statistics.mean(samples):>8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+测试结果内存基准测试：模拟16个端口的手势压力测试，每轮每端口28个手势结果，比较
+- list：原main的方式，每轮的端口结果追加到overall_result列表
+- sink：ResultSink，每轮结果写入JSONL文件，内存中只保留各端口汇总
+在不同轮数下结果占用的内存（tracemalloc）和每轮的处理耗时（计时另外运行一次，不开tracemalloc），并检查sink写入的文件可完整读回。
+
+运行方式（在仓库根目录下）：
+    python benchmarks/bench_result_sink.py
+"""
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from device_runner import DeviceRound
+from result_sink import ResultSink, read_results
+
+PORTS = [f'PCAN_USBBUS{i}' for i in range(1, 17)]
+GESTURES_PER_ROUND = 28
+ROUNDS = [50, 200, 800]  # 每端口轮数
+FAIL_RATE = 0.001
+
+
+def make_round(port, node_id, round_num):
+    timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    gestures = [
+        {
+            "timestamp": timestamp,
+            "description": f'手势{index}',
+            "expected": '',
+            "content": [random.randint(30, 90) for _ in range(6)],
+            "result": '不通过' if random.random() < FAIL_RATE else '通过',
+            "comment": '无',
+        }
+        for index in range(GESTURES_PER_ROUND)
+    ]
+    return DeviceRound(port, node_id, round_num, {'port': port, 'gestures': gestures})
+
+
+def run(rounds, use_sink, path):
+    overall_result = []
+    sink = ResultSink(path) if use_sink else None
+    for round_num in range(1, rounds + 1):
+        for node_id, port in enumerate(PORTS, start=2):
+            record = make_round(port, node_id, round_num)
+            if use_sink:
+                sink.add(record)
+            else:
+                overall_result.append(record.port_result)
+    if use_sink:
+        sink.close()
+        overall_result = sink.results()
+    return overall_result
+
+
+def measure(rounds, use_sink, path):
+    """返回(run结束时仍占用的内存字节数, 每端口每轮的处理秒数)"""
+    start = time.perf_counter()
+    run(rounds, use_sink, path)
+    per_round = (time.perf_counter() - start) / (rounds * len(PORTS))
+    if use_sink:
+        os.remove(path)
+    tracemalloc.start()
+    overall_result = run(rounds, use_sink, path)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del overall_result
+    return retained, per_round
+
+
+def main():
+    random.seed(1)
+    print(f"{len(PORTS)} ports, {GESTURES_PER_ROUND} gestures/round")
+    print(f"{'mode':>6} {'rounds':>7} {'retained MB':>12} {'us/round':>9}")
+    with tempfile.TemporaryDirectory() as folder:
+        for rounds in ROUNDS:
+            for name, use_sink in (("list", False), ("sink", True)):
+                path = os.path.join(folder, f'results_{rounds}.jsonl')
+                retained, per_round = measure(rounds, use_sink, path)
+                print(f"{name:>6} {rounds:>7} {retained / 1e6:>12.2f} {per_round * 1e6:>9.1f}")
+            stored = sum(1 for _ in read_results(path))
+            print(f"{'':>6} {'':>7} file {os.path.getsize(path) / 1e6:.1f} MB, {stored}/{rounds * len(PORTS)} rounds read back")
+
+
+if __name__ == "__main__":
+    main()
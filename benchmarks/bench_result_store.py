@@ -0,0 +1,100 @@
+"""
+按列存放测试结果的基准测试：模拟16个端口的老化测试结果（每行一个手势结果，带6个电机电流和位置），比较
+- dicts：原方式，每行一个结果字典，通过/不通过为字符串，电流为列表
+- store：ResultStore，各端口一组array列，字符串编码为小整数
+- capped：ResultStore(max_rows_per_port=CAP_ROWS)，超过上限后按轮次均匀降采样，内存不随轮次增长
+保存的内存（tracemalloc），以及统计各端口结果和各电机电流均值/最大值（界面判断结果、电流显示和趋势分析所需）的耗时。
+
+运行方式（在仓库根目录下）：
+    python benchmarks/bench_result_store.py
+"""
+import datetime
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from OHandSerialAPI import MAX_MOTOR_CNT
+from result_store import ResultStore
+
+PORTS = [f'PCAN_USBBUS{i}' for i in range(1, 17)]
+ROWS_PER_PORT = [1000, 10000]
+FAIL_RATE = 0.001
+CAP_ROWS = 2000
+
+
+def make_gesture():
+    return {
+        "timestamp": datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "description": '抓握',
+        "expected": '',
+        "content": [round(random.gauss(60, 10), 3) for _ in range(MAX_MOTOR_CNT)],
+        "positions": [random.randint(0, 200) for _ in range(MAX_MOTOR_CNT)],
+        "result": '不通过' if random.random() < FAIL_RATE else '通过',
+        "comment": '无',
+    }
+
+
+def build(rows, use_store, max_rows_per_port=None):
+    random.seed(1)
+    store = ResultStore(max_rows_per_port) if use_store else []
+    for round_num in range(1, rows + 1):
+        for port in PORTS:
+            port_result = {'port': port, 'gestures': [make_gesture()]}
+            if use_store:
+                store.append_port_result(round_num, port_result)
+            else:
+                store.append(port_result)
+    return store
+
+
+def summarize_dicts(overall_result):
+    """按原界面get_test_result/get_currents_from_test_result的方式逐行遍历"""
+    results, sums, counts, maxima = {}, {}, {}, {}
+    for item in overall_result:
+        port = item['port']
+        results.setdefault(port, '通过')
+        for gesture in item['gestures']:
+            if gesture['result'] == '不通过':
+                results[port] = '不通过'
+            port_sums = sums.setdefault(port, [0.0] * MAX_MOTOR_CNT)
+            port_max = maxima.setdefault(port, [0.0] * MAX_MOTOR_CNT)
+            counts[port] = counts.get(port, 0) + 1
+            for motor, value in enumerate(gesture['content']):
+                port_sums[motor] += value
+                port_max[motor] = max(port_max[motor], value)
+    return results, {port: [value / counts[port] for value in sums[port]] for port in sums}
+
+
+def summarize_store(store):
+    summary = store.summary()
+    return store.port_results(), {port: [motor['mean'] for motor in item['currents']] for port, item in summary.items()}
+
+
+def main():
+    print(f"{len(PORTS)} ports")
+    print(f"{'mode':>6} {'rows/port':>10} {'MB':>8} {'summary ms':>11}")
+    for rows in ROWS_PER_PORT:
+        means = {}
+        for name, use_store, cap, summarize in (("dicts", False, None, summarize_dicts),
+                                                ("store", True, None, summarize_store),
+                                                ("capped", True, CAP_ROWS, summarize_store)):
+            tracemalloc.start()
+            store = build(rows, use_store, cap)
+            retained, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            start = time.perf_counter()
+            results, means[name] = summarize(store)
+            elapsed = time.perf_counter() - start
+            print(f"{name:>6} {rows:>10} {retained / 1e6:>8.2f} {elapsed * 1e3:>11.2f}")
+            del store
+        for name in ("store", "capped"):
+            error = max(abs(a - b) for port in PORTS for a, b in zip(means['dicts'][port], means[name][port]))
+            print(f"{'':>6} {'':>10} {name}: max mean difference {error:.4f} mA")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+多轮测试调度基准测试：模拟一个混合速度的测试架（每台设备一轮耗时不同），在相同时长内比较
+- lockstep：原脚本的方式，每轮新建ThreadPoolExecutor，所有设备完成本轮后才开始下一轮
+- runner：DeviceRunner，每台设备一个常驻线程，完成一轮立即开始下一轮
+折算为每小时完成的总轮数。
+
+运行方式（在仓库根目录下）：
+    python benchmarks/bench_runner.py
+"""
+import concurrent.futures
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from device_runner import DeviceRunner
+
+ROUND_SECONDS = [0.02, 0.03, 0.05, 0.08, 0.12, 0.2]  # 各设备一轮的耗时
+DURATION_S = 3.0
+
+
+class FakeTest:
+    def __init__(self, port, round_s):
+        self.port = port
+        self.round_s = round_s
+
+    def connect_device(self):
+        return True
+
+    def disConnect_device(self):
+        pass
+
+
+def run_round(test):
+    time.sleep(test.round_s)
+    return {"port": test.port, "gestures": []}
+
+
+def lockstep(devices):
+    rounds = 0
+    end_time = time.time() + DURATION_S
+    while time.time() < end_time:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=64) as executor:
+            futures = [executor.submit(run_round, FakeTest(port, round_s)) for port, round_s in devices]
+            for future in concurrent.futures.as_completed(futures):
+                future.result()
+                rounds += 1
+    return rounds
+
+
+def runner(devices):
+    rounds = 0
+    device_runner = DeviceRunner(FakeTest, run_round)
+    for _ in device_runner.run(devices, time.time() + DURATION_S):
+        rounds += 1
+    return rounds
+
+
+def main():
+    devices = [(f"dev{i}", round_s) for i, round_s in enumerate(ROUND_SECONDS)]
+    print(f"{'mode':>10} {'rounds':>7} {'rounds/h':>10}")
+    for name, run in (("lockstep", lockstep), ("runner", runner)):
+        start = time.perf_counter()
+        rounds = run(devices)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>10} {rounds:>7} {rounds / elapsed * 3600:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+同一CAN通道多节点吞吐量基准测试：比较逐个节点串行请求与CanBusSession并发(流水线)请求，
+每个模拟节点应答前有固定处理时间，统计每秒完成的请求数。
+
+运行方式（在仓库根目录下）：
+    python benchmarks/bench_session.py
+"""
+import concurrent.futures
+import os
+import sys
+import time
+
+import can
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from OHandSerialAPI import HAND_RESP_SUCCESS, MAX_MOTOR_CNT
+from can_session import CanBusSession
+from sim_hand import SimulatedHand
+
+NODE_IDS = [2, 3, 4, 5]
+REQUESTS_PER_NODE = 100
+NODE_DELAY_S = 0.002
+
+
+def get_pos_all(api, node_id):
+    ok = 0
+    for _ in range(REQUESTS_PER_NODE):
+        err, _, _ = api.HAND_GetFingerPosAll(node_id, [0] * MAX_MOTOR_CNT, [0] * MAX_MOTOR_CNT, [MAX_MOTOR_CNT], [])
+        ok += err == HAND_RESP_SUCCESS
+    return ok
+
+
+def measure(pipelined):
+    channel = f"bench_session_{int(pipelined)}"
+    hands = [SimulatedHand(channel, node_id=node_id, delay_s=NODE_DELAY_S).start() for node_id in NODE_IDS]
+    session = CanBusSession(can.Bus(interface="virtual", channel=channel))
+    try:
+        start = time.perf_counter()
+        if pipelined:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=len(NODE_IDS)) as executor:
+                ok = sum(executor.map(lambda node_id: get_pos_all(session.open_node(node_id), node_id), NODE_IDS))
+        else:
+            ok = sum(get_pos_all(session.open_node(node_id), node_id) for node_id in NODE_IDS)
+        elapsed = time.perf_counter() - start
+    finally:
+        session.shutdown()
+        for hand in hands:
+            hand.stop()
+    return ok, ok / elapsed
+
+
+def main():
+    print(f"{'mode':>10} {'ok':>5} {'req/s':>8}")
+    for name, pipelined in (("serial", False), ("pipelined", True)):
+        ok, rate = measure(pipelined)
+        print(f"{name:>10} {ok:>5} {rate:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
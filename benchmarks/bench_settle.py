@@ -0,0 +1,106 @@
+"""
+动作到位等待基准测试：模拟手的各手指以不同速度匀速运动到目标位置，比较执行一组手势时
+- fixed：原脚本的方式，每个手势发送后固定等待最慢情况的时间
+- settle：HAND_WaitUntilSettled，轮询全部手指位置，全部到位且停止运动后立即返回
+每个手势的平均耗时，并检查两种方式结束时的位置是否都已到位。
+
+运行方式（在仓库根目录下）：
+    python benchmarks/bench_settle.py
+"""
+import os
+import random
+import struct
+import sys
+import time
+
+import can
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from OHandSerialAPI import (
+    HAND_CMD_GET_FINGER_POS_ALL,
+    HAND_CMD_SET_FINGER_POS,
+    HAND_RESP_SUCCESS,
+    MAX_MOTOR_CNT,
+)
+from can_interface import delay_milli_seconds_impl
+from can_session import CanBusSession
+from sim_hand import SimulatedHand
+
+HAND_ID = 2
+FIXED_WAIT_MS = 1200  # 原脚本判断前的固定等待
+POS_MAX_LOSS = 200
+GESTURES = [
+    [26069, 31499, 36569, 32949, 28966, 62258],
+    [0, 0, 0, 0, 0, 62258],
+    [65535, 65535, 65535, 65535, 65535, 0],
+    [0, 31499, 36569, 32949, 28966, 62258],
+]
+
+
+class MovingHand(SimulatedHand):
+    """手指按各自速度（位置/秒）从当前位置匀速运动到HAND_SetFingerPos设置的目标"""
+
+    def __init__(self, channel, node_id=2, speeds=None):
+        super().__init__(channel, node_id)
+        self.speeds = speeds or [random.uniform(80000, 300000) for _ in range(MAX_MOTOR_CNT)]
+        self.start_pos = [0] * MAX_MOTOR_CNT
+        self.target = [0] * MAX_MOTOR_CNT
+        self.start_time = [0.0] * MAX_MOTOR_CNT
+
+    def position(self, finger_id):
+        travel = self.speeds[finger_id] * (time.perf_counter() - self.start_time[finger_id])
+        start, target = self.start_pos[finger_id], self.target[finger_id]
+        if abs(target - start) <= travel:
+            return target
+        return int(start + travel if target > start else start - travel)
+
+    def response(self, cmd):
+        if cmd == HAND_CMD_SET_FINGER_POS:
+            finger_id, pos, _ = struct.unpack_from("<BHB", self.decoder.packet_data, 4)
+            self.start_pos[finger_id] = self.position(finger_id)
+            self.target[finger_id] = pos
+            self.start_time[finger_id] = time.perf_counter()
+            return b""
+        if cmd == HAND_CMD_GET_FINGER_POS_ALL:
+            current = [self.position(finger_id) for finger_id in range(MAX_MOTOR_CNT)]
+            return struct.pack(f"<{2 * MAX_MOTOR_CNT}H", *self.target, *current)
+        return super().response(cmd)
+
+
+def run(api, settle):
+    reached = 0
+    start = time.perf_counter()
+    for gesture in GESTURES:
+        for finger_id in range(MAX_MOTOR_CNT):
+            api.HAND_SetFingerPos(HAND_ID, finger_id, gesture[finger_id], 100, [])
+        if settle:
+            api.HAND_WaitUntilSettled(HAND_ID, gesture, POS_MAX_LOSS, FIXED_WAIT_MS)
+        else:
+            delay_milli_seconds_impl(FIXED_WAIT_MS)
+        result = api.HAND_ReadFingerPosAll(HAND_ID)
+        reached += result.err == HAND_RESP_SUCCESS and all(
+            abs(current - target) < POS_MAX_LOSS for current, target in zip(result.current, gesture)
+        )
+    return (time.perf_counter() - start) / len(GESTURES), reached
+
+
+def main():
+    random.seed(1)
+    channel = "bench_settle"
+    hand = MovingHand(channel, node_id=HAND_ID).start()
+    session = CanBusSession(can.Bus(interface="virtual", channel=channel))
+    api = session.open_node(HAND_ID)
+    try:
+        print(f"slowest motion: {max(65535 / speed for speed in hand.speeds) * 1e3:.0f} ms")
+        print(f"{'mode':>8} {'ms/gesture':>11} {'reached':>8}")
+        for name, settle in (("fixed", False), ("settle", True)):
+            per_gesture, reached = run(api, settle)
+            print(f"{name:>8} {per_gesture * 1e3:>11.1f} {reached:>5}/{len(GESTURES)}")
+    finally:
+        session.shutdown()
+        hand.stop()
+
+
+if __name__ == "__main__":
+    main()
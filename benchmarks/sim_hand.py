@@ -0,0 +1,112 @@
+"""
+基于python-can虚拟总线(interface='virtual')的OHand模拟节点，供基准测试使用。
+
+模拟节点接收主机命令，按固定长度返回全零数据（部分命令带有意义的数据），用于测量协议栈本身的开销。
+"""
+import os
+import struct
+import sys
+import threading
+
+import can
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from OHandSerialAPI import (
+    COMMAND_CODECS,
+    HAND_CMD_GET_FINGER_POS_ALL,
+    HAND_CMD_GET_FW_VERSION,
+    HAND_CMD_GET_PROTOCOL_VERSION,
+    HAND_CMD_SET_CUSTOM,
+    HAND_PROTOCOL_UART,
+    MAX_MOTOR_CNT,
+    OHandSerialAPI,
+    custom_response_layout,
+)
+
+ADDRESS_MASTER = 0x01
+CAN_FRAME_SIZE = 8
+
+# 各命令应答数据，未列出的定长GET命令按COMMAND_CODECS返回全零数据，其余返回空数据（SET类命令）
+RESPONSE_DATA = {
+    HAND_CMD_GET_PROTOCOL_VERSION: bytes([0, 1]),
+    HAND_CMD_GET_FW_VERSION: bytes([1, 0, 0, 3]),
+    HAND_CMD_GET_FINGER_POS_ALL: bytes(2 * MAX_MOTOR_CNT * 2),
+}
+
+
+class SimulatedHand:
+    """
+    在独立线程中运行的模拟手，node_id为其节点地址，delay_s为应答前的模拟处理时间
+    """
+
+    # 同一通道上的多个模拟手共享，保证每个应答的多帧连续发送（与真实节点从发送邮箱连续发出一致）
+    reply_lock = threading.Lock()
+
+    def __init__(self, channel, node_id=2, delay_s=0.0):
+        self.node_id = node_id
+        self.delay_s = delay_s
+        self.bus = can.Bus(interface="virtual", channel=channel)
+        # 复用OHandSerialAPI的解码器：以本节点地址作为"主机地址"即可只接收发给本节点的命令
+        self.decoder = OHandSerialAPI(None, HAND_PROTOCOL_UART, node_id, None)
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join()
+        self.bus.shutdown()
+
+    def _run(self):
+        while self.running:
+            msg = self.bus.recv(timeout=0.05)
+            if msg is None or msg.arbitration_id != self.node_id:
+                continue
+            self.decoder.HAND_OnBytes(msg.data)
+            if self.decoder.is_whole_packet:
+                cmd = self.decoder.packet_data[2]
+                self.decoder.is_whole_packet = False
+                if self.delay_s:
+                    threading.Event().wait(self.delay_s)
+                data = self.response(cmd)
+                if data is not None:
+                    self._reply(cmd, data)
+
+    def response(self, cmd):
+        """
+        返回cmd的应答数据，请求数据在self.decoder.packet_data[4:]，子类可覆盖以模拟有意义的应答，
+        返回None表示不应答（可自行调用self._reply发送错误应答）
+        """
+        if cmd == HAND_CMD_SET_CUSTOM:
+            # 按子命令返回全部电机的零值数据
+            return bytes(custom_response_layout(self.decoder.packet_data[4], MAX_MOTOR_CNT)[0].size)
+        if cmd in RESPONSE_DATA:
+            return RESPONSE_DATA[cmd]
+        return self._zero_response(cmd)
+
+    def _zero_response(self, cmd):
+        codec = COMMAND_CODECS.get(cmd)
+        if codec is None or not isinstance(codec.response, struct.Struct):
+            return b""
+        data = bytearray(codec.response_size)
+        if codec.request is not None and codec.request.size == 1:
+            data[0] = self.decoder.packet_data[4]  # 单指GET命令的应答首字节回显finger_id
+        return data
+
+    def _reply(self, cmd, data):
+        packet = bytearray([0x55, 0xAA, ADDRESS_MASTER, self.node_id, cmd, len(data)])
+        packet += data
+        lrc = 0
+        for byte in packet[2:]:
+            lrc ^= byte
+        packet.append(lrc)
+        with self.reply_lock:
+            for i in range(0, len(packet), CAN_FRAME_SIZE):
+                self.bus.send(can.Message(arbitration_id=ADDRESS_MASTER, data=packet[i : i + CAN_FRAME_SIZE], is_extended_id=False))
@@ -1,5 +1,17 @@
 import time
 import can
+from OHandSerialAPI import (
+    CMD_ERROR_MASK,
+    COMMAND_CODECS,
+    HAND_CMD_GET_FW_VERSION,
+    HAND_PROTOCOL_UART,
+    PROTOCOL_HEADER,
+    RECV_MODE_EVENT,
+    OHandSerialAPI,
+    protocol_lrc,
+)
+
+ADDRESS_MASTER = 0x01
 
 # 发送数据函数（与OHandSerialAPI接口匹配）
 def send_data_impl(addr, data, length, context):
@@ -37,6 +49,38 @@ def send_data_impl(addr, data, length, context):
         return 1
 
 
+# 预编译命令发送函数（与OHandSerialAPI.HAND_SetSendPreparedFunction接口匹配）
+def send_prepared_impl(prepared, context):
+    """
+    发送HAND_PrepareCmd预编译的命令，首次发送时将整帧拆分为can.Message并缓存在命令对象中，
+    之后重复发送不再分帧和创建消息对象
+    """
+    can_interface = context
+
+    if not can_interface or not hasattr(can_interface, "send"):
+        print("错误：CAN总线未正确初始化")
+        return 1
+
+    messages = prepared.transport_data
+    if messages is None:
+        frame = prepared.frame
+        messages = tuple(
+            can.Message(arbitration_id=prepared.addr, data=frame[i : i + 8], is_extended_id=False) for i in range(0, len(frame), 8)
+        )
+        prepared.transport_data = messages
+
+    try:
+        for msg in messages:
+            can_interface.send(msg)
+        return 0
+    except can.CanError as e:
+        print(f"CAN发送失败，错误: {e}")
+        return 1
+    except Exception as e:
+        print(f"发送异常: {e}")
+        return 1
+
+
 # 接收数据函数（与OHandSerialAPI接口匹配）
 def recv_data_impl(context, api_instance=None):
     """
@@ -63,16 +107,151 @@ def recv_data_impl(context, api_instance=None):
             #     print(f"{byte:02X} ", end="")
             # print()
 
-            # 如果是发给主设备的消息，调用HAND_OnData处理
+            # 如果是发给主设备的消息，整帧交给HAND_OnBytes处理
             if msg.arbitration_id == 0x01:  # ADDRESS_MASTER
-                for byte in msg.data:
-                    api_instance.HAND_OnData(byte)
+                api_instance.HAND_OnBytes(msg.data)
     except can.CanError as e:
         print(f"CAN接收错误: {e}")
     except Exception as e:
         print(f"接收异常: {e}")
 
 
+class OHandListener(can.Listener):
+    """
+    后台接收监听器：由can.Notifier的接收线程调用，将发给主设备的整帧数据交给HAND_OnBytes处理，
+    解出完整数据包时HAND_OnBytes会立即唤醒等待中的HAND_GetResponse
+    """
+
+    def __init__(self, api_instance, address_master=ADDRESS_MASTER):
+        self.api_instance = api_instance
+        self.address_master = address_master
+
+    def on_message_received(self, msg):
+        if msg.arbitration_id == self.address_master:
+            self.api_instance.HAND_OnBytes(msg.data)
+
+    def on_error(self, exc):
+        print(f"CAN接收错误: {exc}")
+
+
+def CAN_StartReceiver(bus, api_instance):
+    """
+    为CAN总线启动后台接收线程，并将api_instance切换为事件接收模式
+    返回can.Notifier实例，api_instance.shutdown()时自动停止
+    """
+    notifier = can.Notifier(bus, [OHandListener(api_instance)], timeout=0.1)
+    api_instance.HAND_SetRecvMode(RECV_MODE_EVENT, notifier)
+    return notifier
+
+
+# 节点发现
+DISCOVERY_WINDOW_MS = 50  # 最后一个探测帧发出后，总线静默多久视为应答收集完毕
+DISCOVERY_RETRIES = 2
+DISCOVERY_SEND_BACKOFF_MS = 5  # 发送失败（如PCAN发送队列满）后等待多久再重发该探测帧
+
+
+def CAN_ProbeNodes(bus, node_ids, cmds=(HAND_CMD_GET_FW_VERSION,), window_ms=DISCOVERY_WINDOW_MS, retries=DISCOVERY_RETRIES, address_master=ADDRESS_MASTER):
+    """
+    向node_ids中每个节点连续发出cmds中的无参数GET命令，在同一个收集窗口内按应答的(源节点ID, 命令ID)收集结果，
+    不再逐个节点等待超时。多个节点同时应答时多帧数据可能交错，校验失败或不完整的应答会逐个重新探测，最多retries轮。
+    某一帧发送失败（如发送队列满）时先收集已到达的应答，等待后重发该帧，重发retries次仍失败只跳过该节点。
+    调用期间不能有其他接收者（如CAN_StartReceiver）读取同一总线。
+
+    返回 {节点ID: {命令ID: COMMAND_CODECS解出的应答字段}}，按节点ID排序，只包含有应答的节点；
+    节点返回错误应答时字段为None
+    """
+    prober = OHandSerialAPI(None, HAND_PROTOCOL_UART, address_master, None)
+    probes = {(node_id, cmd): prober.HAND_PrepareCmd(node_id, cmd) for node_id in node_ids for cmd in cmds}
+    found = {}
+    outstanding = set(probes)  # 尚未收到有效应答的(节点ID, 命令ID)，全部应答后不再等待静默窗口
+    incomplete = set()  # 收到了包头但数据交错或校验失败的(节点ID, 命令ID)
+    pending = None  # 正在拼接的应答：[0x55, 0xAA, 主机地址, 源节点ID, 命令ID, 数据长度, 数据..., LRC]
+
+    def on_packet(packet):
+        key = (packet[3], packet[4] & ~CMD_ERROR_MASK)
+        if key not in probes:
+            return
+        if packet[2] != address_master or protocol_lrc(packet[2 : 6 + packet[5]]) != packet[6 + packet[5]]:
+            incomplete.add(key)
+            return
+        response = COMMAND_CODECS[key[1]].response
+        if packet[4] & CMD_ERROR_MASK or packet[5] < response.size:
+            found.setdefault(key[0], {})[key[1]] = None
+        else:
+            found.setdefault(key[0], {})[key[1]] = response.unpack_from(packet, 6)
+        incomplete.discard(key)
+        outstanding.discard(key)
+
+    def listen(deadline_ms, expect=None):
+        # 收集应答直到deadline_ms后总线静默window_ms，expect为单个(节点ID, 命令ID)时收到其应答即返回
+        nonlocal pending
+        quiet_until = deadline_ms
+        while True:
+            remaining = quiet_until - get_milli_seconds_impl()
+            if remaining <= 0:
+                break
+            msg = bus.recv(timeout=remaining / 1000.0)
+            if msg is None:
+                break
+            if msg.arbitration_id != address_master:
+                continue
+            data = msg.data
+            if data[:2] == PROTOCOL_HEADER and len(data) >= 6:
+                if pending is not None:
+                    incomplete.add((pending[3], pending[4] & ~CMD_ERROR_MASK))
+                pending = bytearray(data)
+            elif pending is not None:
+                pending += data
+            else:
+                continue
+            if len(pending) >= 7 + pending[5]:
+                packet, pending = pending, None
+                on_packet(packet)
+                if not outstanding or (expect is not None and expect not in outstanding):
+                    break
+            quiet_until = max(deadline_ms, get_milli_seconds_impl() + window_ms)
+        if pending is not None:
+            incomplete.add((pending[3], pending[4] & ~CMD_ERROR_MASK))
+            pending = None
+
+    def send(key):
+        for _ in range(retries + 1):
+            if send_prepared_impl(probes[key], bus) == 0:
+                return True
+            # 发送队列满时边收集应答边等待队列腾空
+            listen(get_milli_seconds_impl() + DISCOVERY_SEND_BACKOFF_MS)
+        outstanding.discard(key)
+        return False
+
+    for key in probes:
+        send(key)
+    listen(get_milli_seconds_impl() + window_ms)
+
+    # 交错的应答逐个重新探测，此时同一时刻只有一个节点在应答
+    for _ in range(retries):
+        retry = sorted(key for key in incomplete if key in probes and key[1] not in found.get(key[0], ()))
+        incomplete.clear()
+        for key in retry:
+            if send(key):
+                listen(get_milli_seconds_impl() + window_ms, expect=key)
+        if not incomplete:
+            break
+    return dict(sorted(found.items()))
+
+
+def CAN_DiscoverNodes(bus, node_ids=range(2, 248), **kwargs):
+    """
+    扫描总线上的全部节点，参数同CAN_ProbeNodes。
+    返回 {节点ID: (major, minor, revision)}，按节点ID排序；节点返回错误应答时版本为None
+    """
+    nodes = CAN_ProbeNodes(bus, node_ids, (HAND_CMD_GET_FW_VERSION,), **kwargs)
+    found = {}
+    for node_id, responses in nodes.items():
+        fields = responses.get(HAND_CMD_GET_FW_VERSION)
+        found[node_id] = None if fields is None else fields[::-1]  # (revision, minor, major) -> (major, minor, revision)
+    return found
+
+
 # 时间相关函数
 _start_time = None
 
@@ -0,0 +1,207 @@
+import concurrent.futures
+import contextlib
+import queue
+import threading
+import can
+from OHandSerialAPI import CMD_ERROR_MASK, HAND_PROTOCOL_UART, RECV_MODE_EVENT, OHandSerialAPI
+from can_interface import (
+    ADDRESS_MASTER,
+    CAN_Init,
+    delay_milli_seconds_impl,
+    get_milli_seconds_impl,
+    send_data_impl,
+    send_prepared_impl,
+)
+
+
+class CanBusSession(can.Listener):
+    """
+    CAN总线会话：一条总线只有一个后台接收线程(can.Notifier)，解出的数据包按(源节点ID, 命令ID)
+    分发给等待中的请求，因此同一通道上不同节点ID的HAND_*调用可以同时进行。
+
+    用法：
+        session = CanBusSession.open(port_name=1, baudrate=1000000)
+        api = session.open_node(2)   # 每个节点一个OHandSerialAPI实例，可在各自线程中调用
+        ...
+        session.shutdown()
+
+    注意：所有节点的应答都使用主机地址0x01作为CAN ID，同一节点的多帧应答需连续到达总线，
+    被其他节点应答打断的数据包会因为LRC校验失败或超时而报错。
+    """
+
+    def __init__(self, bus, address_master=ADDRESS_MASTER, timeout=255):
+        self.bus = bus
+        self.port_name = None  # 由open()记录，reconnect()按此重新打开通道
+        self.baudrate = None
+        self.address_master = address_master
+        self.timeout = timeout
+        self.nodes = {}  # node_id -> OHandSerialAPI
+        self.waiters = {}  # (node_id, cmd) -> OHandSerialAPI waiting for the response
+        self.lock = threading.Lock()
+        self.send_lock = threading.Lock()
+        # 复用OHandSerialAPI的解码器，连续解码总线上所有发给主机的数据包
+        self.decoder = OHandSerialAPI(None, HAND_PROTOCOL_UART, address_master, None)
+        self.decoder.HAND_SetPacketHandler(self._dispatch)
+        self.notifier = can.Notifier(bus, [self], timeout=0.1)
+
+    @classmethod
+    def open(cls, port_name, baudrate=1000000, **kwargs):
+        """打开PCAN通道并创建会话，失败返回None"""
+        bus = CAN_Init(port_name=port_name, baudrate=baudrate)
+        if bus is None:
+            return None
+        session = cls(bus, **kwargs)
+        session.port_name = port_name
+        session.baudrate = baudrate
+        return session
+
+    def healthy(self):
+        """接收线程仍在运行且总线未处于错误状态"""
+        notifier = self.notifier
+        if notifier is None or notifier.stopped or notifier.exception is not None:
+            return False
+        try:
+            return self.bus.state != can.BusState.ERROR
+        except Exception:
+            return False
+
+    def reconnect(self):
+        """
+        关闭并按open()时的参数重新打开通道，已创建的节点API实例继续有效（其上下文是会话本身）。
+        未完成的请求按超时处理。成功返回True
+        """
+        if self.port_name is None:
+            return False
+        if self.notifier is not None:
+            self.notifier.stop()
+            self.notifier = None
+        with self.lock:
+            self.waiters.clear()
+        try:
+            self.bus.shutdown()
+        except Exception as e:
+            print(f"CAN总线关闭异常: {e}")
+        bus = CAN_Init(port_name=self.port_name, baudrate=self.baudrate)
+        if bus is None:
+            return False
+        self.bus = bus
+        # 丢弃旧总线上拼接到一半的数据包
+        self.decoder = OHandSerialAPI(None, HAND_PROTOCOL_UART, self.address_master, None)
+        self.decoder.HAND_SetPacketHandler(self._dispatch)
+        self.notifier = can.Notifier(bus, [self], timeout=0.1)
+        return True
+
+    @contextlib.contextmanager
+    def tap(self):
+        """
+        临时获取总线上原始CAN帧的收发对象，接口与can.Bus的send/recv相同，
+        供CAN_ProbeNodes等直接读总线的函数在会话运行期间使用：
+
+            with session.tap() as bus:
+                found = CAN_DiscoverNodes(bus, range(2, 10))
+        """
+        tap = BusTap(self)
+        self.notifier.add_listener(tap)
+        try:
+            yield tap
+        finally:
+            self.notifier.remove_listener(tap)
+
+    def open_node(self, node_id):
+        """返回绑定到本会话的节点API实例，同一节点ID复用同一实例"""
+        with self.lock:
+            api = self.nodes.get(node_id)
+            if api is None:
+                api = OHandSerialAPI(self, HAND_PROTOCOL_UART, self.address_master, self._send_request)
+                api.HAND_SetTimerFunction(get_milli_seconds_impl, delay_milli_seconds_impl)
+                api.HAND_SetCommandTimeOut(self.timeout)
+                api.HAND_SetSendPreparedFunction(self._send_prepared)
+                api.HAND_SetCancelFunction(self._cancel)
+                # 接收线程由会话持有，api.shutdown()不会停止它
+                api.HAND_SetRecvMode(RECV_MODE_EVENT)
+                self.nodes[node_id] = api
+            return api
+
+    def wait_until_ready(self, node_ids, timeout, **kwargs):
+        """
+        整机架复位、初始化或校正后等待多个节点就绪：各节点的HAND_WaitUntilReady在各自线程中同时轮询，
+        总耗时取决于最慢的节点而不是节点数量。返回{node_id: err}，HAND_RESP_SUCCESS表示已就绪
+        """
+        apis = {node_id: self.open_node(node_id) for node_id in node_ids}
+        if not apis:
+            return {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(apis)) as executor:
+            futures = {
+                node_id: executor.submit(api.HAND_WaitUntilReady, node_id, timeout, **kwargs)
+                for node_id, api in apis.items()
+            }
+        return {node_id: future.result() for node_id, future in futures.items()}
+
+    def _send_request(self, addr, data, length, context):
+        # 发送前按(节点ID, 命令ID)登记等待者，避免应答先于登记到达
+        with self.lock:
+            api = self.nodes.get(addr)
+            if api is not None:
+                self.waiters[(addr, data[4])] = api
+        with self.send_lock:
+            return send_data_impl(addr, data, length, self.bus)
+
+    def _send_prepared(self, prepared, context):
+        with self.lock:
+            api = self.nodes.get(prepared.addr)
+            if api is not None:
+                self.waiters[(prepared.addr, prepared.cmd)] = api
+        with self.send_lock:
+            return send_prepared_impl(prepared, self.bus)
+
+    def _cancel(self, addr, cmd, api):
+        # 超时后注销等待者，迟到的应答直接丢弃，不会被下一次请求当作自己的应答
+        with self.lock:
+            if self.waiters.get((addr, cmd)) is api:
+                del self.waiters[(addr, cmd)]
+
+    def _dispatch(self, packet):
+        # packet: [addressed node id, own node id, command id, byte count, data..., lrc]
+        key = (packet[1], packet[2] & ~CMD_ERROR_MASK)
+        with self.lock:
+            api = self.waiters.pop(key, None)
+        if api is not None:
+            api.HAND_OnPacket(packet)
+
+    def on_message_received(self, msg):
+        if msg.arbitration_id == self.address_master:
+            self.decoder.HAND_OnBytes(msg.data)
+
+    def on_error(self, exc):
+        print(f"CAN接收错误: {exc}")
+
+    def shutdown(self):
+        """停止接收线程并关闭总线"""
+        if self.notifier is not None:
+            self.notifier.stop()
+            self.notifier = None
+        with self.lock:
+            self.nodes.clear()
+            self.waiters.clear()
+        self.bus.shutdown()
+
+
+class BusTap(can.Listener):
+    """CanBusSession.tap()返回的收发对象：接收线程收到的每一帧都放入队列，发送与会话共用发送锁"""
+
+    def __init__(self, session):
+        self.session = session
+        self.frames = queue.SimpleQueue()
+
+    def on_message_received(self, msg):
+        self.frames.put(msg)
+
+    def send(self, msg, timeout=None):
+        with self.session.send_lock:
+            self.session.bus.send(msg, timeout)
+
+    def recv(self, timeout=None):
+        try:
+            return self.frames.get(timeout=timeout)
+        except queue.Empty:
+            return None
@@ -0,0 +1,64 @@
+import json
+import os
+import time
+
+CHECKPOINT_INTERVAL = 30  # 秒，两次检查点之间的最短间隔
+
+
+class RunCheckpoint:
+    """
+    长时间测试的检查点文件：保存测试状态（端口、时长、已运行时间、各端口汇总、退出测试的端口等，
+    内容由测试脚本决定），崩溃、断电或关闭界面后可从最近的检查点继续测试。
+    每次保存先写临时文件并同步到磁盘，再替换原文件，任何时刻中断都不会留下不完整的检查点。
+    正常结束或放弃继续时调用finish()，load()不再返回该检查点。
+
+        checkpoint = RunCheckpoint('./log/AgingTest_checkpoint.json')
+        state = checkpoint.load()           # 未完成的检查点或None
+        if checkpoint.due():
+            checkpoint.save(run_state())    # 每轮结束后调用，按interval限制频率
+        checkpoint.finish()
+    """
+
+    def __init__(self, path, interval=CHECKPOINT_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.last_save = time.monotonic()
+
+    def due(self):
+        return time.monotonic() - self.last_save >= self.interval
+
+    def save(self, state):
+        state = dict(state, saved_at=time.time(), finished=False)
+        self._write(state)
+        self.last_save = time.monotonic()
+
+    def load(self):
+        """返回未完成的检查点状态，无检查点、已完成或文件损坏时返回None"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"检查点文件读取失败，忽略: {e}")
+            return None
+        if not isinstance(state, dict) or state.get('finished', True):
+            return None
+        return state
+
+    def finish(self):
+        """标记测试已结束，保留文件供查看"""
+        state = self.load()
+        if state is not None:
+            self._write(dict(state, finished=True, finished_at=time.time()))
+
+    def _write(self, state):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
@@ -1,9 +1,9 @@
-import concurrent
+import concurrent.futures
 import configparser
 import datetime
 from functools import partial
 import importlib
-import json
+import inspect
 import logging
 import os
 import re
@@ -26,9 +26,13 @@ from PyQt5.QtGui import QColor, QTextCharFormat, QTextCursor  # 正确导入QTex
 from pymodbus import FramerType
 from pymodbus.client import ModbusSerialClient
 from pymodbus.exceptions import ConnectionException, ModbusIOException
-from OHandSerialAPI import HAND_RESP_SUCCESS, HAND_PROTOCOL_UART, MAX_MOTOR_CNT, MAX_THUMB_ROOT_POS, MAX_FORCE_ENTRIES, OHandSerialAPI
+from OHandSerialAPI import HAND_CMD_GET_FW_VERSION, HAND_CMD_GET_UID, HAND_RESP_SUCCESS, HAND_PROTOCOL_UART, MAX_MOTOR_CNT, MAX_THUMB_ROOT_POS, MAX_FORCE_ENTRIES, OHandSerialAPI
 from can_interface import *
 import can
+from device_inventory import DEFAULT_TTL, DeviceInventory
+from farm import FARM
+from run_control import CONTROL
+from transport_pool import TRANSPORTS
 
 # 设置日志级别为INFO，获取日志记录器实例
 logger = logging.getLogger(__name__)
@@ -121,6 +125,9 @@ class ClientTest(QtCore.QObject):
     max_port_num = 32
     timeout = 30
     max_node_id = 10
+    inventory_file = 'config/device_inventory.json'
+    inventory_ttl = DEFAULT_TTL
+    inventory = None
     no_used_port = '无可用端口'
     port_names = [no_used_port]
     node_ids = [2]
@@ -129,6 +136,15 @@ class ClientTest(QtCore.QObject):
     # 假设这是全局的设备信息列表
     devices_info_list = []
     last_refresh_time = 0
+    port_scan_worker = None
+    port_vertical_layouts = []
+    hotplug_enable = 'y'
+    hotplug_interval = 2.0
+    worker_processes = 0  # >0时支持多进程模式的脚本把端口分给该数目的子进程运行
+    port_watcher = None
+    hotplug_scan_workers = []
+    script_thread = None  # 运行测试脚本main()的线程
+    SCRIPT_STOP_TIMEOUT = 10  # 秒，关闭窗口时等待测试脚本保存检查点并退出的最长时间
     
     # 定义电流界面组件list
     label_com_list = []
@@ -280,6 +296,7 @@ class ClientTest(QtCore.QObject):
         self.app = QApplication([])
         self.window = uic.loadUi(uifile="ui/client.ui")
         self.read_configfile()
+        self.inventory = DeviceInventory(os.path.join(os.getcwd(), self.inventory_file), self.inventory_ttl)
         self.set_window_style()
         self.create_style()
         self.init_widgets()
@@ -290,37 +307,13 @@ class ClientTest(QtCore.QObject):
         
     def close_event_handler(self, event):
         self.running = False
-        self.write_to_json_file(stop_test=True,pause_test=True)
-
-    def write_to_json_file(self, stop_test, pause_test):
-        data_to_write = {
-            "stop_test": stop_test,
-            "pause_test": pause_test
-        }
-        with open('shared_data.json', 'w') as f:
-            json.dump(data_to_write, f)
-            
-    def read_from_json_file(self):
-        """
-        从json文件读取标志位，判断是否继续执行测试
-        Returns:
-            返回fasle则终止测试，true继续测试
-        """
-        try:
-            with open('shared_data.json', 'r') as f:
-                data = json.load(f)
-                stop_test = data['stop_test']
-                pause_test = data['pause_test']
-                return stop_test,pause_test
-        except FileNotFoundError:
-            logger.error("共享的json文件不存在")
-            return False,False
-        except json.JSONDecodeError:
-            logger.error("json文件数据格式错误")
-            return False,False
-        except Exception as e:
-            logger.error(f"读取JSON文件时出现其他未知错误: {e}")
-            return False, False
+        if self.port_watcher is not None:
+            self.port_watcher.stop()
+        # 关闭窗口视为中断，测试脚本保存检查点，下次启动时可继续测试
+        CONTROL.stop(resumable=True)
+        if self.script_thread is not None:
+            self.script_thread.join(timeout=self.SCRIPT_STOP_TIMEOUT)
+        TRANSPORTS.close_all()
 
     def set_window_style(self):
         self.window.setFixedSize(1369, 827)
@@ -373,6 +366,17 @@ class ClientTest(QtCore.QObject):
             
             self.time_out = int(config.get_value('aging_parameter', 'time_out'))
             self.max_node_id = int(config.get_value('aging_parameter', 'max_node_id'))
+            self.worker_processes = int(config.get_value('aging_parameter', 'worker_processes') or self.worker_processes)
+
+            self.inventory_file = config.get_value('inventory', 'inventory_file') or self.inventory_file
+            self.inventory_ttl = int(config.get_value('inventory', 'inventory_ttl') or self.inventory_ttl)
+
+            self.hotplug_enable = config.get_value('hotplug', 'hotplug_enable') or self.hotplug_enable
+            self.hotplug_interval = float(config.get_value('hotplug', 'poll_interval') or self.hotplug_interval)
+
+            FARM.configure(config.get_value('farm', 'agents'), config.get_value('farm', 'token'))
+            if FARM.enabled:
+                logger.info(f'测试代理：{FARM.agents}')
             
         except Exception as e:
             logger.error(e)
@@ -607,9 +611,11 @@ class ClientTest(QtCore.QObject):
                 label_text = f"{ports[i]}"
                 self.label_com_list[i].setText(label_text)
                 self.label_com_list[i].setEnabled(True)
+                self.label_com_list[i].setVisible(True)
                 
             for i in range(num_edit_texts_to_show):
                 self.editText_current_list[i].setEnabled(True)
+                self.editText_current_list[i].setVisible(True)
 
             for i in range(num_labels_to_show, len(self.label_com_list)):
                 self.label_com_list[i].setVisible(False)
@@ -706,7 +712,8 @@ class ClientTest(QtCore.QObject):
         """
         port = checkbox.text()
         if port == '全选':
-            self.select_port_names = self.port_names
+            # 复制一份，热插拔增删端口时不影响正在运行的测试
+            self.select_port_names = list(self.port_names)
             for cbx in self.check_box_list:
                 cbx.setChecked(checked)
                 port2 = cbx.text()
@@ -725,17 +732,16 @@ class ClientTest(QtCore.QObject):
 
     def update_port_options(self, startup=False):
         """
-        在给定的水平布局中根据QCheckBox的数量动态添加垂直布局，并将QCheckBox合理分配到各个垂直布局中，
-        确保生成的QCheckBox行和列分别对齐且每一列都是8个，同时设置列间距为3像素，行间距为8像素。
-        :param layout: 传入的水平布局对象
+        刷新端口：清空端口复选框和设备列表后在后台线程中探测各端口，不阻塞界面。
+        每探测到一个设备立即添加对应端口的复选框（“全选”勾选时同时加入设备列表），
+        全部端口完成或超过time_out秒后结束刷新。
         """
-        vertical_layouts = []  # 用于存储创建的垂直布局对象
-        q_check_box_count = 0  # 用于计数已添加的QCheckBox数量
+        self.remove_all_widgets_from_layout(self.port_Layout)
+        self.port_vertical_layouts = []
+        self.check_box_list.clear()
 
         if startup:
             # 启动时清理布局及相关列表，添加提示标签
-            self.remove_all_widgets_from_layout(self.port_Layout)
-            self.check_box_list.clear()
             self.set_checked_box_status(False)
             startup_label = QLabel('请先刷新端口，获取设备信息')
             self.port_Layout.addWidget(startup_label)
@@ -744,76 +750,155 @@ class ClientTest(QtCore.QObject):
 
         logger.info('update_port_options,start collect port infos')
         # 显示提示信息，清理布局及相关数据结构
+        self.lbl_promt.setText('设备信息读取中......')
         self.lbl_promt.setVisible(True)
-        self.remove_all_widgets_from_layout(self.port_Layout)
-        self.devices_info_list.clear()
+        self.devices_info_list = []
+        self.port_names = []
+        self.node_ids = []
         self.model.clear()
         self.model.setHorizontalHeaderLabels(self.HEADS)
 
-        # 启动线程获取端口信息，添加异常处理
-        try:
-            threading.Thread(target=self.get_port_infos).start()
-        except Exception as e:
-            logger.error(f"Failed to start the thread for getting port infos: {e}")
-
-        # 等待端口信息收集完成，期间适时处理事件以保持界面响应，优化等待机制（这里只是示例思路，可根据实际情况细化）
-        wait_start_time = time.time()
-        while True:
-            if not self.update_port_enable:
-                elapsed_time = time.time() - wait_start_time
-                if elapsed_time > self.time_out:  # 设置一个超时时间
-                    logger.error("Timeout while waiting for port infos collection.")
-                    self.update_port_enable = True
-                    break
-                time.sleep(1)  # 缩短等待时间，动态调整可根据实际情况
-                wait_str = f'设备信息读取中，请耐心等待......{self.time_out-int(elapsed_time)}秒'
-                self.lbl_promt.setText(wait_str)
-                self.app.processEvents()
-            else:
-                logger.info(f'update_port_options:collect port infos completely')
-                self.remove_all_widgets_from_layout(self.port_Layout)
-                break
+        # 设置列间距为18像素
+        self.port_Layout.setContentsMargins(0, 0, 18, 0)
+        self.port_Layout.setSpacing(10)
 
-        self.lbl_promt.setVisible(False)
+        self.port_scan_worker = self.PortScanWorker(self.list_ports, self.probe_port, self.time_out)
+        self.port_scan_worker.device_found_signal.connect(self.on_device_found)
+        self.port_scan_worker.progress_signal.connect(self.on_port_scan_progress)
+        self.port_scan_worker.scan_finished_signal.connect(self.on_port_scan_finished)
+        self.port_scan_worker.start()
 
-        # 根据是否有可用端口进行不同处理
-        if self.port_names[0] == self.no_used_port:
-            no_port_label = QLabel(self.port_names[0])
-            self.port_Layout.addWidget(no_port_label)
+    def add_port_checkbox(self, port):
+        """
+        添加一个端口复选框：每列8个，最多4列（max_port_num更大时按其增加列数），列内顶部对齐、行间距25像素；
+        热插拔拔出的端口留下的空位优先填充
+        """
+        check_box = QCheckBox(port)
+        self.check_box_list.append(check_box)
+        column = next((layout for layout in self.port_vertical_layouts if layout.count() < 8), None)
+        if column is None:
+            if len(self.port_vertical_layouts) >= max(4, -(-self.max_port_num // 8)):
+                return check_box
+            column = QVBoxLayout()
+            column.setSpacing(25)
+            self.port_Layout.addLayout(column)
+            self.port_vertical_layouts.append(column)
+        column.addWidget(check_box)
+        column.setAlignment(Qt.AlignTop)
+        check_box.clicked.connect(lambda checked, cb=check_box: self.on_port_cbx_clicked(checked, cb))
+        return check_box
+
+    def on_device_found(self, device_info):
+        """后台扫描或热插拔探测每找到一个设备调用一次（界面线程）"""
+        port = device_info[self.STR_PORT]
+        node_id = device_info[self.STR_DEVICE_ID]
+        if any(d[self.STR_PORT] == port and d[self.STR_DEVICE_ID] == node_id for d in self.devices_info_list):
+            # 已记录的设备，例如测试中拔出后又插回
+            self.update_device_info(port=port, key=self.STR_CONNECT_STATUS, new_value='已连接')
             return
-        self.set_checked_box_status(True)
-        # 遍历端口名称，创建并添加QCheckBox到合适的垂直布局
-        for port in self.port_names:
-            check_box = QCheckBox(port)
-            self.check_box_list.append(check_box)
-
-            q_check_box_count += 1
-
-            column_index = (q_check_box_count - 1) // 8
-            if column_index < 4:
-                if len(vertical_layouts) <= column_index:
-                    vertical_layout = QVBoxLayout()
-                    self.port_Layout.addLayout(vertical_layout)
-                    vertical_layouts.append(vertical_layout)
-
-                vertical_layouts[column_index].addWidget(check_box)
-                vertical_layouts[column_index].setAlignment(Qt.AlignTop)
-                # 为每个QCheckBox添加响应函数，优化为使用命名函数包裹
-                def on_port_cbx_clicked_wrapper(checked, cb):
-                    return self.on_port_cbx_clicked(checked, cb)
-                check_box.clicked.connect(lambda checked, cb=check_box: on_port_cbx_clicked_wrapper(checked, cb))
-
-        # 设置列间距为18像素
-        self.port_Layout.setContentsMargins(0, 0, 18, 0)
+        self.devices_info_list.append(device_info)
+        if port in self.port_names:
+            # 测试脚本每个端口测试一只手：同一端口上的其余节点只记录在设备信息中
+            return
+        if self.port_names == [self.no_used_port]:
+            self.remove_all_widgets_from_layout(self.port_Layout)
+            self.port_vertical_layouts = []
+            self.port_names = []
+            self.node_ids = []
+        self.port_names.append(port)
+        self.node_ids.append(node_id)
+        check_box = self.add_port_checkbox(port)
+        # 测试进行中插入的设备只显示，不加入本次测试
+        check_box.setEnabled(not self.running)
+        if self.running:
+            return
+        self.chb_com_all.setEnabled(True)
+        self.cbx_aging_time.setEnabled(True)
+        if self.chb_com_all.isChecked():
+            check_box.setChecked(True)
+            self.update_device_list(port=port, isChecked=True)
 
-        # 设置行间距为25像素
-        for vertical_layout in vertical_layouts:
-            vertical_layout.setSpacing(25)
+    def on_port_scan_progress(self, done, total):
+        self.lbl_promt.setText(f'设备信息读取中......已完成{done}/{total}个端口')
 
-        self.port_Layout.setSpacing(10)
+    def on_port_scan_finished(self):
+        logger.info(f'update_port_options:collect port infos completely')
+        self.lbl_promt.setVisible(False)
+        if not self.port_names:
+            self.port_names = [self.no_used_port]
+            self.node_ids = [2]
+            self.port_Layout.addWidget(QLabel(self.no_used_port))
+        else:
+            self.set_checked_box_status(True)
         self.update_port_enable = True
         self.last_refresh_time = self.current_time
-        
+        self.update_current_ui_portnames(ports=self.port_names)
+        self.start_port_watcher(self.port_scan_worker.ports)
+
+    def start_port_watcher(self, ports):
+        """
+        全量扫描结束后以扫描时的本机端口为基准启动（或重置）热插拔监视。
+        远程端口不参与热插拔，避免每次轮询都查询各代理，其变化在手动刷新时更新
+        """
+        if self.hotplug_enable.lower() != 'y':
+            return
+        ports = [port for port in ports if not FARM.owns(port)]
+        if self.port_watcher is None:
+            self.port_watcher = self.PortWatcher(self.list_local_ports, self.hotplug_interval)
+            self.port_watcher.ports_added_signal.connect(self.on_ports_added)
+            self.port_watcher.ports_removed_signal.connect(self.on_ports_removed)
+            self.port_watcher.start(ports)
+        else:
+            self.port_watcher.set_known(ports)
+
+    def on_ports_added(self, ports):
+        """热插拔：只探测新出现的端口，其余端口及正在运行的测试不受影响"""
+        if not self.update_port_enable:
+            return  # 全量刷新中，结束后会重置监视基准
+        logger.info(f'hotplug: ports added {ports}')
+        worker = self.PortScanWorker(lambda: ports, self.probe_port, self.time_out)
+        worker.device_found_signal.connect(self.on_device_found)
+        worker.scan_finished_signal.connect(lambda w=worker: self.on_hotplug_scan_finished(w))
+        self.hotplug_scan_workers.append(worker)
+        worker.start()
+
+    def on_hotplug_scan_finished(self, worker):
+        if worker in self.hotplug_scan_workers:
+            self.hotplug_scan_workers.remove(worker)
+        self.update_current_ui_portnames(ports=self.port_names)
+
+    def on_ports_removed(self, ports):
+        """热插拔：从端口列表和设备列表中移除拔出的端口，正在测试的端口只标记为已断开"""
+        if not self.update_port_enable:
+            return
+        logger.info(f'hotplug: ports removed {ports}')
+        for port in ports:
+            if port not in self.port_names:
+                continue
+            if self.running and port in self.select_port_names:
+                self.update_device_info(port=port, key=self.STR_CONNECT_STATUS, new_value='已断开')
+                continue
+            TRANSPORTS.discard(port)
+            index = self.port_names.index(port)
+            del self.port_names[index]
+            del self.node_ids[index]
+            if port in self.select_port_names:
+                self.select_port_names.remove(port)
+            self.update_device_list(port=port, isChecked=False)
+            self.devices_info_list = [d for d in self.devices_info_list if d[self.STR_PORT] != port]
+            for check_box in self.check_box_list:
+                if check_box.text() == port:
+                    self.check_box_list.remove(check_box)
+                    check_box.setParent(None)
+                    break
+        if not self.port_names:
+            self.remove_all_widgets_from_layout(self.port_Layout)
+            self.port_vertical_layouts = []
+            self.port_names = [self.no_used_port]
+            self.node_ids = [2]
+            self.port_Layout.addWidget(QLabel(self.no_used_port))
+        self.update_current_ui_portnames(ports=self.port_names)
+
     def set_checked_box_status(self,enable=False):
         for checkbox in self.check_box_list:
             checkbox.setEnabled(enable)
@@ -823,6 +908,10 @@ class ClientTest(QtCore.QObject):
 
     def start_test(self):
         logger.info('start_test')
+        if not self.update_port_enable:
+            QMessageBox.information(self.window, '提示', f"端口刷新中，请等待刷新完成")
+            return
+
         if self.port_names[0] == self.no_used_port:
             logger.error(self.no_used_port)
             QMessageBox.information(self.window, '提示', f"无可用端口,请先刷新端口后再做尝试")
@@ -834,7 +923,6 @@ class ClientTest(QtCore.QObject):
             return
         
         self.execute_script ()
-        self.write_to_json_file(stop_test=False,pause_test=False)
 
     def execute_script (self):
         if self.script_name is not None:
@@ -850,19 +938,27 @@ class ClientTest(QtCore.QObject):
                         # 尝试导入脚本模块，先获取去掉扩展名后的模块名部分
                         module_name = os.path.splitext(os.path.basename(self.script_name))[0]
                         module = importlib.import_module(module_name)
-                        self.run_script_thread = threading.Thread(target=self.update_test_result, args=(module,))
+                        resume_state = self.ask_resume(module)
+                        aging_duration = self.selected_aging_duration
+                        resumed_hours = 0
+                        if resume_state is not None:
+                            aging_duration = resume_state['aging_duration']
+                            resumed_hours = resume_state['elapsed_s'] / 3600
+                        CONTROL.start()
+                        self.run_script_thread = threading.Thread(target=self.update_test_result, args=(module, resume_state))
                         self.run_script_thread.start()
                         self.running = True
                         self.set_checked_box_status(False)
                         self.update_device_Info_worker = self.UpdateDeviceInfoWorker()
-                        self.update_device_Info_worker.selected_aging_duration = self.selected_aging_duration
+                        self.update_device_Info_worker.selected_aging_duration = aging_duration
+                        self.update_device_Info_worker.resumed_hours = resumed_hours
                         self.update_device_Info_worker.off_duration = self.offset_duration
                         self.update_device_Info_worker.test_result = self.get_test_result()
                         self.update_device_Info_worker.update_progress_signal.connect(self.update_device_info_progress)
                         self.update_device_Info_worker.update_result_signal.connect(self.update_device_info_result)
                         self.update_device_Info_thread = threading.Thread(target=self.update_device_Info_worker.run_test)
                         self.update_device_Info_thread.start()
-                        self.count_down(hour=self.selected_aging_duration)
+                        self.count_down(hour=float(aging_duration) - resumed_hours)
                     except ImportError as e:
                         result = QMessageBox.critical(self.window, '错误',
                                                       f"导入模块失败：{self.script_name}，错误信息：{e}")
@@ -877,11 +973,32 @@ class ClientTest(QtCore.QObject):
             result = QMessageBox.information(self.window, '提示', f"请先加载脚本")
             self.running = False
 
-    def update_test_result(self, module):
+    def ask_resume(self, module):
+        """脚本有未完成测试的检查点时询问是否继续，返回检查点状态；没有检查点或选择不继续时返回None"""
+        if not hasattr(module, 'load_checkpoint') or 'resume' not in inspect.signature(module.main).parameters:
+            return None
+        state = module.load_checkpoint()
+        if state is None:
+            return None
+        result = QMessageBox.question(self.window, '继续测试',
+                                      f"上次测试未完成（已运行 {state['elapsed_s'] / 3600:.2f} 小时，"
+                                      f"端口：{', '.join(state['ports'])}），是否从中断处继续？",
+                                      QMessageBox.Yes | QMessageBox.No)
+        if result == QMessageBox.Yes:
+            return state
+        module.discard_checkpoint()
+        return None
+
+    def update_test_result(self, module, resume_state=None):
         def run_script():
             try:
+                kwargs = {}
+                if self.worker_processes > 0 and 'worker_processes' in inspect.signature(module.main).parameters:
+                    kwargs['worker_processes'] = self.worker_processes
+                if resume_state is not None:
+                    kwargs['resume'] = resume_state
                 self.report_title,self.overall_result,self.need_show_current = module.main(ports=self.select_port_names,node_ids=self.node_ids,
-                                                     aging_duration=float(self.selected_aging_duration))
+                                                     aging_duration=float(self.selected_aging_duration), **kwargs)
                 logger.info(f'本次测试已结束，详细测试数据为：\n')
                 
                 self.update_device_Info_worker.update_test_result()
@@ -903,6 +1020,7 @@ class ClientTest(QtCore.QObject):
         thread = threading.Thread(target=run_script)
         thread.daemon = True  # 主界面退出，子任务也能退出
         thread.start()
+        self.script_thread = thread
         
     def get_currents_from_test_result(self, overall_result):
         port_data_dict = {}
@@ -955,6 +1073,8 @@ class ClientTest(QtCore.QObject):
     def stop_test(self):
         logger.info('stop_test')
         if self.running:
+            # 先发出停止：脚本在当前命令返回后立即停止，不再等待本轮结束
+            CONTROL.stop()
             if self.timer_running:
                 self.timer.stop()
                 self.timer_running = False
@@ -968,26 +1088,21 @@ class ClientTest(QtCore.QObject):
                 self.on_test_finished()
             
             self.running = False
-            self.write_to_json_file(stop_test=True, pause_test=True)
         
     def pause_test(self):
-        pause = False
         if self.running:
-            _,pause = self.read_from_json_file()
-            if not pause:
-                pause = True
+            if not CONTROL.paused:
+                CONTROL.pause()
                 self.btn_pause_test.setText('恢复测试')
                 self.update_device_Info_worker.pause_flag = True
                 # self.update_device_Info_worker.test_result = '暂停测试'
                 logger.info('pause test')
             else:
-                pause = False
+                CONTROL.resume()
                 self.btn_pause_test.setText('暂停测试')
                 self.update_device_Info_worker.pause_flag = False
                 # self.update_device_Info_worker.test_result = '进行中'
                 logger.info('go on  test')
-                
-            self.write_to_json_file(stop_test=False, pause_test=pause)
             
             
     def on_test_finished(self):
@@ -1002,9 +1117,8 @@ class ClientTest(QtCore.QObject):
         if (self.current_time - self.last_refresh_time >= 5) and not self.running and self.update_port_enable:
             logger.info('start refresh ports')
             self.update_port_enable = False
-            # threading.Thread(target=self.update_port_options).start()
+            # 后台刷新，结束时on_port_scan_finished更新电流界面的端口名
             self.update_port_options()
-            self.update_current_ui_portnames(ports=self.port_names)
         else:
             logger.info(' do not refresh')
 
@@ -1213,107 +1327,140 @@ class ClientTest(QtCore.QObject):
         text = f"软件版本: {self.client_version}\n发布时间: {self.release_date_str}\n版权所有© 2015·2024 上海傲意信息科技有限公司"
         QMessageBox.information(self.window,'软件版本', text)
         
-    def get_port_infos(self):
+    def list_ports(self):
         """
-        通过并行任务的方式获取端口相关设备信息，提高获取效率。
+        返回刷新端口时的全部端口：本机端口，以及其他主机上由代理运行的端口（"代理名/端口"）。
+        查询代理需要网络往返，只在手动刷新时调用
+        """
+        ports = self.list_local_ports()
+        if self.protocol != self.MODBUS_PROTOCOL and FARM.enabled:
+            ports += FARM.list_ports()
+        return ports
+
+    def list_local_ports(self):
+        """
+        返回当前协议下本机可用的端口：串口名或PCAN通道名。热插拔监视会周期性调用，只枚举不打开端口
         """
-        ports = None
         if self.protocol == self.MODBUS_PROTOCOL:
             portInfos = serial.tools.list_ports.comports()
             ports = [portInfo.device for portInfo in portInfos if portInfo]
         else:
-            available_configs = can.interface.detect_available_configs()
+            # 只查询pcan接口，避免逐个尝试python-can支持的全部接口
+            available_configs = can.interface.detect_available_configs('pcan')
             # ports =  [cfg for cfg in available_configs if cfg.get("channel", "").startswith("PCAN_USBBUS")]
             peak_configs = [cfg for cfg in available_configs if cfg.get("channel", "").startswith("PCAN_USBBUS")]
             # 第二步：提取通道名字符串（关键！和串口格式对齐）
             ports = [cfg["channel"] for cfg in peak_configs]
-        logger.info(f'ports={ports}')
-        # ports=['COM1']
-        portNames = []
-        nodeIds = []
-        # MAX_NODE_ID = self
+        logger.debug(f'ports={ports}')
+        return ports
+
+    def probe_port(self, port):
+        """
+        获取单个端口上的设备信息，由PortScanWorker在线程池中调用，每个端口一个线程。
+        返回该端口上找到的设备信息列表。
+        """
         ROH_FW_VERSION = 1001  # 固件版本寄存器地址
 
-        def process_port(port):
-            """
-            处理单个端口信息获取的函数，每个端口会在独立的线程中执行此函数。
-            """
-            node_id = '无法获取'
-            sw_version = '无法获取'
-            connect_status = '未连接'
-            client = None
-            if self.protocol == self.MODBUS_PROTOCOL:
-                client = ModbusClient(port=port)
+        if FARM.owns(port):
+            # 远程端口由代理探测，这里使用list_ports()时查询到的节点
+            return [self.make_device_info(port, node_id, sw_version) for node_id, sw_version in FARM.devices(port)]
+        if self.protocol != self.MODBUS_PROTOCOL:
+            return self.discover_can_port(port)
+        # 从会话池借用串口，扫描结束后连接保持打开，测试脚本可直接复用
+        session = TRANSPORTS.acquire_modbus(port, baudrate=ModbusClient.baudrate, timeout=0.1)
+        if session is None:
+            logger.error(f"[port = {port}]Could not connect to Modbus device.")
+            return []
+        failed = False
+        try:
+            # 先定向探测缓存的节点ID，未命中再逐个扫描
+            cached = self.inventory.get(port) or []
+            node_ids = [node['node_id'] for node in cached] + list(range(2, self.max_node_id))
+            for id in node_ids:
+                logger.info(f'check port device id:{id}')
+                response = session.client.read_holding_registers(ROH_FW_VERSION, 2, id)
+                if not response.isError():
+                    sw_version = self.convert_version_format(response)
+                    self.inventory.update(port, [{'node_id': id, 'sw_version': sw_version, 'uid': None}])
+                    return [self.make_device_info(port, id, sw_version)]
+            self.inventory.update(port, [])
+            return []
+        except Exception as e:
+            logger.error(f"Error during setup for port {port}: {e}\n")
+            failed = True
+            return []
+        finally:
+            TRANSPORTS.release(port, failed=failed)
+
+    def make_device_info(self, port, node_id, sw_version):
+        return {
+            self.STR_PORT: port,
+            self.STR_DEVICE_NAME: 'Rohand',
+            self.STR_SOFTWARE_VERSION: sw_version,
+            self.STR_DEVICE_ID: node_id,
+            self.STR_CONNECT_STATUS: '已连接',
+            self.STR_TEST_PROGRESS: '0%',
+            self.STR_TEST_RESULT: '--'
+        }
+
+    def discover_can_port(self, port):
+        """
+        探测CAN端口上的节点：设备清单中有未过期的缓存时，只向缓存的节点ID发送一轮固件版本和UID探测，
+        全部应答且UID一致即视为命中；否则一次性探测2..max_node_id-1的全部节点ID并更新设备清单。
+        返回找到的每个节点的设备信息
+        """
+        # 从会话池借用通道，扫描结束后通道保持打开，测试脚本可直接复用
+        session = TRANSPORTS.acquire_can(port, baudrate=CanClient.baudrate)
+        if session is None:
+            return []
+        failed = False
+        try:
+            with session.tap() as bus:
+                cached = self.inventory.get(port)
+                nodes = self.verify_can_nodes(bus, cached) if cached else None
+                if nodes is None:
+                    found = CAN_DiscoverNodes(bus, range(2, self.max_node_id))
+                    uids = CAN_ProbeNodes(bus, list(found), (HAND_CMD_GET_UID,))
+            if nodes is None:
+                nodes = [
+                    {'node_id': node_id,
+                     'sw_version': self.format_can_version(version),
+                     'uid': self.format_can_uid(uids.get(node_id, {}).get(HAND_CMD_GET_UID))}
+                    for node_id, version in found.items()
+                ]
+                logger.info(f'port {port} full scan, nodes={nodes}')
             else:
-                client = CanClient(port=port)
-            try:
-                client.connect()
-                for id in range(2,self.max_node_id):
-                    logger.info(f'check port device id:{id}')
-                    if self.protocol == self.MODBUS_PROTOCOL:
-                        response = client.serialclient.read_holding_registers(ROH_FW_VERSION, 2, id)
-                        if not response.isError():
-                            portNames.append(port)
-                            nodeIds.append(id)
-                            sw_version = self.convert_version_format(response)
-                            node_id = id
-                            connect_status = '已连接'
-                            devices_info = {
-                                self.STR_PORT: port,
-                                self.STR_DEVICE_NAME: 'Rohand',
-                                self.STR_SOFTWARE_VERSION: sw_version,
-                                self.STR_DEVICE_ID: node_id,
-                                self.STR_CONNECT_STATUS: connect_status,
-                                self.STR_TEST_PROGRESS: '0%',
-                                self.STR_TEST_RESULT: '--'
-                            }
-                            return devices_info
-                    else:
-                        # time.sleep(0.1)
-                        major, minor, revision = [0], [0], [0]
-                        err, major_get, minor_get, revision_get = client.serialclient.HAND_GetFirmwareVersion(id, major, minor, revision, [])
-                        logger.info(f'err={err}')
-                        if err == HAND_RESP_SUCCESS:
-                            portNames.append(port)
-                            nodeIds.append(id)
-                            sw_version = f'V{major_get}.{minor_get}.{revision_get}'
-                            node_id = id
-                            connect_status = '已连接'
-                            devices_info = {
-                                    self.STR_PORT: port,
-                                    self.STR_DEVICE_NAME: 'Rohand',
-                                    self.STR_SOFTWARE_VERSION: sw_version,
-                                    self.STR_DEVICE_ID: node_id,
-                                    self.STR_CONNECT_STATUS: connect_status,
-                                    self.STR_TEST_PROGRESS: '0%',
-                                    self.STR_TEST_RESULT: '--'
-                                }
-                            return devices_info
-                client.disConnect()
-                return None
-            except Exception as e:
-                logger.error(f"Error during setup for port {port}: {e}\n")
+                logger.info(f'port {port} inventory hit, nodes={nodes}')
+            self.inventory.update(port, nodes)
+            return [self.make_device_info(port, node['node_id'], node['sw_version']) for node in nodes]
+        except Exception as e:
+            logger.error(f"Error during setup for port {port}: {e}\n")
+            failed = True
+            return []
+        finally:
+            TRANSPORTS.release(port, failed=failed)
+
+    def verify_can_nodes(self, bus, cached):
+        """
+        向缓存的节点发送一轮固件版本和UID探测，全部应答且UID与缓存一致时返回更新了版本号的节点列表，否则返回None
+        """
+        probed = CAN_ProbeNodes(bus, [node['node_id'] for node in cached], (HAND_CMD_GET_FW_VERSION, HAND_CMD_GET_UID))
+        nodes = []
+        for node in cached:
+            responses = probed.get(node['node_id'], {})
+            if HAND_CMD_GET_FW_VERSION not in responses or self.format_can_uid(responses.get(HAND_CMD_GET_UID)) != node.get('uid'):
                 return None
-            finally:
-                if client:
-                    client.disConnect()
-
-        # 使用线程池并发执行每个端口的任务
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            results = list(executor.map(process_port, ports))
-
-        # 处理收集到的结果，提取有效设备信息并更新类属性
-        valid_devices_info = [info for info in results if info is not None]
-        if valid_devices_info:
-            self.port_names = [info[self.STR_PORT] for info in valid_devices_info]
-            self.node_ids = [info[self.STR_DEVICE_ID] for info in valid_devices_info]
-            self.devices_info_list = valid_devices_info
-        else:
-            self.port_names = [self.no_used_port]
-            self.node_ids = [2]
+            fields = responses[HAND_CMD_GET_FW_VERSION]
+            nodes.append(dict(node, sw_version=self.format_can_version(None if fields is None else fields[::-1])))
+        return nodes
 
-        self.update_port_enable = True
-            
+    @staticmethod
+    def format_can_version(version):
+        return '无法获取' if version is None else 'V{}.{}.{}'.format(*version)
+
+    @staticmethod
+    def format_can_uid(uid):
+        return None if uid is None else list(uid)
 
     def convert_version_format(self, response):
         """
@@ -1409,6 +1556,98 @@ class ClientTest(QtCore.QObject):
        
         return devices_info
     
+    class PortScanWorker(QObject):
+        """
+        后台端口扫描：每个端口在线程池中独立探测，探测到设备立即发出device_found_signal，
+        慢端口或无设备端口不会阻塞其他端口；超过time_out秒仍未完成的端口被放弃
+        """
+        device_found_signal = pyqtSignal(dict)
+        progress_signal = pyqtSignal(int, int)  # 已完成端口数, 端口总数
+        scan_finished_signal = pyqtSignal()
+
+        def __init__(self, list_ports, probe_port, time_out, parent=None):
+            super().__init__(parent)
+            self.list_ports = list_ports
+            self.probe_port = probe_port
+            self.time_out = time_out
+            self.ports = []  # 本次扫描枚举到的端口，热插拔监视以此为基准
+
+        def start(self):
+            thread = threading.Thread(target=self.run_scan)
+            thread.daemon = True
+            thread.start()
+
+        def run_scan(self):
+            try:
+                ports = self.ports = self.list_ports()
+                logger.info(f'scan ports={ports}')
+                self.progress_signal.emit(0, len(ports))
+                if not ports:
+                    return
+                executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(ports))
+                futures = [executor.submit(self.probe_port, port) for port in ports]
+                done = 0
+                try:
+                    for future in concurrent.futures.as_completed(futures, timeout=self.time_out):
+                        done += 1
+                        for device_info in future.result():
+                            self.device_found_signal.emit(device_info)
+                        self.progress_signal.emit(done, len(ports))
+                except concurrent.futures.TimeoutError:
+                    logger.error(f"Timeout while waiting for port infos collection, {len(ports) - done} ports skipped.")
+                finally:
+                    # 不等待超时的端口线程
+                    executor.shutdown(wait=False)
+            except Exception as e:
+                logger.error(f"Error during port scan: {e}")
+            finally:
+                self.scan_finished_signal.emit()
+
+    class PortWatcher(QObject):
+        """
+        热插拔监视：后台线程每隔interval秒枚举一次端口（不打开端口），与已知端口集合比较，
+        发出新增和移除的端口列表
+        """
+        ports_added_signal = pyqtSignal(list)
+        ports_removed_signal = pyqtSignal(list)
+
+        def __init__(self, list_ports, interval, parent=None):
+            super().__init__(parent)
+            self.list_ports = list_ports
+            self.interval = interval
+            self.known = set()
+            self.lock = threading.Lock()
+            self.stop_event = threading.Event()
+
+        def start(self, ports):
+            self.set_known(ports)
+            thread = threading.Thread(target=self.run_watch)
+            thread.daemon = True
+            thread.start()
+
+        def stop(self):
+            self.stop_event.set()
+
+        def set_known(self, ports):
+            with self.lock:
+                self.known = set(ports)
+
+        def run_watch(self):
+            while not self.stop_event.wait(self.interval):
+                try:
+                    current = set(self.list_ports())
+                except Exception as e:
+                    logger.error(f"Error during port enumeration: {e}")
+                    continue
+                with self.lock:
+                    added = sorted(current - self.known)
+                    removed = sorted(self.known - current)
+                    self.known = current
+                if removed:
+                    self.ports_removed_signal.emit(removed)
+                if added:
+                    self.ports_added_signal.emit(added)
+
     class UpdateCurrentUIWorker(QObject):
         update_com_name_signal = pyqtSignal(list)
         update_current_signal = pyqtSignal(dict)
@@ -1432,11 +1671,12 @@ class ClientTest(QtCore.QObject):
             self.stop_flag = False
             self.pause_flag = False
             self.selected_aging_duration = None
+            self.resumed_hours = 0  # 从检查点继续时已运行的小时数
             self.off_duration = 0
             self.test_result = {}
             
         def run_test(self):
-            start_time = datetime.datetime.now()
+            start_time = datetime.datetime.now() - datetime.timedelta(hours=self.resumed_hours)
             end_time = start_time + datetime.timedelta(hours=float(self.selected_aging_duration)+float(self.off_duration))
             self.update_result_signal.emit(self.test_result)
             while datetime.datetime.now() < end_time:
@@ -1564,6 +1804,8 @@ class CanClient:
                                                     recv_data_impl)
             self.serialclient.HAND_SetTimerFunction(get_milli_seconds_impl, delay_milli_seconds_impl)
             self.serialclient.HAND_SetCommandTimeOut(255)
+            if self.can_interface_instance is not None:
+                CAN_StartReceiver(self.can_interface_instance, self.serialclient)
         except Exception as e:
             logger.info(f"\n初始化异常: {str(e)}")
 
@@ -0,0 +1,213 @@
+import math
+import time
+
+DEFAULT_RATE_HZ = 100  # 每秒采样次数
+DEFAULT_QUANTILE = 0.95
+
+
+class P2Quantile:
+    """
+    P²算法（Jain & Chlamtac, 1985）在线估计分位数：只保存5个标记点，不保存原始样本，
+    样本数不足5个时返回精确值
+    """
+
+    __slots__ = ("p", "q", "n", "np", "dn")
+
+    def __init__(self, p=DEFAULT_QUANTILE):
+        self.p = p
+        self.q = []  # 标记点高度，前5个样本收集完成前为已排序的原始样本
+        self.n = [0, 1, 2, 3, 4]  # 标记点实际位置
+        self.np = [0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0]  # 标记点期望位置
+        self.dn = (0.0, p / 2, p, (1 + p) / 2, 1.0)
+
+    def add(self, x):
+        q = self.q
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+        n = self.n
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.np[i] += self.dn[i]
+        # 调整中间3个标记点，偏离期望位置超过1时按抛物线插值（越界时按线性插值）移动
+        for i in range(1, 4):
+            d = self.np[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                qp = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                if not q[i - 1] < qp < q[i + 1]:
+                    qp = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = qp
+                n[i] += d
+
+    def value(self):
+        q = self.q
+        if not q:
+            return None
+        if self.n[4] < 5:
+            # 不超过5个样本，q即全部已排序样本
+            return q[min(int(math.ceil(self.p * len(q))) - 1, len(q) - 1)] if self.p > 0 else q[0]
+        return q[2]
+
+    def to_dict(self):
+        return {"p": self.p, "q": list(self.q), "n": list(self.n), "np": list(self.np)}
+
+    @classmethod
+    def from_dict(cls, state):
+        quantile = cls(state["p"])
+        quantile.q = list(state["q"])
+        quantile.n = list(state["n"])
+        quantile.np = list(state["np"])
+        return quantile
+
+
+class MotorStats:
+    """单个电机的流式统计：Welford算法计算均值和方差，另记录最小值、最大值和P95，不保存原始样本"""
+
+    __slots__ = ("count", "mean", "m2", "min", "max", "quantile", "failures")
+
+    def __init__(self, quantile=DEFAULT_QUANTILE):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.quantile = P2Quantile(quantile)
+        self.failures = 0  # 读取失败（值为None）的次数
+
+    def add(self, x):
+        if x is None:
+            self.failures += 1
+            return
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.min = x if self.min is None or x < self.min else self.min
+        self.max = x if self.max is None or x > self.max else self.max
+        self.quantile.add(x)
+
+    @property
+    def variance(self):
+        """样本方差，少于2个样本时为0"""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    @property
+    def p95(self):
+        return self.quantile.value()
+
+    def summary(self, digits=3):
+        """返回{'mean', 'std', 'min', 'max', 'p95', 'count'}，用于日志和结果记录"""
+        def rounded(value):
+            return None if value is None else round(value, digits)
+
+        return {
+            "mean": rounded(self.mean) if self.count else None,
+            "std": rounded(self.std),
+            "min": self.min,
+            "max": self.max,
+            "p95": rounded(self.p95),
+            "count": self.count,
+        }
+
+    def to_dict(self):
+        """完整的统计状态，用于检查点；from_dict()恢复后可继续add()"""
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "m2": self.m2,
+            "min": self.min,
+            "max": self.max,
+            "failures": self.failures,
+            "quantile": self.quantile.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        stats = cls()
+        stats.count = state["count"]
+        stats.mean = state["mean"]
+        stats.m2 = state["m2"]
+        stats.min = state["min"]
+        stats.max = state["max"]
+        stats.failures = state["failures"]
+        stats.quantile = P2Quantile.from_dict(state["quantile"])
+        return stats
+
+    def __repr__(self):
+        return f"MotorStats(count={self.count}, mean={self.mean:.3f}, std={self.std:.3f}, min={self.min}, max={self.max}, p95={self.p95})"
+
+
+class CurrentSampler:
+    """
+    按固定频率采集全部电机电流并在线统计：read_currents()每次返回各电机的一组读数（读取失败的电机为None），
+    应在一次事务中读取全部电机（如HAND_GetSnapshot(fields=SUB_CMD_GET_CURRENT)）。
+    采样时刻按起始时间对齐，不随单次读取耗时累积漂移；读取耗时超过采样周期时跳过错过的时刻，不补采。
+
+        sampler = CurrentSampler(test.read_finger_currents, rate_hz=100)
+        stats = sampler.run(duration_s=0.5)
+        means = [s.mean for s in stats]
+    """
+
+    def __init__(self, read_currents, rate_hz=DEFAULT_RATE_HZ, quantile=DEFAULT_QUANTILE, sleep=time.sleep):
+        self.read_currents = read_currents
+        self.sleep = sleep  # 采样间隔的等待函数（秒），测试脚本传入可被停止打断的RunControl.sleep
+        self.period = 1.0 / rate_hz
+        self.quantile = quantile
+        self.stats = []
+        self.ticks = 0
+
+    def reset(self):
+        self.stats = []
+        self.ticks = 0
+
+    def tick(self):
+        """采集一次并计入统计"""
+        currents = self.read_currents()
+        if len(self.stats) < len(currents):
+            self.stats.extend(MotorStats(self.quantile) for _ in range(len(currents) - len(self.stats)))
+        for stats, value in zip(self.stats, currents):
+            stats.add(value)
+        self.ticks += 1
+
+    def run(self, duration_s=None, samples=None):
+        """采集duration_s秒或samples次（先到者为准），返回各电机的MotorStats列表"""
+        if duration_s is None and samples is None:
+            raise ValueError("duration_s or samples is required")
+        start = time.perf_counter()
+        end = None if duration_s is None else start + duration_s
+        next_tick = start
+        taken = 0
+        while samples is None or taken < samples:
+            if end is not None and next_tick >= end:
+                break
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                self.sleep(delay)
+            self.tick()
+            taken += 1
+            next_tick += self.period
+            now = time.perf_counter()
+            if next_tick < now:
+                # 读取比采样周期慢：从当前时刻重新对齐
+                next_tick = now
+        return self.stats
@@ -0,0 +1,64 @@
+import json
+import os
+import threading
+import time
+
+DEFAULT_TTL = 24 * 3600  # 秒
+
+
+class DeviceInventory:
+    """
+    设备清单缓存：按端口（串口名或PCAN通道名）在JSON文件中保存该端口上的节点ID、固件版本、UID
+    和最后一次确认在线的时间，刷新端口时先按缓存的节点ID定向探测，未命中或过期的端口才需要全量扫描。
+
+    文件内容示例：
+        {"PCAN_USBBUS1": {"last_seen": 1700000000.0,
+                          "nodes": [{"node_id": 2, "sw_version": "V3.0.1", "uid": [1, 2, 3]}]}}
+    """
+
+    def __init__(self, path, ttl=DEFAULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+            return entries if isinstance(entries, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"设备清单文件读取失败，忽略缓存: {e}")
+            return {}
+
+    def _save(self):
+        # 先写临时文件再替换，中途退出不会留下损坏的清单
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def get(self, port):
+        """返回端口缓存的节点列表，无缓存或超过ttl未确认时返回None"""
+        with self.lock:
+            entry = self.entries.get(port)
+            if not entry or time.time() - entry.get("last_seen", 0) > self.ttl:
+                return None
+            return [dict(node) for node in entry.get("nodes", [])]
+
+    def update(self, port, nodes):
+        """记录端口上确认在线的节点列表，nodes为[{"node_id", "sw_version", "uid"}, ...]，空列表删除该端口"""
+        with self.lock:
+            if nodes:
+                self.entries[port] = {"last_seen": time.time(), "nodes": [dict(node) for node in nodes]}
+            else:
+                self.entries.pop(port, None)
+            try:
+                self._save()
+            except OSError as e:
+                print(f"设备清单文件保存失败: {e}")
@@ -0,0 +1,142 @@
+import logging
+import queue
+import threading
+import time
+from run_control import StopRequested
+
+CONTROL_POLL_INTERVAL = 0.5  # 秒，收集线程读取停止/暂停标志的间隔
+RECONNECT_INTERVAL = 5  # 秒，连接失败后重试前的等待时间
+
+logger = logging.getLogger(__name__)
+
+
+class DeviceRound:
+    """一台设备完成的一轮测试：port_result为测试脚本构建的端口结果字典，connected为False表示本轮未能连接"""
+
+    __slots__ = ("port", "node_id", "round_num", "port_result", "connected")
+
+    def __init__(self, port, node_id, round_num, port_result, connected=True):
+        self.port = port
+        self.node_id = node_id
+        self.round_num = round_num
+        self.port_result = port_result
+        self.connected = connected
+
+
+class DeviceRunner:
+    """
+    多轮测试运行器：每台设备一个常驻工作线程，持有自己的测试实例和连接，按自己的节奏连续执行测试轮次，
+    每轮结果放入结果队列，由调用run()的线程统一收集。先完成的设备直接开始下一轮，不再等待本轮最慢的设备，
+    也不再每轮创建线程池和连接。
+
+        runner = DeviceRunner(create_test, run_port_round, control=CONTROL)
+        for record in runner.run(zip(ports, node_ids), end_time):
+            overall_result.append(record.port_result)
+
+    create_test(port, node_id)返回带connect_device()/disConnect_device()的测试实例，
+    run_round(test)执行一轮测试并返回端口结果字典，should_retire(port)返回True时该设备不再开始新的轮次。
+    control(RunControl)提供停止/暂停事件：停止立即唤醒所有等待，run_round中抛出的StopRequested结束该设备的测试，
+    中断的轮次不计入结果。不能共用事件时（如子进程内）改为传入read_control()，按CONTROL_POLL_INTERVAL轮询其返回的
+    (stop_test, pause_test)
+    """
+
+    def __init__(self, create_test, run_round, read_control=None, should_retire=None,
+                 reconnect_interval=RECONNECT_INTERVAL, log=logger, control=None):
+        self.create_test = create_test
+        self.run_round = run_round
+        self.read_control = read_control
+        self.should_retire = should_retire
+        self.reconnect_interval = reconnect_interval
+        self.log = log
+        if control is not None:
+            self.stop_event = control.stop_event
+            self.resume_event = control.resume_event
+        else:
+            self.stop_event = threading.Event()
+            self.resume_event = threading.Event()  # 清除表示暂停，工作线程在开始下一轮前等待
+            self.resume_event.set()
+
+    def stop(self):
+        """各设备完成当前轮次后停止"""
+        self.stop_event.set()
+        self.resume_event.set()
+
+    def run(self, devices, end_time, start_rounds=None):
+        """
+        为devices中的每个(端口, 节点ID)启动工作线程，直到end_time(time.time())或停止，
+        按完成顺序逐个产出DeviceRound。生成器结束（包括提前关闭）时停止并等待所有工作线程。
+        start_rounds为{端口: 已完成的轮次编号}，从检查点继续测试时各端口接着编号
+        """
+        start_rounds = start_rounds or {}
+        results = queue.SimpleQueue()
+        workers = [
+            threading.Thread(target=self._work, args=(port, node_id, end_time, results, start_rounds.get(port, 0)), daemon=True)
+            for port, node_id in devices
+        ]
+        for worker in workers:
+            worker.start()
+        running = len(workers)
+        try:
+            while running:
+                self._poll_control()
+                try:
+                    record = results.get(timeout=CONTROL_POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+                if record is None:
+                    running -= 1
+                    continue
+                yield record
+        finally:
+            self.stop()
+            for worker in workers:
+                worker.join()
+
+    def _poll_control(self):
+        if self.read_control is None or self.stop_event.is_set():
+            return
+        stop_test, pause_test = self.read_control()
+        if stop_test:
+            self.log.info('测试已停止')
+            self.stop()
+        elif pause_test and self.resume_event.is_set():
+            self.log.info('测试暂停')
+            self.resume_event.clear()
+        elif not pause_test and not self.resume_event.is_set():
+            self.log.info('测试恢复')
+            self.resume_event.set()
+
+    def _work(self, port, node_id, end_time, results, round_num=0):
+        connected = False
+        try:
+            test = self.create_test(port, node_id)
+            while not self.stop_event.is_set() and time.time() < end_time:
+                self.resume_event.wait()
+                if self.stop_event.is_set():
+                    break
+                if self.should_retire is not None and self.should_retire(port):
+                    self.log.info(f'[port = {port}]设备已退出测试')
+                    break
+                if not connected:
+                    connected = test.connect_device()
+                    if not connected:
+                        results.put(DeviceRound(port, node_id, round_num, {'port': port, 'gestures': []}, False))
+                        self.stop_event.wait(self.reconnect_interval)
+                        continue
+                round_num += 1
+                try:
+                    port_result = self.run_round(test)
+                except StopRequested:
+                    self.log.info(f'[port = {port}]第 {round_num} 轮测试已停止')
+                    break
+                except Exception as e:
+                    # 测试脚本未处理的异常：记为空结果，断开后在下一轮重新连接
+                    self.log.error(f'[port = {port}]第 {round_num} 轮测试异常: {e}')
+                    port_result = {'port': port, 'gestures': []}
+                    test.disConnect_device()
+                    connected = False
+                results.put(DeviceRound(port, node_id, round_num, port_result))
+        finally:
+            if connected:
+                test.disConnect_device()
+            results.put(None)
@@ -0,0 +1,459 @@
+import argparse
+import hmac
+import importlib
+import json
+import logging
+import os
+import queue
+import socket
+import sys
+import threading
+import time
+from device_inventory import DeviceInventory
+from device_runner import CONTROL_POLL_INTERVAL, DeviceRound, DeviceRunner
+from process_runner import ProcessRunner
+from run_control import CONTROL
+
+DEFAULT_AGENT_PORT = 7600
+CONNECT_TIMEOUT = 3  # 秒，连接代理和查询设备的超时
+SEPARATOR = '/'  # 远程端口名中代理名与端口的分隔符
+
+logger = logging.getLogger(__name__)
+
+
+def send_message(sock, message, lock=None):
+    data = (json.dumps(message, ensure_ascii=False) + '\n').encode('utf-8')
+    if lock is None:
+        sock.sendall(data)
+    else:
+        with lock:
+            sock.sendall(data)
+
+
+def read_messages(sock):
+    """逐个产出从sock读到的消息，连接关闭时结束"""
+    with sock.makefile('r', encoding='utf-8', newline='\n') as stream:
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+
+
+def parse_address(address, default_port=DEFAULT_AGENT_PORT):
+    host, _, port = address.strip().rpartition(':')
+    return (host, int(port)) if host else (port, default_port)
+
+
+def list_scripts(script_dirs):
+    """测试脚本目录下的模块名，代理只运行这些脚本"""
+    scripts = set()
+    for script_dir in script_dirs:
+        for name in os.listdir(script_dir):
+            if name.endswith('.py') and not name.startswith('_'):
+                scripts.add(name[:-3])
+    return scripts
+
+
+def check_token(message, token):
+    """token为空表示不认证"""
+    if not token:
+        return True
+    return hmac.compare_digest(str(message.get('token', '')).encode('utf-8'), token.encode('utf-8'))
+
+
+class _LogSender(logging.Handler):
+    """代理端把测试脚本的日志发给协调端"""
+
+    def __init__(self, sock, send_lock):
+        super().__init__()
+        self.sock = sock
+        self.send_lock = send_lock  # 与结果消息共用的发送锁（Handler.lock为日志模块自用）
+
+    def emit(self, record):
+        try:
+            send_message(self.sock, {'type': 'log', 'level': record.levelno, 'message': record.getMessage(),
+                                     'created': record.created}, self.send_lock)
+        except OSError:
+            pass
+
+
+class FarmAgent:
+    """
+    测试代理：在连接PCAN的主机上监听TCP连接，应答设备查询，按协调端发来的测试计划在本机运行测试脚本
+    （同一时间只运行一个计划），并把逐轮结果和日志流式发回。计划连接断开视为停止。
+    计划只能运行scripts中的测试脚本（默认为--script-dir下的模块），只能使用本代理的设备。
+    默认只监听127.0.0.1；供其他主机连接时监听0.0.0.0并设置口令，协调端在config.ini的[farm] token中配置相同的口令，
+    口令不符的消息不予处理。在仓库根目录下启动，不指定--devices时使用本机设备清单缓存中的节点：
+        python farm.py --name line2 --bind 0.0.0.0:7600 --token 口令 --devices PCAN_USBBUS1:2,PCAN_USBBUS2:2
+
+    消息为每行一个JSON对象（UTF-8），设置口令时协调端的devices和plan消息带"token": 口令：
+        协调端 -> 代理: {"type": "devices"}
+                        {"type": "plan", "script": 模块名, "devices": [[端口, 节点ID], ...], "duration_s": 秒, "processes": 子进程数,
+                         "start_rounds": {端口: 已完成的轮次编号}}
+                        {"type": "control", "action": "stop" | "pause" | "resume"}
+        代理 -> 协调端: {"type": "devices", "devices": [[端口, 节点ID, 固件版本], ...]}
+                        {"type": "round", "port", "node_id", "round", "connected", "port_result"}
+                        {"type": "log", "level", "message", "created"}
+                        {"type": "error", "message"}
+                        {"type": "done"}
+    """
+
+    def __init__(self, name, devices=None, bind=('127.0.0.1', DEFAULT_AGENT_PORT), inventory=None,
+                 scripts=(), token='', log=logger):
+        self.name = name
+        self.devices = devices  # [(端口, 节点ID, 固件版本)]，None时从inventory读取
+        self.bind = bind
+        self.inventory = inventory
+        self.scripts = set(scripts)  # 允许运行的测试脚本模块名
+        self.token = token
+        self.log = log
+        self.plan_lock = threading.Lock()
+        self.server = None
+
+    def list_devices(self):
+        if self.devices is not None:
+            return [list(device) for device in self.devices]
+        if self.inventory is None:
+            return []
+        devices = []
+        for port in sorted(self.inventory.entries):
+            nodes = self.inventory.get(port) or []
+            if nodes:
+                devices.append([port, nodes[0]['node_id'], nodes[0].get('sw_version', '')])
+        return devices
+
+    def serve_forever(self):
+        self.server = socket.create_server(self.bind)
+        self.log.info(f'代理{self.name}已启动，监听{self.bind[0]}:{self.server.getsockname()[1]}')
+        try:
+            while True:
+                try:
+                    conn, address = self.server.accept()
+                except OSError:
+                    break
+                threading.Thread(target=self._handle, args=(conn, address), daemon=True).start()
+        finally:
+            self.server.close()
+
+    def shutdown(self):
+        if self.server is not None:
+            self.server.close()
+
+    def _handle(self, conn, address):
+        lock = threading.Lock()
+        try:
+            messages = read_messages(conn)
+            for message in messages:
+                if not check_token(message, self.token):
+                    self.log.error(f'协调端{address}口令错误，断开连接')
+                    send_message(conn, {'type': 'error', 'message': f'代理{self.name}口令错误'}, lock)
+                    break
+                kind = message.get('type')
+                if kind == 'devices':
+                    send_message(conn, {'type': 'devices', 'devices': self.list_devices()}, lock)
+                elif kind == 'plan':
+                    self._run_plan(conn, lock, message, messages)
+                    break
+        except (OSError, ValueError) as e:
+            self.log.error(f'协调端{address}连接异常: {e}')
+        finally:
+            conn.close()
+
+    def check_plan(self, plan):
+        """返回计划不能运行的原因，可以运行时返回None"""
+        if plan.get('script') not in self.scripts:
+            return f"代理{self.name}不允许运行测试脚本{plan.get('script')}"
+        own = {(port, node_id) for port, node_id, _ in self.list_devices()}
+        unknown = [device for device in map(tuple, plan.get('devices', [])) if device not in own]
+        if unknown:
+            return f'代理{self.name}没有设备{unknown}'
+        return None
+
+    def _run_plan(self, conn, lock, plan, messages):
+        error = self.check_plan(plan)
+        if error is not None:
+            self.log.error(error)
+            send_message(conn, {'type': 'error', 'message': error}, lock)
+            send_message(conn, {'type': 'done'}, lock)
+            return
+        if not self.plan_lock.acquire(blocking=False):
+            send_message(conn, {'type': 'error', 'message': f'代理{self.name}正在运行其他测试'}, lock)
+            send_message(conn, {'type': 'done'}, lock)
+            return
+        sender = None
+        module_log = None
+        active = threading.Event()  # 本计划运行期间置位，计划结束后控制线程不再影响CONTROL
+        active.set()
+        try:
+            module = importlib.import_module(plan['script'])
+            module_log = getattr(module, 'logger', self.log)
+            sender = _LogSender(conn, lock)
+            module_log.addHandler(sender)
+            CONTROL.start()
+            # 计划连接上的后续消息为停止/暂停控制，连接断开视为停止
+            threading.Thread(target=self._read_control, args=(messages, active), daemon=True).start()
+            if plan.get('processes'):
+                runner = ProcessRunner(plan['script'], processes=plan['processes'], control=CONTROL, log=module_log)
+            else:
+                runner = DeviceRunner(module.create_test, module.run_port_round, control=CONTROL,
+                                      should_retire=getattr(module, 'should_retire', None), log=module_log)
+            devices = [(port, node_id) for port, node_id in plan['devices']]
+            self.log.info(f"代理{self.name}开始测试{plan['script']}：{devices}")
+            for record in runner.run(devices, time.time() + plan['duration_s'], plan.get('start_rounds')):
+                send_message(conn, {'type': 'round', 'port': record.port, 'node_id': record.node_id,
+                                    'round': record.round_num, 'connected': record.connected,
+                                    'port_result': record.port_result}, lock)
+        except OSError:
+            CONTROL.stop()
+        except Exception as e:
+            self.log.exception('测试计划执行异常')
+            send_message(conn, {'type': 'error', 'message': f'{type(e).__name__}: {e}'}, lock)
+        finally:
+            active.clear()
+            if sender is not None:
+                module_log.removeHandler(sender)
+            try:
+                send_message(conn, {'type': 'done'}, lock)
+            except OSError:
+                pass
+            self.plan_lock.release()
+
+    @staticmethod
+    def _read_control(messages, active):
+        try:
+            for message in messages:
+                if message.get('type') != 'control' or not active.is_set():
+                    continue
+                action = message.get('action')
+                if action == 'stop':
+                    CONTROL.stop()
+                elif action == 'pause':
+                    CONTROL.pause()
+                elif action == 'resume':
+                    CONTROL.resume()
+        except (OSError, ValueError):
+            pass
+        if active.is_set():
+            CONTROL.stop()
+
+
+class FarmRunner:
+    """
+    协调端运行器，接口与DeviceRunner相同：远程端口（"代理名/端口"）按代理分组发送测试计划，
+    其余端口交给local_runner在本机运行，两者的结果合并后按完成顺序产出DeviceRound（远程端口保持"代理名/端口"命名）。
+    界面的停止/暂停（control）转发给各代理，代理的日志加上代理名前缀由log输出
+    """
+
+    def __init__(self, coordinator, module_name, local_runner=None, processes=0, control=CONTROL, log=logger):
+        self.coordinator = coordinator
+        self.module_name = module_name
+        self.local_runner = local_runner
+        self.processes = processes
+        self.control = control
+        self.log = log
+
+    def run(self, devices, end_time, start_rounds=None):
+        start_rounds = start_rounds or {}
+        plans = {}
+        local = []
+        for port, node_id in devices:
+            agent, remote_port = self.coordinator.split(port)
+            if agent is None:
+                local.append((port, node_id))
+            else:
+                plans.setdefault(agent, []).append((remote_port, node_id))
+        results = queue.SimpleQueue()
+        connections = {}
+        for agent, agent_devices in plans.items():
+            try:
+                conn = socket.create_connection(self.coordinator.agents[agent], timeout=CONNECT_TIMEOUT)
+                conn.settimeout(None)
+                send_message(conn, self.coordinator.sign({
+                    'type': 'plan', 'script': self.module_name, 'devices': agent_devices,
+                    'duration_s': max(end_time - time.time(), 0), 'processes': self.processes,
+                    'start_rounds': {port: start_rounds.get(self.coordinator.join(agent, port), 0) for port, _ in agent_devices}}))
+            except OSError as e:
+                self.log.error(f'代理{agent}连接失败: {e}')
+                continue
+            connections[agent] = conn
+            threading.Thread(target=self._receive, args=(agent, conn, results), daemon=True).start()
+        local_thread = None
+        if local and self.local_runner is not None:
+            local_thread = threading.Thread(target=self._run_local, args=(local, end_time, start_rounds, results), daemon=True)
+            local_thread.start()
+        running = len(connections) + (local_thread is not None)
+        state = self.control.state()
+        try:
+            while running:
+                current = self.control.state()
+                if current != state:
+                    self._forward_control(connections, current)
+                    state = current
+                try:
+                    kind, payload = results.get(timeout=CONTROL_POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+                if kind == 'round':
+                    yield payload
+                elif kind == 'done':
+                    running -= 1
+        finally:
+            self.control.stop()
+            self._forward_control(connections, (True, False))
+            if local_thread is not None:
+                local_thread.join()
+            for conn in connections.values():
+                conn.close()
+
+    def _forward_control(self, connections, state):
+        stop_test, pause_test = state
+        action = 'stop' if stop_test else 'pause' if pause_test else 'resume'
+        for agent, conn in connections.items():
+            try:
+                send_message(conn, {'type': 'control', 'action': action})
+            except OSError:
+                pass
+
+    def _run_local(self, devices, end_time, start_rounds, results):
+        try:
+            for record in self.local_runner.run(devices, end_time, start_rounds):
+                results.put(('round', record))
+        finally:
+            results.put(('done', None))
+
+    def _receive(self, agent, conn, results):
+        try:
+            for message in read_messages(conn):
+                kind = message.get('type')
+                if kind == 'round':
+                    results.put(('round', DeviceRound(self.coordinator.join(agent, message['port']), message['node_id'],
+                                                      message['round'], message['port_result'], message['connected'])))
+                elif kind == 'log':
+                    record = logging.makeLogRecord({'name': self.log.name, 'levelno': message['level'],
+                                                    'levelname': logging.getLevelName(message['level']),
+                                                    'msg': f"[{agent}]{message['message']}", 'created': message['created']})
+                    self.log.handle(record)
+                elif kind == 'error':
+                    self.log.error(f"代理{agent}: {message['message']}")
+                elif kind == 'done':
+                    break
+        except (OSError, ValueError) as e:
+            self.log.error(f'代理{agent}连接中断: {e}')
+        finally:
+            results.put(('done', None))
+
+
+class FarmCoordinator:
+    """
+    多主机测试的协调端（界面所在主机）：单台主机能驱动的USB-CAN适配器有限，其他主机上的端口由FarmAgent运行。
+    agents为{代理名: (主机, 端口)}，在config.ini的[farm]中配置，如
+        agents = line2=192.168.1.12:7600, line3=192.168.1.13:7600
+        token = 与各代理--token相同的口令
+    本机调试时可在localhost上用不同端口启动多个代理。远程端口在界面和结果中命名为"代理名/端口"
+    （如"line2/PCAN_USBBUS1"），界面刷新端口时通过list_ports()/devices()列出，
+    测试脚本通过runner()得到合并本机和远程端口结果的FarmRunner，报告和界面与本机端口相同
+    """
+
+    def __init__(self):
+        self.agents = {}
+        self.token = ''
+        self.remote_devices = {}  # 远程端口名 -> [(节点ID, 固件版本)]
+
+    def configure(self, agents, token=''):
+        """agents为"名称=主机:端口, ..."格式的字符串，空字符串表示只使用本机；token为代理的口令"""
+        self.token = token or ''
+        self.agents = {}
+        for item in (agents or '').split(','):
+            if '=' not in item:
+                continue
+            name, address = item.split('=', 1)
+            self.agents[name.strip()] = parse_address(address)
+
+    @property
+    def enabled(self):
+        return bool(self.agents)
+
+    def sign(self, message):
+        """设置了口令时给发往代理的消息加上口令"""
+        return dict(message, token=self.token) if self.token else message
+
+    def split(self, port):
+        """"代理名/端口"返回(代理名, 端口)，本机端口返回(None, port)"""
+        agent, separator, remote_port = port.partition(SEPARATOR)
+        if separator and agent in self.agents:
+            return agent, remote_port
+        return None, port
+
+    @staticmethod
+    def join(agent, port):
+        return f'{agent}{SEPARATOR}{port}'
+
+    def owns(self, port):
+        return self.split(port)[0] is not None
+
+    def owns_any(self, ports):
+        return any(self.owns(port) for port in ports)
+
+    def query_devices(self, agent):
+        """查询代理的设备列表[(端口, 节点ID, 固件版本)]，失败返回空列表"""
+        try:
+            with socket.create_connection(self.agents[agent], timeout=CONNECT_TIMEOUT) as conn:
+                send_message(conn, self.sign({'type': 'devices'}))
+                for message in read_messages(conn):
+                    if message.get('type') == 'devices':
+                        return [tuple(device) for device in message['devices']]
+        except (OSError, ValueError) as e:
+            logger.error(f'代理{agent}设备查询失败: {e}')
+        return []
+
+    def list_ports(self):
+        """查询全部代理，返回远程端口名列表"""
+        remote_devices = {}
+        for agent in self.agents:
+            for port, node_id, sw_version in self.query_devices(agent):
+                remote_devices.setdefault(self.join(agent, port), []).append((node_id, sw_version))
+        self.remote_devices = remote_devices
+        return list(remote_devices)
+
+    def devices(self, port):
+        """远程端口上一次list_ports()查询到的[(节点ID, 固件版本)]"""
+        return list(self.remote_devices.get(port, []))
+
+    def runner(self, module_name, local_runner=None, processes=0, log=logger):
+        return FarmRunner(self, module_name, local_runner, processes=processes, log=log)
+
+
+# 进程内唯一的协调端配置，界面和测试脚本共用
+FARM = FarmCoordinator()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='测试代理：接收协调端的测试计划并在本机运行')
+    parser.add_argument('--name', required=True, help='代理名，远程端口显示为"代理名/端口"')
+    parser.add_argument('--bind', default=f'127.0.0.1:{DEFAULT_AGENT_PORT}',
+                        help='监听地址，主机:端口；供其他主机连接时用0.0.0.0并设置--token')
+    parser.add_argument('--token', default=os.environ.get('FARM_TOKEN', ''), help='口令，默认取环境变量FARM_TOKEN')
+    parser.add_argument('--devices', default='', help='本机设备，端口:节点ID[,端口:节点ID...]，默认读取设备清单缓存')
+    parser.add_argument('--inventory', default='config/device_inventory.json', help='设备清单缓存文件')
+    parser.add_argument('--script-dir', action='append', default=[], help='测试脚本目录，默认scripts')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    script_dirs = [os.path.abspath(script_dir) for script_dir in args.script_dir or [os.path.join(base_dir, 'scripts')]]
+    sys.path.extend(script_dirs)
+    devices = None
+    if args.devices:
+        devices = []
+        for item in args.devices.split(','):
+            port, _, node_id = item.strip().rpartition(':')
+            devices.append((port, int(node_id), ''))
+    bind = parse_address(args.bind)
+    if not args.token and bind[0] not in ('127.0.0.1', 'localhost', '::1'):
+        logger.warning(f'监听{bind[0]}且未设置口令，网络上的任何主机都可以运行测试计划')
+    agent = FarmAgent(args.name, devices, bind, DeviceInventory(args.inventory),
+                      scripts=list_scripts(script_dirs), token=args.token)
+    agent.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
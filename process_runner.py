@@ -0,0 +1,143 @@
+import importlib
+import logging
+import multiprocessing
+import os
+import queue
+import time
+from logging.handlers import QueueHandler
+from device_runner import CONTROL_POLL_INTERVAL, DeviceRunner
+from run_control import CONTROL
+from transport_pool import TRANSPORTS
+
+JOIN_TIMEOUT = 10  # 秒，结束时等待子进程退出的时间，超时后强制结束
+
+logger = logging.getLogger(__name__)
+
+
+def shard_devices(devices, processes):
+    """
+    把(端口, 节点ID)分成最多processes组：同一端口（PCAN通道只能被一个进程打开）的节点在同一组，
+    按节点数从多到少依次分给当前节点最少的组
+    """
+    by_port = {}
+    for port, node_id in devices:
+        by_port.setdefault(port, []).append((port, node_id))
+    shards = [[] for _ in range(min(processes, len(by_port)))]
+    for group in sorted(by_port.values(), key=len, reverse=True):
+        min(shards, key=len).extend(group)
+    return shards
+
+
+class _LogForwarder(QueueHandler):
+    """子进程中把测试脚本的日志记录放入结果队列，由主进程的日志记录器输出"""
+
+    def enqueue(self, record):
+        self.queue.put(('log', record))
+
+
+def _close_handlers(log):
+    """移除日志记录器原有的处理器，子进程导入脚本时创建的空日志文件一并删除"""
+    for handler in list(log.handlers):
+        log.removeHandler(handler)
+        handler.close()
+        path = getattr(handler, 'baseFilename', None)
+        if path and os.path.exists(path) and os.path.getsize(path) == 0:
+            os.remove(path)
+
+
+def _work(index, module_name, devices, end_time, start_rounds, stop_event, resume_event, results):
+    """子进程入口：导入测试脚本模块，用自己的传输会话和DeviceRunner运行分到的设备，结果经results传回"""
+    try:
+        module = importlib.import_module(module_name)
+        CONTROL.use_events(stop_event, resume_event)
+        log = getattr(module, 'logger', logger)
+        _close_handlers(log)
+        log.addHandler(_LogForwarder(results))
+        # 测试脚本中的等待和命令使用共享事件，停止立即生效；DeviceRunner使用自己的事件并按CONTROL.state()同步，
+        # 本进程的设备全部结束时只停止本进程，不影响其他子进程
+        runner = DeviceRunner(module.create_test, module.run_port_round, read_control=CONTROL.state,
+                              should_retire=getattr(module, 'should_retire', None), log=log)
+        for record in runner.run(devices, end_time, start_rounds):
+            results.put(('round', record))
+    except BaseException as e:
+        results.put(('error', f'{type(e).__name__}: {e}'))
+    finally:
+        # 子进程不执行atexit，显式关闭本进程打开的通道
+        TRANSPORTS.close_all()
+        results.put(('done', index))
+
+
+class ProcessRunner:
+    """
+    多进程运行模式：把设备按端口分给processes个子进程，每个子进程导入测试脚本模块（需提供create_test、
+    run_port_round，可选should_retire和logger），用自己的传输会话和DeviceRunner运行分到的设备，
+    协议解析、轮询和日志格式化不再与界面和其他通道争用同一个GIL。
+    各轮结果（DeviceRound）和日志记录经进程间队列回到主进程，run()与DeviceRunner.run()一样按完成顺序产出，
+    日志由主进程的log输出（写入原日志文件和界面）。control(RunControl)改用进程间事件，
+    界面的停止/暂停同时作用于所有子进程。
+
+        runner = ProcessRunner('aging_test_can_v2', processes=4, control=CONTROL, log=logger)
+        for record in runner.run(zip(ports, node_ids), end_time):
+            sink.add(record)
+    """
+
+    def __init__(self, module_name, processes=None, control=CONTROL, log=logger):
+        self.module_name = module_name
+        self.processes = processes or os.cpu_count() or 1
+        self.control = control
+        self.log = log
+        # spawn：Windows上唯一可用的方式，也避免fork时复制界面和会话接收线程的状态
+        self.context = multiprocessing.get_context('spawn')
+
+    def run(self, devices, end_time, start_rounds=None):
+        """
+        启动子进程直到end_time(time.time())或停止，按完成顺序逐个产出DeviceRound；生成器结束时停止并等待所有子进程。
+        start_rounds同DeviceRunner.run()
+        """
+        shards = shard_devices(devices, self.processes)
+        for port in {port for shard in shards for port, _ in shard}:
+            # 关闭本进程会话池中未借用的通道，由子进程打开
+            TRANSPORTS.discard(port)
+        self.control.use_events(self.context.Event(), self.context.Event())
+        results = self.context.Queue()
+        workers = [
+            self.context.Process(target=_work, daemon=True, args=(
+                index, self.module_name, shard, end_time, start_rounds, self.control.stop_event, self.control.resume_event, results))
+            for index, shard in enumerate(shards)
+        ]
+        for worker in workers:
+            worker.start()
+        running = set(range(len(workers)))
+        try:
+            while running:
+                try:
+                    kind, payload = results.get(timeout=CONTROL_POLL_INTERVAL)
+                except queue.Empty:
+                    for index in [index for index in running if not workers[index].is_alive()]:
+                        self.log.error(f'测试进程{index}异常退出，退出码{workers[index].exitcode}')
+                        running.discard(index)
+                    continue
+                if kind == 'round':
+                    yield payload
+                elif kind == 'log':
+                    self.log.handle(payload)
+                elif kind == 'error':
+                    self.log.error(f'测试进程异常: {payload}')
+                elif kind == 'done':
+                    running.discard(payload)
+        finally:
+            self.control.stop()
+            # 等待期间继续读取队列：子进程退出前需写完已放入队列的数据
+            deadline = time.monotonic() + JOIN_TIMEOUT
+            while any(worker.is_alive() for worker in workers) and time.monotonic() < deadline:
+                try:
+                    kind, payload = results.get(timeout=CONTROL_POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+                if kind == 'log':
+                    self.log.handle(payload)
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+                worker.join()
+            results.close()
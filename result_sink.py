@@ -0,0 +1,216 @@
+import json
+import os
+from current_sampler import MotorStats
+
+RESULT_PASS = '通过'
+RESULT_FAIL = '不通过'
+
+
+class PortAggregate:
+    """
+    单个端口的滚动汇总：轮次数、手势通过/不通过次数、连接失败次数、最近一次失败的手势结果，
+    以及手势结果content为电流列表时各电机电流的流式统计。大小与测试时长无关
+    """
+
+    __slots__ = ("port", "node_id", "rounds", "failed_rounds", "disconnects", "passed", "failed",
+                 "first_timestamp", "last_timestamp", "last_failure", "currents", "last_round")
+
+    def __init__(self, port, node_id=None):
+        self.port = port
+        self.node_id = node_id
+        self.rounds = 0
+        self.failed_rounds = 0
+        self.disconnects = 0
+        self.passed = 0  # 通过的手势数
+        self.failed = 0  # 不通过的手势数
+        self.first_timestamp = None
+        self.last_timestamp = None
+        self.last_failure = None  # 最近一次不通过的手势结果字典
+        self.currents = []  # 各电机的MotorStats
+        self.last_round = 0  # 已记录的最大轮次编号，继续测试时从下一轮开始编号
+
+    def add(self, port_result, round_num=0):
+        """计入一轮的端口结果字典，返回本轮结果（通过/不通过）"""
+        self.rounds += 1
+        self.last_round = max(self.last_round, round_num)
+        result = RESULT_PASS
+        for gesture in port_result['gestures']:
+            timestamp = gesture.get('timestamp')
+            if self.first_timestamp is None:
+                self.first_timestamp = timestamp
+            self.last_timestamp = timestamp
+            if gesture['result'] == RESULT_PASS:
+                self.passed += 1
+            else:
+                self.failed += 1
+                self.last_failure = gesture
+                result = RESULT_FAIL
+            content = gesture.get('content')
+            if isinstance(content, (list, tuple)):
+                if len(self.currents) < len(content):
+                    self.currents.extend(MotorStats() for _ in range(len(content) - len(self.currents)))
+                for stats, value in zip(self.currents, content):
+                    stats.add(value if isinstance(value, (int, float)) else None)
+        if result != RESULT_PASS:
+            self.failed_rounds += 1
+        return result
+
+    def port_result(self):
+        """
+        返回与原overall_result元素格式相同的端口结果字典：一条汇总手势结果，有失败时再附最近一次失败，
+        供界面判断端口结果和生成报告
+        """
+        comment = f'手势通过{self.passed}次，不通过{self.failed}次'
+        if self.disconnects:
+            comment += f'，连接失败{self.disconnects}次'
+        summary = {
+            "timestamp": f'{self.first_timestamp} ~ {self.last_timestamp}' if self.first_timestamp else '',
+            "description": f'共{self.rounds}轮测试汇总（不通过{self.failed_rounds}轮）',
+            "expected": '',
+            "content": [round(stats.mean, 1) if stats.count else None for stats in self.currents] if self.currents else '',
+            "result": RESULT_PASS if self.failed == 0 else RESULT_FAIL,
+            "comment": comment,
+        }
+        gestures = [summary]
+        if self.last_failure is not None:
+            gestures.append(dict(self.last_failure, comment=f"最近一次失败：{self.last_failure['comment']}"))
+        return {'port': self.port, 'gestures': gestures}
+
+    def to_dict(self):
+        state = {name: getattr(self, name) for name in self.__slots__ if name != "currents"}
+        state["currents"] = [stats.to_dict() for stats in self.currents]
+        return state
+
+    @classmethod
+    def from_dict(cls, state):
+        aggregate = cls(state["port"], state["node_id"])
+        for name in cls.__slots__:
+            if name != "currents":
+                setattr(aggregate, name, state[name])
+        aggregate.currents = [MotorStats.from_dict(stats) for stats in state["currents"]]
+        return aggregate
+
+
+class ResultSink:
+    """
+    多轮测试结果的流式记录：每轮结果（DeviceRound）立即以一行JSON追加写入path并刷新，
+    内存中只保留各端口的PortAggregate，长时间老化测试的内存占用不随轮次增长。
+
+        with ResultSink('./log/AgingTest_results_xxx.jsonl') as sink:
+            for record in runner.run(devices, end_time):
+                result = sink.add(record)
+            overall_result = sink.results()
+
+    完整的逐轮结果用read_results(path)读回。传入store(ResultStore)时每轮结果同时按列追加到store，
+    供测试结束后按端口统计电流、位置和变化趋势。
+    state()返回汇总和文件位置，写入检查点；resume(state)从检查点恢复，检查点之后写入文件的轮次重新计入汇总
+    """
+
+    def __init__(self, path, store=None):
+        self.path = path
+        self.store = store
+        self.file = open(path, 'a', encoding='utf-8')
+        self.ports = {}  # 端口 -> PortAggregate，按首次出现的顺序
+
+    def add(self, record):
+        """写入一轮结果并更新汇总，返回本轮结果（通过/不通过），未连接的轮次返回None"""
+        self.file.write(json.dumps({
+            'port': record.port,
+            'node_id': record.node_id,
+            'round': record.round_num,
+            'connected': record.connected,
+            'gestures': record.port_result['gestures'],
+        }, ensure_ascii=False) + '\n')
+        self.file.flush()
+        return self._aggregate(record.port, record.node_id, record.round_num, record.connected, record.port_result)
+
+    def _aggregate(self, port, node_id, round_num, connected, port_result):
+        aggregate = self.ports.get(port)
+        if aggregate is None:
+            aggregate = self.ports[port] = PortAggregate(port, node_id)
+        if not connected:
+            aggregate.disconnects += 1
+            return None
+        if self.store is not None:
+            self.store.append_port_result(round_num, port_result)
+        return aggregate.add(port_result, round_num)
+
+    def last_rounds(self):
+        """{端口: 已记录的最大轮次编号}，继续测试时传给DeviceRunner.run(start_rounds=...)"""
+        return {port: aggregate.last_round for port, aggregate in self.ports.items()}
+
+    def state(self):
+        """检查点状态：文件路径、已同步到磁盘的文件长度和各端口汇总"""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return {
+            'path': self.path,
+            'offset': self.file.tell(),
+            'ports': [aggregate.to_dict() for aggregate in self.ports.values()],
+        }
+
+    @classmethod
+    def resume(cls, state, store=None):
+        """
+        从state()恢复并继续追加写入原文件：检查点之后写入的完整行重新计入汇总，末尾未写完整的行被截去。
+        传入store时从头逐行读取文件重建store
+        """
+        sink = cls.__new__(cls)
+        sink.path = state['path']
+        sink.store = None
+        sink.ports = {aggregate['port']: PortAggregate.from_dict(aggregate) for aggregate in state['ports']}
+        if not os.path.exists(sink.path):
+            open(sink.path, 'w').close()
+        with open(sink.path, 'rb+') as file:
+            # 文件比检查点记录的短（如磁盘缓存丢失）时从实际末尾继续
+            offset = min(state['offset'], os.fstat(file.fileno()).st_size)
+            if store is not None:
+                # 逐行读取，结果文件可达数GB，不一次读入内存
+                position = 0
+                for line in file:
+                    position += len(line)
+                    if position > offset:
+                        break
+                    record = json.loads(line)
+                    if record['connected']:
+                        store.append_port_result(record['round'], {'port': record['port'], 'gestures': record['gestures']})
+            file.seek(offset)
+            sink.store = store
+            end = offset
+            for line in file:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                sink._aggregate(record['port'], record['node_id'], record['round'], record['connected'],
+                                {'port': record['port'], 'gestures': record['gestures']})
+                end += len(line)
+            file.truncate(end)
+        sink.file = open(sink.path, 'a', encoding='utf-8')
+        return sink
+
+    def results(self):
+        """各端口的汇总结果列表，格式与原overall_result相同"""
+        return [aggregate.port_result() for aggregate in self.ports.values()]
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def read_results(path):
+    """逐行读回ResultSink写入的结果，产出{'port', 'node_id', 'round', 'connected', 'gestures'}；跳过未写完整的末行"""
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
@@ -0,0 +1,222 @@
+import math
+import operator
+import time
+from array import array
+from itertools import compress
+from OHandSerialAPI import MAX_MOTOR_CNT
+
+RESULT_PASS = '通过'
+RESULT_FAIL = '不通过'
+NO_POSITION = -1  # 位置列中未读到的值
+
+
+class CodeTable:
+    """字符串与小整数编码的双向表，手势名称、备注等重复的字符串每种只保存一份"""
+
+    __slots__ = ("values", "codes")
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __getitem__(self, code):
+        return self.values[code]
+
+    def __len__(self):
+        return len(self.values)
+
+
+class PortColumns:
+    """
+    单个端口的结果列：每行一个手势结果，各列为array缓冲区。电流、位置列按行依次存放MAX_MOTOR_CNT个值，
+    电机k的一列为currents[k::MAX_MOTOR_CNT]。读取失败的电流在current_valid中为0。
+    降采样后只保存每stride轮中的一轮，failures仍为全部轮次的不通过行数
+    """
+
+    __slots__ = ("rounds", "times", "gestures", "passed", "comments", "currents", "current_valid", "positions",
+                 "stride", "offered", "failed_total")
+
+    ROW_COLUMNS = ("rounds", "times", "gestures", "passed", "comments")
+    MOTOR_COLUMNS = ("currents", "current_valid", "positions")  # 每行MAX_MOTOR_CNT个值
+
+    def __init__(self):
+        self.rounds = array('I')
+        self.times = array('d')  # time.time()
+        self.gestures = array('B')  # 手势编号：该手势在一轮测试中的序号
+        self.passed = array('B')  # 1通过，0不通过
+        self.comments = array('H')  # ResultStore.comments中的编码
+        self.currents = array('f')  # mA
+        self.current_valid = array('B')
+        self.positions = array('i')
+        self.stride = 1  # 每stride轮保存一轮
+        self.offered = 0  # append_port_result()收到的轮次数，包括未保存的轮次
+        self.failed_total = 0  # 不通过的行数，包括未保存的轮次
+
+    def __len__(self):
+        return len(self.rounds)
+
+    @property
+    def nbytes(self):
+        return sum(column.itemsize * len(column) for column in (
+            self.rounds, self.times, self.gestures, self.passed, self.comments,
+            self.currents, self.current_valid, self.positions))
+
+    @property
+    def failures(self):
+        """不通过的行数，降采样时包括未保存的行"""
+        return self.failed_total
+
+    def decimate(self):
+        """保存的轮次减半：保留第0、2、4...个保存的轮次，stride加倍，之后按新的stride继续采样"""
+        keep = []
+        index = -1
+        previous = None
+        for round_num in self.rounds:
+            if round_num != previous:
+                index += 1
+                previous = round_num
+            keep.append(index % 2 == 0)
+        keep_motors = [flag for flag in keep for _ in range(MAX_MOTOR_CNT)]
+        for name in self.ROW_COLUMNS:
+            column = getattr(self, name)
+            setattr(self, name, array(column.typecode, compress(column, keep)))
+        for name in self.MOTOR_COLUMNS:
+            column = getattr(self, name)
+            setattr(self, name, array(column.typecode, compress(column, keep_motors)))
+        self.stride *= 2
+
+    def failed_rows(self):
+        """保存的行中不通过的行号"""
+        return list(compress(range(len(self.passed)), map(operator.not_, self.passed)))
+
+    def failed_rounds(self):
+        """保存的轮次中出现不通过的轮次，升序"""
+        return sorted(set(compress(self.rounds, map(operator.not_, self.passed))))
+
+    def motor_currents(self, motor):
+        """电机motor各行的有效电流值"""
+        return array('f', compress(self.currents[motor::MAX_MOTOR_CNT], self.current_valid[motor::MAX_MOTOR_CNT]))
+
+    def motor_positions(self, motor):
+        """电机motor各行的位置，未读到为NO_POSITION"""
+        return self.positions[motor::MAX_MOTOR_CNT]
+
+    def current_summary(self, motor):
+        """电机motor电流的{'mean', 'min', 'max', 'count'}，无有效值时均为None（count为0）"""
+        values = self.motor_currents(motor)
+        if not values:
+            return {'mean': None, 'min': None, 'max': None, 'count': 0}
+        return {'mean': math.fsum(values) / len(values), 'min': min(values), 'max': max(values), 'count': len(values)}
+
+    def current_trend(self, motor, window):
+        """电机motor电流按每window个保存的有效值分段的均值，用于观察老化过程中电流的变化趋势；降采样后每段对应window*stride轮"""
+        values = self.motor_currents(motor)
+        return [math.fsum(values[start:start + window]) / len(values[start:start + window])
+                for start in range(0, len(values), window)]
+
+
+class ResultStore:
+    """
+    按列存放的测试结果：每个端口一组PortColumns，手势记为在一轮中的序号，备注编码为小整数，结果为通过标志位，
+    电流和位置为定长数值，每行约70字节（对比每个手势结果一个字典的数百字节）。
+    按端口取数据不需遍历其他端口的行，统计通过array切片、compress和内置的sum/min/max/count完成，
+    不需要逐行的Python循环。
+    max_rows_per_port限制每个端口保存的行数：达到上限时该端口保存的轮次减半、采样间隔加倍（整轮保留或舍弃），
+    长时间测试的内存不随时长增长，保存的轮次始终均匀覆盖整个测试过程。
+
+        store = ResultStore(max_rows_per_port=10000)
+        store.append_port_result(round_num, port_result)
+        columns = store.port(port)
+        columns.failures, columns.current_summary(0), columns.current_trend(0, window=100)
+    """
+
+    def __init__(self, max_rows_per_port=None):
+        self.max_rows_per_port = max_rows_per_port
+        self.ports = CodeTable()
+        self.comments = CodeTable()
+        self.columns = []  # 按端口编码索引的PortColumns
+
+    def __len__(self):
+        return sum(len(columns) for columns in self.columns)
+
+    @property
+    def nbytes(self):
+        """各列缓冲区占用的字节数"""
+        return sum(columns.nbytes for columns in self.columns)
+
+    def port(self, port):
+        """端口port的PortColumns，未记录过的端口返回空的PortColumns"""
+        code = self.ports.codes.get(port)
+        return self.columns[code] if code is not None else PortColumns()
+
+    def _port_columns(self, port):
+        code = self.ports.code(port)
+        if code == len(self.columns):
+            self.columns.append(PortColumns())
+        return self.columns[code]
+
+    def append(self, round_num, port, gesture_id, passed, currents=None, positions=None, comment='无', timestamp=None):
+        """
+        追加一行结果：gesture_id为手势在一轮中的序号，currents/positions为各电机的值（缺少或为None的电机记为无效），
+        timestamp为time.time()，默认取当前时间。直接追加的行不参与降采样
+        """
+        columns = self._port_columns(port)
+        columns.rounds.append(round_num)
+        columns.times.append(time.time() if timestamp is None else timestamp)
+        columns.gestures.append(gesture_id)
+        columns.passed.append(1 if passed else 0)
+        columns.failed_total += not passed
+        columns.comments.append(self.comments.code(comment))
+        for motor in range(MAX_MOTOR_CNT):
+            value = currents[motor] if currents is not None and motor < len(currents) else None
+            valid = isinstance(value, (int, float))
+            columns.currents.append(value if valid else 0.0)
+            columns.current_valid.append(valid)
+            value = positions[motor] if positions is not None and motor < len(positions) else None
+            columns.positions.append(value if isinstance(value, int) else NO_POSITION)
+
+    def append_port_result(self, round_num, port_result):
+        """
+        按测试脚本的端口结果字典追加一轮：手势按在gestures中的序号记录，content为电流列表时记为电流，
+        positions键（若有）记为位置。降采样时不保存的轮次只计入不通过的行数
+        """
+        columns = self._port_columns(port_result['port'])
+        columns.offered += 1
+        if (columns.offered - 1) % columns.stride:
+            columns.failed_total += sum(gesture['result'] != RESULT_PASS for gesture in port_result['gestures'])
+            return
+        for gesture_id, gesture in enumerate(port_result['gestures']):
+            content = gesture.get('content')
+            self.append(round_num, port_result['port'], gesture_id, gesture['result'] == RESULT_PASS,
+                        currents=content if isinstance(content, (list, tuple)) else None,
+                        positions=gesture.get('positions'), comment=gesture.get('comment', '无'))
+        if self.max_rows_per_port is not None and len(columns) >= self.max_rows_per_port:
+            columns.decimate()
+
+    def port_results(self):
+        """各端口的结果（通过/不通过），格式同界面的get_test_result"""
+        return {port: RESULT_PASS if columns.failures == 0 else RESULT_FAIL
+                for port, columns in zip(self.ports.values, self.columns)}
+
+    def summary(self):
+        """
+        各端口的{'rows', 'stride', 'failures', 'failed_rounds', 'currents': 各电机current_summary}，
+        rows为保存的行数，降采样后rows、failed_rounds和电流统计只包含保存的轮次
+        """
+        return {
+            port: {
+                'rows': len(columns),
+                'stride': columns.stride,
+                'failures': columns.failures,
+                'failed_rounds': len(columns.failed_rounds()),
+                'currents': [columns.current_summary(motor) for motor in range(MAX_MOTOR_CNT)],
+            }
+            for port, columns in zip(self.ports.values, self.columns)
+        }
@@ -0,0 +1,93 @@
+import threading
+
+
+class StopRequested(BaseException):
+    """
+    测试已停止：由RunControl.checkpoint()/sleep()抛出，中断正在执行的手势和等待。
+    与KeyboardInterrupt一样继承BaseException，不会被测试脚本中的except Exception当作测试失败记录
+    """
+
+
+class RunControl:
+    """
+    进程内的测试停止/暂停控制，代替界面写shared_data.json、脚本每轮读文件的方式。
+    界面调用start()/stop()/pause()/resume()，测试脚本在每条命令前调用checkpoint()，
+    所有等待使用sleep()/delay_ms()，因此停止在当前命令返回后立即生效，
+    暂停阻塞在事件上，不读文件也不轮询。
+
+        CONTROL.checkpoint()                    # 停止时抛出StopRequested，暂停时阻塞到恢复
+        CONTROL.delay_ms(self.DELAY_MS)         # 代替delay_milli_seconds_impl，停止时立即抛出StopRequested
+        api.HAND_SetTimerFunction(get_milli_seconds_impl, CONTROL.delay_ms)  # 使HAND_WaitUntil*的轮询也可被停止
+    """
+
+    def __init__(self):
+        self.stop_event = threading.Event()
+        self.resume_event = threading.Event()  # 清除表示暂停
+        self.resume_event.set()
+        self.resumable = False  # 停止为中断（如关闭界面）而非结束测试，测试脚本保留检查点供下次继续
+
+    def use_events(self, stop_event, resume_event):
+        """
+        改用给定的事件对象（接口与threading.Event相同，如multiprocessing的Event），保留当前的停止/暂停状态。
+        主进程和各测试子进程的RunControl使用同一组进程间事件，界面的停止/暂停即对所有子进程生效
+        """
+        if self.stop_event.is_set():
+            stop_event.set()
+        else:
+            stop_event.clear()
+        if self.resume_event.is_set():
+            resume_event.set()
+        else:
+            resume_event.clear()
+        self.stop_event = stop_event
+        self.resume_event = resume_event
+
+    def start(self):
+        """开始新的测试前复位停止和暂停标志"""
+        self.stop_event.clear()
+        self.resume_event.set()
+        self.resumable = False
+
+    def stop(self, resumable=False):
+        """停止测试；resumable=True表示中断，下次可从检查点继续"""
+        self.resumable = self.resumable or resumable
+        self.stop_event.set()
+        self.resume_event.set()  # 唤醒暂停中的等待者，使其看到停止
+
+    def pause(self):
+        if not self.stop_event.is_set():
+            self.resume_event.clear()
+
+    def resume(self):
+        self.resume_event.set()
+
+    @property
+    def stopped(self):
+        return self.stop_event.is_set()
+
+    @property
+    def paused(self):
+        return not self.resume_event.is_set()
+
+    def state(self):
+        """返回(stop_test, pause_test)，与原read_from_json_file()相同"""
+        return self.stopped, self.paused
+
+    def checkpoint(self):
+        """命令之间调用：暂停时阻塞到恢复或停止，停止时抛出StopRequested"""
+        self.resume_event.wait()
+        if self.stop_event.is_set():
+            raise StopRequested()
+
+    def sleep(self, seconds):
+        """可被停止打断的等待，停止时抛出StopRequested；暂停不影响正在进行的等待"""
+        if self.stop_event.wait(seconds):
+            raise StopRequested()
+
+    def delay_ms(self, ms):
+        """与delay_milli_seconds_impl接口相同的可打断等待"""
+        self.sleep(ms / 1000.0)
+
+
+# 进程内唯一的测试控制，界面和测试脚本共用
+CONTROL = RunControl()
@@ -1,5 +1,10 @@
+import functools
+import inspect
 import struct
+import sys
+import threading
 import time
+from array import array
 from typing import Any
 
 MAX_MOTOR_CNT = 6
@@ -10,6 +15,24 @@ MAX_FORCE_ENTRIES = 5 * 12
 HAND_PROTOCOL_UART = 0
 HAND_PROTOCOL_I2C = 1
 
+# Receive modes
+RECV_MODE_POLL = 0  # HAND_GetResponse polls recv_data_impl itself
+RECV_MODE_EVENT = 1  # a background receiver feeds HAND_OnBytes and wakes HAND_GetResponse
+
+# Adaptive response timeouts in ms, see HAND_SetAdaptiveTimeout() and HAND_SetProbeTimeout()
+RTO_FLOOR = 10
+RTO_CEILING = 255
+PROBE_TIMEOUT = 20
+
+# Motion completion, see HAND_WaitUntilSettled()
+SETTLE_POLL_INTERVAL = 20  # ms between position polls
+SETTLE_STILL = 32  # max position change over SETTLE_SAMPLES polls of a motor that has stopped
+SETTLE_SAMPLES = 2
+
+# Readiness after reset, calibration or StartInit, see HAND_WaitUntilReady()
+READY_POLL_INTERVAL = 100  # ms between probes
+READY_PROBE_TIMEOUT = 50  # ms, response timeout of one probe
+
 # Error codes
 ERR_PROTOCOL_WRONG_LRC = 0x01
 ERR_COMMAND_INVALID = 0x11
@@ -20,6 +43,7 @@ ERR_STATUS_CALI = 0x22
 ERR_STATUS_STUCK = 0x23
 ERR_OP_FAILED = 0x31
 ERR_SAVE_FAILED = 0x32
+NOT_READY_STATUS = (ERR_STATUS_INIT, ERR_STATUS_CALI)  # remote errors of a hand that is still initializing or calibrating
 
 
 # API return values
@@ -113,6 +137,7 @@ HAND_CMD_SET_SPEED_CTRL_PARAMS = 0x66  # Set speed control parameters
 CMD_ERROR_MASK = 1 << 7  # bit mask for command error
 
 MAX_PROTOCOL_DATA_SIZE = 64
+PROTOCOL_HEADER = b"\x55\xAA"  # UART frame header, I2C frames have no header
 
 # Data type
 UINT8_T = 0
@@ -121,6 +146,24 @@ UINT16_T = 2
 INT16_T = 3
 
 
+def protocol_lrc(data):
+    # XOR of all bytes. Short frames are cheapest with a plain loop, longer ones are folded as one integer
+    if len(data) <= 16:
+        lrc = 0
+        for byte in data:
+            lrc ^= byte
+        return lrc
+    x = int.from_bytes(data, "little")
+    x ^= x >> 512
+    x ^= x >> 256
+    x ^= x >> 128
+    x ^= x >> 64
+    x ^= x >> 32
+    x ^= x >> 16
+    x ^= x >> 8
+    return x & 0xFF
+
+
 def match_data_type(data, type):
     if type == UINT8_T:
         return 0x00 <= data <= 0xFF
@@ -145,6 +188,320 @@ def match_list_type(data, type):
         return False
 
 
+FRAME_HEADER = struct.Struct("<BBBBBB")  # 0x55, 0xAA, addr, master, cmd, nb_data
+
+# Sentinel response layout of commands whose response length depends on the motor count
+VARIABLE = "*"
+
+
+@functools.lru_cache(maxsize=None)
+def array_struct(item_format, count):
+    # Precompiled little-endian layout of count repeated items, e.g. array_struct("HB", 6) for 6 x (pos, speed)
+    return struct.Struct("<" + item_format * count)
+
+
+class CommandCodec:
+    """Request and response layout of one HAND_CMD_*, as little-endian struct formats."""
+
+    __slots__ = ("cmd", "request", "response", "response_size")
+
+    def __init__(self, cmd, request="", response=None):
+        self.cmd = cmd
+        self.request = None if request is VARIABLE else struct.Struct(request if request[:1] in "<>" else "<" + request)
+        if response is None or response is VARIABLE:
+            self.response = response
+            self.response_size = MAX_PROTOCOL_DATA_SIZE
+        else:
+            self.response = struct.Struct(response if response[:1] in "<>" else "<" + response)
+            self.response_size = self.response.size
+
+
+# Integer fields are range checked by struct itself: B/b are uint8/int8, H/h are uint16/int16
+COMMAND_CODECS = {
+    codec.cmd: codec
+    for codec in (
+        # Chief GET commands
+        CommandCodec(HAND_CMD_GET_PROTOCOL_VERSION, "", "BB"),  # minor, major
+        CommandCodec(HAND_CMD_GET_FW_VERSION, "", "HBB"),  # revision, minor, major
+        CommandCodec(HAND_CMD_GET_HW_VERSION, "", ">BBH"),  # hw_type, hw_ver, boot_version
+        CommandCodec(HAND_CMD_GET_CALI_DATA, "", VARIABLE),  # motor_cnt, thumb_root_pos_cnt, end_pos[], start_pos[], thumb_root_pos[]
+        CommandCodec(HAND_CMD_GET_FINGER_PID, "B", "Bffff"),  # finger_id, p, i, d, g
+        CommandCodec(HAND_CMD_GET_FINGER_CURRENT_LIMIT, "B", "BH"),  # finger_id, current_limit
+        CommandCodec(HAND_CMD_GET_FINGER_CURRENT, "B", "BH"),  # finger_id, current
+        CommandCodec(HAND_CMD_GET_FINGER_FORCE_TARGET, "B", "BH"),  # finger_id, force_target
+        CommandCodec(HAND_CMD_GET_FINGER_FORCE, "B", VARIABLE),  # finger_id, force_entry_cnt, force[]
+        CommandCodec(HAND_CMD_GET_FINGER_POS_LIMIT, "B", "BHH"),  # finger_id, low_limit, high_limit
+        CommandCodec(HAND_CMD_GET_FINGER_POS_ABS, "B", "BHH"),  # finger_id, target_pos, current_pos
+        CommandCodec(HAND_CMD_GET_FINGER_POS, "B", "BHH"),  # finger_id, target_pos, current_pos
+        CommandCodec(HAND_CMD_GET_FINGER_ANGLE, "B", "Bhh"),  # finger_id, target_angle, current_angle
+        CommandCodec(HAND_CMD_GET_THUMB_ROOT_POS, "", "HB"),  # raw_encoder, pos
+        CommandCodec(HAND_CMD_GET_FINGER_POS_ABS_ALL, "", VARIABLE),  # target_pos[], current_pos[]
+        CommandCodec(HAND_CMD_GET_FINGER_POS_ALL, "", VARIABLE),  # target_pos[], current_pos[]
+        CommandCodec(HAND_CMD_GET_FINGER_ANGLE_ALL, "", VARIABLE),  # target_angle[], current_angle[]
+        CommandCodec(HAND_CMD_GET_FINGER_STOP_PARAMS, "B", "BHHHH"),  # finger_id, speed, stop_current, stop_after_period, retry_interval
+        CommandCodec(HAND_CMD_GET_FINGER_FORCE_PID, "B", "Bffff"),  # finger_id, p, i, d, g
+        # Auxiliary GET commands
+        CommandCodec(HAND_CMD_GET_SELF_TEST_LEVEL, "", "B"),
+        CommandCodec(HAND_CMD_GET_BEEP_SWITCH, "", "B"),
+        CommandCodec(HAND_CMD_GET_BUTTON_PRESSED_CNT, "", "B"),
+        CommandCodec(HAND_CMD_GET_UID, "", "III"),
+        CommandCodec(HAND_CMD_GET_BATTERY_VOLTAGE, "", "H"),
+        CommandCodec(HAND_CMD_GET_USAGE_STAT, "B", VARIABLE),  # total_use_time, total_open_times[]
+        CommandCodec(HAND_CMD_GET_SPEED_CTRL_PARAMS, "", "HHf"),  # brake_distance, accel_distance, speed_ratio
+        CommandCodec(HAND_CMD_GET_MANUFACTURE_DATA, "", "BB16s8s"),  # sub_model, hw_revision, serial_number, customer_tag
+        # Chief SET commands
+        CommandCodec(HAND_CMD_RESET, "B"),  # mode
+        CommandCodec(HAND_CMD_POWER_OFF),
+        CommandCodec(HAND_CMD_SET_NODE_ID, "B"),  # new_id
+        CommandCodec(HAND_CMD_CALIBRATE, "H"),  # key
+        CommandCodec(HAND_CMD_SET_CALI_DATA, VARIABLE),  # motor_cnt, end_pos[], start_pos[], thumb_root_pos_cnt, thumb_root_pos[]
+        CommandCodec(HAND_CMD_SET_FINGER_PID, "Bffff"),  # finger_id, p, i, d, g
+        CommandCodec(HAND_CMD_SET_FINGER_CURRENT_LIMIT, "BH"),  # finger_id, current_limit
+        CommandCodec(HAND_CMD_SET_FINGER_FORCE_TARGET, "BH"),  # finger_id, force_limit
+        CommandCodec(HAND_CMD_SET_FINGER_POS_LIMIT, "BHH"),  # finger_id, pos_limit_low, pos_limit_high
+        CommandCodec(HAND_CMD_FINGER_START, "B"),  # finger_id_bits
+        CommandCodec(HAND_CMD_FINGER_STOP, "B"),  # finger_id_bits
+        CommandCodec(HAND_CMD_SET_FINGER_POS_ABS, "BHB"),  # finger_id, raw_pos, speed
+        CommandCodec(HAND_CMD_SET_FINGER_POS, "BHB"),  # finger_id, pos, speed
+        CommandCodec(HAND_CMD_SET_FINGER_ANGLE, "BhB"),  # finger_id, angle, speed
+        CommandCodec(HAND_CMD_SET_THUMB_ROOT_POS, "BB"),  # pos, speed
+        CommandCodec(HAND_CMD_SET_FINGER_POS_ABS_ALL, VARIABLE),  # (raw_pos, speed) * motor_cnt
+        CommandCodec(HAND_CMD_SET_FINGER_POS_ALL, VARIABLE),  # (pos, speed) * motor_cnt
+        CommandCodec(HAND_CMD_SET_FINGER_ANGLE_ALL, VARIABLE),  # (angle, speed) * motor_cnt
+        CommandCodec(HAND_CMD_SET_FINGER_STOP_PARAMS, "BHHHH"),  # finger_id, speed, stop_current, stop_after_period, retry_interval
+        CommandCodec(HAND_CMD_SET_FINGER_FORCE_PID, "Bffff"),  # finger_id, p, i, d, g
+        CommandCodec(HAND_CMD_RESET_FORCE),
+        CommandCodec(HAND_CMD_SET_CUSTOM, VARIABLE, VARIABLE),  # sub_cmd, SET fields... -> GET fields...
+        # Auxiliary SET commands
+        CommandCodec(HAND_CMD_SET_SELF_TEST_LEVEL, "B"),
+        CommandCodec(HAND_CMD_SET_BEEP_SWITCH, "B"),
+        CommandCodec(HAND_CMD_BEEP, "H"),  # duration
+        CommandCodec(HAND_CMD_SET_BUTTON_PRESSED_CNT, "B"),
+        CommandCodec(HAND_CMD_START_INIT),
+        CommandCodec(HAND_CMD_SET_MANUFACTURE_DATA, "2sBB16s8s"),  # key, sub_model, hw_revision, serial_number, customer_tag
+        CommandCodec(HAND_CMD_SET_SPEED_CTRL_PARAMS, "HHf"),  # brake_distance, accel_distance, speed_ratio
+    )
+}
+
+
+def _set_command(cmd, *arg_names):
+    # Generate a SET wrapper HAND_Xxx(self, hand_id, *arg_names, remote_err) -> err from COMMAND_CODECS
+    params = [inspect.Parameter(name, inspect.Parameter.POSITIONAL_OR_KEYWORD) for name in ("self", "hand_id") + arg_names + ("remote_err",)]
+    signature = inspect.Signature(params)
+    nb_args = len(params)
+
+    def command(*args, **kwargs):
+        if kwargs or len(args) != nb_args:
+            args = signature.bind(*args, **kwargs).args  # Raises TypeError like a hand-written method
+        return args[0]._transact(args[1], cmd, args[2:-1], args[-1])[0]
+
+    command.__signature__ = signature
+    return command
+
+
+# HAND_CMD_SET_CUSTOM per-motor response fields in wire order, each present as motor_cnt items when its sub-command bit is set
+CUSTOM_GET_FIELDS = (
+    (SUB_CMD_GET_POS, "H", "pos"),
+    (SUB_CMD_GET_ANGLE, "h", "angle"),
+    (SUB_CMD_GET_CURRENT, "H", "current"),
+    (SUB_CMD_GET_FORCE, "H", "force"),
+    (SUB_CMD_GET_STATUS, "B", "status"),
+)
+CUSTOM_GET_MASK = SUB_CMD_GET_POS | SUB_CMD_GET_ANGLE | SUB_CMD_GET_CURRENT | SUB_CMD_GET_FORCE | SUB_CMD_GET_STATUS
+SNAPSHOT_FIELDS = SUB_CMD_GET_POS | SUB_CMD_GET_CURRENT | SUB_CMD_GET_FORCE | SUB_CMD_GET_STATUS
+
+
+@functools.lru_cache(maxsize=None)
+def custom_response_layout(fields, motor_cnt):
+    # Struct of a HAND_CMD_SET_CUSTOM response and the (attribute, start, end) of each field in the unpacked tuple
+    formats, slices, start = [], [], 0
+    for flag, item_format, name in CUSTOM_GET_FIELDS:
+        if fields & flag:
+            formats.append(item_format * motor_cnt)
+            slices.append((name, start, start + motor_cnt))
+            start += motor_cnt
+    return struct.Struct("<" + "".join(formats)), tuple(slices)
+
+
+class HandSnapshot:
+    """Per-motor telemetry read by HAND_GetSnapshot(), fields not requested are None."""
+
+    __slots__ = ("pos", "angle", "current", "force", "status")
+
+    def __init__(self, pos=None, angle=None, current=None, force=None, status=None):
+        self.pos = pos
+        self.angle = angle
+        self.current = current
+        self.force = force
+        self.status = status
+
+    def __repr__(self):
+        return "HandSnapshot(" + ", ".join(f"{name}={getattr(self, name)}" for name in self.__slots__) + ")"
+
+
+class PreparedCommand:
+    """A request validated, framed and LRC stamped once by HAND_PrepareCmd(), resent as is by HAND_SendPrepared()."""
+
+    __slots__ = ("addr", "cmd", "frame", "transport_data")
+
+    def __init__(self, addr, cmd, frame):
+        self.addr = addr
+        self.cmd = cmd
+        self.frame = bytes(frame)
+        self.transport_data = None  # Cached by send_prepared_impl, e.g. the frame split into CAN messages
+
+    def __repr__(self):
+        return f"PreparedCommand(addr={self.addr}, cmd=0x{self.cmd:02X}, frame={self.frame.hex()})"
+
+
+def command_class(cmd):
+    # 0: chief GET, 1: auxiliary GET, 2: chief SET, 3: auxiliary SET, following the HAND_CMD_* ranges
+    return cmd >> 5
+
+
+class RttEstimator:
+    """Smoothed round-trip time of one (node, command class) and the timeout derived from it, as in TCP (RFC 6298)."""
+
+    __slots__ = ("srtt", "rttvar", "rto", "samples", "timeouts")
+
+    def __init__(self, rto):
+        self.srtt = 0.0  # ms
+        self.rttvar = 0.0  # ms
+        self.rto = rto  # ms, timeout of the next request
+        self.samples = 0
+        self.timeouts = 0
+
+    def sample(self, rtt, floor, ceiling):
+        if self.samples == 0:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar += (abs(self.srtt - rtt) - self.rttvar) / 4
+            self.srtt += (rtt - self.srtt) / 8
+        self.samples += 1
+        self.rto = min(max(self.srtt + 4 * self.rttvar, floor), ceiling)
+
+    def backoff(self, ceiling):
+        # A missing response doubles the timeout until the next sample
+        self.timeouts += 1
+        self.rto = min(2 * self.rto, ceiling)
+
+    def __repr__(self):
+        return f"RttEstimator(srtt={self.srtt:.2f}, rttvar={self.rttvar:.2f}, rto={self.rto:.2f}, samples={self.samples}, timeouts={self.timeouts})"
+
+
+class HandResult:
+    """Base of the typed results returned by HAND_Read*(): err is the HAND_RESP_* status, fields are None unless it is HAND_RESP_SUCCESS."""
+
+    __slots__ = ("err",)
+    fields = ()
+
+    @property
+    def ok(self):
+        return self.err == HAND_RESP_SUCCESS
+
+    def __repr__(self):
+        return f"{type(self).__name__}(err={self.err}" + "".join(f", {name}={getattr(self, name)}" for name in self.fields) + ")"
+
+
+def result_type(name, *fields):
+    # A HandResult subclass whose fields follow the order of the COMMAND_CODECS response.
+    # __init__(err, values=None) is generated as one unpacking assignment, like collections.namedtuple does
+    namespace = {"missing": (None,) * len(fields)}
+    targets = ", ".join(f"self.{field}" for field in fields)
+    exec(f"def __init__(self, err, values=None):\n    self.err = err\n    {targets}, = missing if values is None else values\n", namespace)
+    return type(name, (HandResult,), {"__slots__": fields, "fields": fields, "__init__": namespace["__init__"]})
+
+
+ProtocolVersion = result_type("ProtocolVersion", "minor", "major")
+FirmwareVersion = result_type("FirmwareVersion", "revision", "minor", "major")
+HardwareVersion = result_type("HardwareVersion", "hw_type", "hw_ver", "boot_version")
+FingerPID = result_type("FingerPID", "finger_id", "p", "i", "d", "g")
+FingerCurrentLimit = result_type("FingerCurrentLimit", "finger_id", "current_limit")
+FingerCurrent = result_type("FingerCurrent", "finger_id", "current")
+FingerForceTarget = result_type("FingerForceTarget", "finger_id", "force_target")
+FingerPosLimit = result_type("FingerPosLimit", "finger_id", "low_limit", "high_limit")
+FingerPos = result_type("FingerPos", "finger_id", "target_pos", "current_pos")
+FingerAngle = result_type("FingerAngle", "finger_id", "target_angle", "current_angle")
+ThumbRootPos = result_type("ThumbRootPos", "raw_encoder", "pos")
+FingerStopParams = result_type("FingerStopParams", "finger_id", "speed", "stop_current", "stop_after_period", "retry_interval")
+SelfTestLevel = result_type("SelfTestLevel", "self_test_level")
+BeepSwitch = result_type("BeepSwitch", "beep_switch")
+ButtonPressedCnt = result_type("ButtonPressedCnt", "pressed_cnt")
+UID = result_type("UID", "uid_w0", "uid_w1", "uid_w2")
+BatteryVoltage = result_type("BatteryVoltage", "voltage")
+SpeedCtrlParams = result_type("SpeedCtrlParams", "brake_distance", "accel_distance", "speed_ratio")
+MotorArrays = result_type("MotorArrays", "target", "current")  # array("H") or array("h") of motor_cnt items each
+
+
+class SettleTracker:
+    """Feeds HAND_ReadFingerPosAll() results and tells when every motor is within tolerance of its target and stopped moving."""
+
+    __slots__ = ("targets", "tolerance", "still", "samples", "previous", "stable", "positions")
+
+    def __init__(self, targets=None, tolerance=0, still=SETTLE_STILL, samples=SETTLE_SAMPLES):
+        self.targets = targets  # per-motor target, None (or a None item) uses the target reported by the hand
+        self.tolerance = tolerance  # int or per-motor sequence
+        self.still = still
+        self.samples = samples
+        self.previous = None
+        self.stable = None  # consecutive polls each motor has been settled
+        self.positions = None  # current positions of the last successful poll
+
+    def update(self, result):
+        if not result.ok:
+            return False
+        current = result.current
+        motor_cnt = len(current)
+        if self.stable is None or len(self.stable) != motor_cnt:
+            self.stable = [0] * motor_cnt
+            self.previous = None
+        settled = True
+        for i in range(motor_cnt):
+            target = self.targets[i] if self.targets is not None and i < len(self.targets) else None
+            if target is None:
+                target = result.target[i]
+            tolerance = self.tolerance[i] if isinstance(self.tolerance, (list, tuple)) else self.tolerance
+            if abs(current[i] - target) > tolerance:
+                self.stable[i] = 0
+            elif self.previous is None or abs(current[i] - self.previous[i]) <= self.still:
+                self.stable[i] += 1
+            else:
+                self.stable[i] = 1
+            settled = settled and self.stable[i] >= self.samples
+        self.previous = self.positions = current
+        return settled
+
+
+def _read_command(cmd, result, per_finger=False):
+    # Generate a GET wrapper HAND_ReadXxx(self, hand_id[, finger_id], remote_err=None) -> result from COMMAND_CODECS
+    if per_finger:
+        def command(self, hand_id, finger_id, remote_err=None):
+            return result(*self._finger_transact(hand_id, cmd, finger_id, remote_err))
+    else:
+        def command(self, hand_id, remote_err=None):
+            return result(*self._transact(hand_id, cmd, (), remote_err))
+    return command
+
+
+def _read_all_command(cmd, item_format):
+    # Generate HAND_ReadXxxAll(self, hand_id, remote_err=None) -> MotorArrays, decoded straight from the response bytes
+    def command(self, hand_id, remote_err=None):
+        err, out = self._transact(hand_id, cmd, (), remote_err)
+        if err != HAND_RESP_SUCCESS:
+            return MotorArrays(err)
+        motor_cnt, remainder = divmod(len(out), 2 + 2)
+        if remainder or motor_cnt > MAX_MOTOR_CNT:
+            return MotorArrays(HAND_RESP_DATA_INVALID)
+        values = array(item_format)
+        values.frombytes(out)
+        if sys.byteorder == "big":
+            values.byteswap()
+        return MotorArrays(err, (values[:motor_cnt], values[motor_cnt:]))
+
+    return command
+
+
 class OHandSerialAPI:
     def __init__(self, private_data, protocol, address_master, send_data_impl, recv_data_impl=None):
         self.private_data = private_data
@@ -152,28 +509,49 @@ class OHandSerialAPI:
         self.address_master = address_master
         self.send_data_impl = send_data_impl
         self.recv_data_impl = recv_data_impl
+        self.send_prepared_impl = None  # Optional fast path for PreparedCommand, falls back to send_data_impl
         self.timeout = 255  # Default timeout in ms
+        self.rtt_estimates = None  # (node id, command_class(cmd)) -> RttEstimator when adaptive timeouts are enabled
+        self.rto_floor = RTO_FLOOR
+        self.rto_ceiling = RTO_CEILING
+        self.probe_timeout = None  # timeout of nodes without an estimate in probe mode
+        self.sent_at = 0.0  # perf_counter() of the last request, for RTT samples
         self._get_milli_seconds_impl = None
         self._delay_milli_seconds_impl = None
         self.packet_data = bytearray(MAX_PROTOCOL_DATA_SIZE + 5)
+        self.packet_view = memoryview(self.packet_data)
+        self.response = self.packet_view[:0]  # data of the last response, a view into packet_data valid until the next request
         self.is_whole_packet = False
-        self.decode_state = self._initial_state()
-        self.byte_count = 0
-
-    def _initial_state(self):
-        if self.protocol == HAND_PROTOCOL_UART:
-            return "WAIT_ON_HEADER_0"
-        elif self.protocol == HAND_PROTOCOL_I2C:
-            return "WAIT_ON_ADDRESSED_NODE_ID"
+        self.rx_buf = bytearray()  # bytes received but not yet decoded into a whole packet
+        self.rx_need = 0  # rx_buf length needed before decoding can make progress
+        self.header = PROTOCOL_HEADER if protocol == HAND_PROTOCOL_UART else b""
+        self.recv_mode = RECV_MODE_POLL
+        self.receiver = None  # background receiver in RECV_MODE_EVENT, stopped by shutdown()
+        self.response_event = None  # completion object of the outstanding request
+        self.packet_handler = None  # when set, every decoded packet is passed on instead of latched
+        self.cancel_impl = None  # cancel_impl(addr, cmd, api) drops a response route when the request times out
+
+    def _reset_decoder(self):
+        self.rx_buf.clear()
+        self.rx_need = 0
 
     def get_private_data(self):
         return self.private_data
 
     def HAND_ProtocolLRC(self, lrcBytes):
-        lrc = 0
-        for byte in lrcBytes:
-            lrc ^= byte
-        return lrc
+        return protocol_lrc(lrcBytes)
+
+    def _build_frame(self, send_buf, addr, cmd, data, nb_data):
+        # Fill send_buf in place, returns the frame length
+        FRAME_HEADER.pack_into(send_buf, 0, 0x55, 0xAA, addr, self.address_master, cmd, nb_data)
+
+        # 处理data为None或空的情况
+        if data is not None:
+            send_buf[6 : 6 + nb_data] = data  # 确保data是可迭代的字节数据
+
+        # 计算LRC校验（从addr开始到data结束）
+        send_buf[6 + nb_data] = protocol_lrc(memoryview(send_buf)[2 : 6 + nb_data])
+        return 7 + nb_data
 
     def HAND_SendCmd(self, addr, cmd, data, nb_data):
         if not self.send_data_impl:
@@ -186,70 +564,126 @@ class OHandSerialAPI:
             return HAND_RESP_DATA_SIZE_TOO_BIG
 
         send_buf = bytearray(7 + nb_data)
-        send_buf[0] = 0x55
-        send_buf[1] = 0xAA
-        send_buf[2] = addr
-        send_buf[3] = self.address_master
-        send_buf[4] = cmd
-        send_buf[5] = nb_data
+        length = self._build_frame(send_buf, addr, cmd, data, nb_data)
 
-        # 处理data为None或空的情况
-        if data is not None:
-            send_buf[6 : 6 + nb_data] = data  # 确保data是可迭代的字节数据
-
-        # 计算LRC校验（从addr开始到data结束）
-        lrc = 0
-        for i in range(2, 6 + nb_data):
-            lrc ^= send_buf[i]
-        send_buf[6 + nb_data] = lrc
+        if self.response_event is not None:
+            # Armed before sending so that a fast response can not be missed,
+            # a late response latched after the previous timeout is dropped with it
+            self.response_event.clear()
+            self.is_whole_packet = False
 
         # 发送数据并返回结果（假设send_data_impl返回0表示成功）
-        if self.send_data_impl(addr, send_buf, len(send_buf), self.private_data) != 0:
+        self.sent_at = time.perf_counter()
+        if self.send_data_impl(addr, send_buf, length, self.private_data) != 0:
             return HAND_RESP_HAND_ERROR
 
         return HAND_RESP_SUCCESS
 
-    def HAND_GetResponse(self, addr, cmd, time_out, resp_bytes, remote_err):
-        wait_start = self._get_milli_seconds_impl()
-        wait_timeout = wait_start + time_out
+    def HAND_PrepareCmd(self, hand_id, cmd, args=()):
+        # Validate and encode once, args are the COMMAND_CODECS request fields,
+        # or the encoded payload for variable length requests. Raises ValueError on invalid args
+        codec = COMMAND_CODECS[cmd]
+        try:
+            data = bytes(args) if codec.request is None else codec.request.pack(*args)
+        except (struct.error, OverflowError, TypeError) as e:
+            raise ValueError(f"invalid arguments for command 0x{cmd:02X}: {args!r}") from e
+        if len(data) >= MAX_PROTOCOL_DATA_SIZE:
+            raise ValueError(f"payload of command 0x{cmd:02X} too big: {len(data)} bytes")
+        frame = bytearray(7 + len(data))
+        self._build_frame(frame, hand_id, cmd, data, len(data))
+        return PreparedCommand(hand_id, cmd, frame)
+
+    def HAND_SendPreparedCmd(self, prepared):
+        # Send half of HAND_SendPrepared, the counterpart of HAND_SendCmd
+        if not self.send_data_impl:
+            return HAND_RESP_INVALID_CONTEXT
+
+        if not self._delay_milli_seconds_impl or not self._get_milli_seconds_impl:
+            return HAND_RESP_TIMER_FUNC_NOT_SET
+
+        if self.response_event is not None:
+            self.response_event.clear()
+            self.is_whole_packet = False
+
+        self.sent_at = time.perf_counter()
+        if self.send_prepared_impl is not None:
+            ret = self.send_prepared_impl(prepared, self.private_data)
+        else:
+            ret = self.send_data_impl(prepared.addr, prepared.frame, len(prepared.frame), self.private_data)
+        if ret != 0:
+            return HAND_RESP_HAND_ERROR
 
-        while not self.is_whole_packet:
-            time.sleep(0.001)  # Delay 1ms
+        return HAND_RESP_SUCCESS
 
-            if self.recv_data_impl:
-                self.recv_data_impl(self.private_data, self)
+    def HAND_SendPrepared(self, prepared, remote_err, resp_bytes=None):
+        err = self.HAND_SendPreparedCmd(prepared)
+        if err == HAND_RESP_SUCCESS:
+            err = self.HAND_GetResponse(prepared.addr, prepared.cmd, self._response_timeout(prepared.addr, prepared.cmd), resp_bytes, remote_err)
+        return err
 
-            if self._get_milli_seconds_impl() > wait_timeout:
-                self.decode_state = self._initial_state()
+    def HAND_GetResponse(self, addr, cmd, time_out, resp_bytes, remote_err):
+        if self.recv_mode == RECV_MODE_EVENT:
+            event = self.response_event
+            if not self.is_whole_packet and (event is None or not event.wait(time_out / 1000.0)):
+                # The receiver thread owns the decoder, a partial packet is resynchronized on the next header
+                self._rtt_timeout(addr, cmd)
+                if self.cancel_impl is not None:
+                    self.cancel_impl(addr, cmd, self)
                 return HAND_RESP_TIMEOUT
+        else:
+            wait_start = self._get_milli_seconds_impl()
+            wait_timeout = wait_start + time_out
+
+            while not self.is_whole_packet:
+                time.sleep(0.001)  # Delay 1ms
+
+                if self.recv_data_impl:
+                    self.recv_data_impl(self.private_data, self)
+
+                if self._get_milli_seconds_impl() > wait_timeout:
+                    self._reset_decoder()
+                    self._rtt_timeout(addr, cmd)
+                    if self.cancel_impl is not None:
+                        self.cancel_impl(addr, cmd, self)
+                    return HAND_RESP_TIMEOUT
 
         # Validate LRC
-        lrc = self.HAND_ProtocolLRC(self.packet_data[: self.packet_data[3] + 4])
-        if lrc != self.packet_data[self.packet_data[3] + 4]:
+        packet = self.packet_view
+        byte_count = packet[3]
+        if protocol_lrc(packet[: byte_count + 4]) != packet[byte_count + 4]:
             self.is_whole_packet = False
             return ERR_PROTOCOL_WRONG_LRC
 
+        # Only a response to this request is an RTT sample, a late one to a timed-out request is not
+        sample = self.rtt_estimates is not None and packet[1] == addr
+
         # Check if response is error
-        if (self.packet_data[2] & CMD_ERROR_MASK) != 0:
+        if (packet[2] & CMD_ERROR_MASK) != 0:
+            if sample and packet[2] & ~CMD_ERROR_MASK == cmd:
+                self._rtt_sample(addr, cmd)
             if remote_err is not None:
-                remote_err.append(self.packet_data[4])
+                remote_err.append(packet[4])
+            self.is_whole_packet = False  # Otherwise the next request would take this packet as its response
             return HAND_RESP_HAND_ERROR
 
-        if self.packet_data[1] != addr and addr != 0xFF:
+        if packet[1] != addr and addr != 0xFF:
             self.is_whole_packet = False
             return HAND_RESP_UNMATCHED_ADDR
 
-        if self.packet_data[2] != cmd:
+        if packet[2] != cmd:
             self.is_whole_packet = False
             return HAND_RESP_UNMATCHED_CMD
 
-        # Copy response data
+        if sample:
+            self._rtt_sample(addr, cmd)
+
+        # Zero-copy view of the response data, copied only into a caller supplied buffer
+        self.response = packet[4 : 4 + byte_count]
         if resp_bytes:
-            packet_byte_count = self.packet_data[3]
-            if packet_byte_count > len(resp_bytes):
+            if byte_count > len(resp_bytes):
                 return HAND_RESP_INVALID_OUT_BUFFER_SIZE
             else:
-                resp_bytes[:] = self.packet_data[4 : 4 + packet_byte_count]
+                resp_bytes[:] = self.response
 
         self.is_whole_packet = False
         return HAND_RESP_SUCCESS
@@ -267,571 +701,454 @@ class OHandSerialAPI:
     def HAND_SetCommandTimeOut(self, timeout):
         self.timeout = timeout
 
+    def HAND_SetAdaptiveTimeout(self, enable, floor=RTO_FLOOR, ceiling=RTO_CEILING):
+        # Derive each request's timeout from the measured RTT of its (node, command class) instead of HAND_SetCommandTimeOut,
+        # clamped to [floor, ceiling] ms. Nodes without samples wait the ceiling (or the probe timeout)
+        self.rtt_estimates = {} if enable else None
+        self.rto_floor = floor
+        self.rto_ceiling = ceiling
+
+    def HAND_SetProbeTimeout(self, timeout=PROBE_TIMEOUT):
+        # Fast-probe mode for node discovery: requests to nodes without an RTT estimate wait at most timeout ms
+        # and a missing response does not back off. None leaves probe mode
+        self.probe_timeout = timeout
+
+    def HAND_GetRttEstimates(self):
+        # Live RttEstimator of every (node id, command class) seen since adaptive timeouts were enabled
+        return dict(self.rtt_estimates or {})
+
+    def _response_timeout(self, addr, cmd):
+        if self.rtt_estimates is not None:
+            estimate = self.rtt_estimates.get((addr, command_class(cmd)))
+            if estimate is not None:
+                return estimate.rto
+            return self.rto_ceiling if self.probe_timeout is None else self.probe_timeout
+        return self.timeout if self.probe_timeout is None else self.probe_timeout
+
+    def _rtt_sample(self, addr, cmd):
+        key = (addr, command_class(cmd))
+        estimate = self.rtt_estimates.get(key)
+        if estimate is None:
+            estimate = self.rtt_estimates[key] = RttEstimator(self.rto_ceiling)
+        estimate.sample((time.perf_counter() - self.sent_at) * 1000.0, self.rto_floor, self.rto_ceiling)
+
+    def _rtt_timeout(self, addr, cmd):
+        if self.rtt_estimates is not None:
+            estimate = self.rtt_estimates.get((addr, command_class(cmd)))
+            if estimate is not None and self.probe_timeout is None:
+                estimate.backoff(self.rto_ceiling)
+
+    def HAND_SetSendPreparedFunction(self, send_prepared_impl):
+        self.send_prepared_impl = send_prepared_impl
+
+    def HAND_SetCancelFunction(self, cancel_impl):
+        self.cancel_impl = cancel_impl
+
+    def HAND_SetRecvMode(self, mode, receiver=None):
+        self.recv_mode = mode
+        self.receiver = receiver
+        # One completion object per instance, cleared before each request
+        self.response_event = threading.Event() if mode == RECV_MODE_EVENT else None
+
+    def shutdown(self):
+        if self.receiver is not None:
+            self.receiver.stop()
+            self.receiver = None
+        self.HAND_SetRecvMode(RECV_MODE_POLL)
+
     def HAND_OnData(self, data):
+        # Per-byte compatibility wrapper of HAND_OnBytes. When rx_buf starts at a header the byte count and
+        # the last byte of a packet are handled here, so _decode only runs to resync on garbage. Still about
+        # 0.6x the old state machine for packets without data (append/len per byte), faster from ~5 data
+        # bytes on; feed whole frames to HAND_OnBytes where throughput matters.
         if self.is_whole_packet:
             return  # Old packet is not processed, ignore
-
-        if self.decode_state == "WAIT_ON_HEADER_0":
-            if data == 0x55:
-                self.decode_state = "WAIT_ON_HEADER_1"
-        elif self.decode_state == "WAIT_ON_HEADER_1":
-            if data == 0xAA:
-                self.decode_state = "WAIT_ON_ADDRESSED_NODE_ID"
-            else:
-                self.decode_state = "WAIT_ON_HEADER_0"
-        elif self.decode_state == "WAIT_ON_ADDRESSED_NODE_ID":
-            self.packet_data[0] = data
-            self.decode_state = "WAIT_ON_OWN_NODE_ID"
-        elif self.decode_state == "WAIT_ON_OWN_NODE_ID":
-            self.packet_data[1] = data
-            self.decode_state = "WAIT_ON_COMMAND_ID"
-        elif self.decode_state == "WAIT_ON_COMMAND_ID":
-            self.packet_data[2] = data
-            self.decode_state = "WAIT_ON_BYTECOUNT"
-        elif self.decode_state == "WAIT_ON_BYTECOUNT":
-            self.packet_data[3] = data
-            self.byte_count = data
-            if self.byte_count > MAX_PROTOCOL_DATA_SIZE:
-                self.decode_state = self._initial_state()
-            elif self.byte_count > 0:
-                self.decode_state = "WAIT_ON_DATA"
+        rx_buf = self.rx_buf
+        rx_buf.append(data)
+        length = len(rx_buf)
+        if length < self.rx_need:
+            return
+        header = self.header
+        if rx_buf.startswith(header):
+            body = len(header)
+            if length == body + 4:
+                if data <= MAX_PROTOCOL_DATA_SIZE:
+                    self.rx_need = length + 1 + data  # Byte count just arrived
+                    return
+            elif length > body + 4 and length == body + 5 + rx_buf[body + 3]:
+                packet = rx_buf[body:]
+                rx_buf.clear()
+                self.rx_need = body + 4
+                if packet[0] == self.address_master:
+                    if self.packet_handler is not None:
+                        self.packet_handler(packet)
+                    else:
+                        self.HAND_OnPacket(packet)
+                return
+        self._decode()
+
+    def HAND_OnBytes(self, buffer):
+        # Bulk ingest of a whole frame, bytes/bytearray/memoryview are all accepted
+        if self.is_whole_packet:
+            return  # Old packet is not processed, ignore
+        self.rx_buf += buffer
+        if len(self.rx_buf) >= self.rx_need:
+            self._decode()
+
+    def HAND_SetPacketHandler(self, packet_handler):
+        self.packet_handler = packet_handler
+
+    def HAND_OnPacket(self, packet):
+        # Latch an already decoded packet [addressed node id, own node id, command id, byte count, data..., lrc]
+        self.packet_data[: len(packet)] = packet
+        self.is_whole_packet = True
+        if self.response_event is not None:
+            self.response_event.set()
+
+    def _decode(self):
+        rx_buf = self.rx_buf
+        header = self.header
+        header_len = len(header)
+        end = len(rx_buf)
+        pos = 0
+        need = header_len + 4
+
+        while True:
+            if header_len:
+                start = rx_buf.find(header, pos)
+                if start < 0:
+                    # Keep a trailing 0x55, it may be the first half of a header split across frames
+                    pos = max(pos, end - 1) if rx_buf.endswith(header[:1]) else end
+                    need = header_len
+                    break
             else:
-                self.decode_state = "WAIT_ON_LRC"
-        elif self.decode_state == "WAIT_ON_DATA":
-            index = 4 + self.packet_data[3] - self.byte_count
-            self.packet_data[index] = data
-            self.byte_count -= 1
-            if self.byte_count == 0:
-                self.decode_state = "WAIT_ON_LRC"
-        elif self.decode_state == "WAIT_ON_LRC":
-            index = 4 + self.packet_data[3]
-            self.packet_data[index] = data
-            if self.packet_data[0] == self.address_master:
-                self.is_whole_packet = True
-            self.decode_state = self._initial_state()
+                start = pos
+
+            # [addressed node id, own node id, command id, byte count, data..., lrc]
+            body = start + header_len
+            if end - body < 4:
+                pos = start
+                break
+
+            byte_count = rx_buf[body + 3]
+            if byte_count > MAX_PROTOCOL_DATA_SIZE:
+                pos = body + 4
+                continue
+
+            packet_end = body + 5 + byte_count
+            if end < packet_end:
+                pos = start
+                need = packet_end - start
+                break
+
+            if rx_buf[body] == self.address_master:
+                if self.packet_handler is not None:
+                    self.packet_handler(rx_buf[body:packet_end])
+                else:
+                    self.HAND_OnPacket(rx_buf[body:packet_end])
+                    pos = end  # Bytes after a whole packet are ignored until it is processed
+                    break
+            pos = packet_end
+
+        del rx_buf[:pos]
+        self.rx_need = need
+
+    def _transact(self, hand_id, cmd, args, remote_err, data=None):
+        # Encode, send and decode one command in a single pack/unpack, returns (err, fields)
+        codec = COMMAND_CODECS[cmd]
+        if data is None:
+            try:
+                data = codec.request.pack(*args)
+            except (struct.error, OverflowError):
+                return HAND_RESP_DATA_INVALID, None
+
+        err = self.HAND_SendCmd(hand_id, cmd, data, len(data))
+        if err != HAND_RESP_SUCCESS:
+            return err, None
+
+        err = self.HAND_GetResponse(hand_id, cmd, self._response_timeout(hand_id, cmd), None, remote_err)
+        if err != HAND_RESP_SUCCESS or codec.response is None:
+            return err, None
+        response = self.response
+        if codec.response is VARIABLE:
+            return err, response
+        if len(response) < codec.response_size:
+            return HAND_RESP_DATA_INVALID, None
+        return err, codec.response.unpack_from(response)
+
+    def _finger_transact(self, hand_id, cmd, finger_id, remote_err):
+        # GET commands of one finger echo finger_id as the first response field
+        err, fields = self._transact(hand_id, cmd, (finger_id,), remote_err)
+        if err == HAND_RESP_SUCCESS and fields[0] != finger_id:
+            return HAND_RESP_DATA_INVALID, None
+        return err, fields
+
+    def _get_all(self, hand_id, cmd, item_format, target, current, motor_cnt, remote_err):
+        # Response of *_ALL GET commands: target[motor_cnt], current[motor_cnt]
+        err, out = self._transact(hand_id, cmd, (), remote_err)
+        if err == HAND_RESP_SUCCESS:
+            motor_cnt_ret = len(out) // (2 + 2)
+            if motor_cnt[0] < motor_cnt_ret:
+                return HAND_RESP_DATA_SIZE_TOO_BIG, target, current
+            motor_cnt[0] = motor_cnt_ret
+            values = array_struct(item_format, 2 * motor_cnt_ret).unpack_from(out)
+            if target:
+                target[:motor_cnt_ret] = values[:motor_cnt_ret]
+            if current:
+                current[:motor_cnt_ret] = values[motor_cnt_ret:]
+        return err, target, current
+
+    def _set_all(self, hand_id, cmd, item_format, values, speed, motor_cnt, remote_err):
+        # Request of *_ALL SET commands: (value, speed) * motor_cnt
+        if not isinstance(motor_cnt, int) or not 0 <= motor_cnt <= MAX_MOTOR_CNT:
+            return HAND_RESP_DATA_INVALID
+        try:
+            items = [None] * (2 * motor_cnt)
+            items[0::2] = values[:motor_cnt]
+            items[1::2] = speed[:motor_cnt]
+            data = array_struct(item_format + "B", motor_cnt).pack(*items)
+        except (struct.error, TypeError, ValueError):
+            return HAND_RESP_DATA_INVALID
+        return self._transact(hand_id, cmd, None, remote_err, data)[0]
 
     def HAND_GetProtocolVersion(self, hand_id, major, minor, remote_err):
-        out = bytearray(2)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_PROTOCOL_VERSION, None, 0)
+        err, fields = self._transact(hand_id, HAND_CMD_GET_PROTOCOL_VERSION, (), remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_PROTOCOL_VERSION, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS:
-                minor[0] = out[0]
-                major[0] = out[1]
+            minor[0], major[0] = fields
         return err, major[0], minor[0]
 
     def HAND_GetFirmwareVersion(self, hand_id, major, minor, revision, remote_err):
-        out = bytearray(4)  # Assuming revision is 2 bytes, and major/minor are 1 byte each
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_FW_VERSION, None, 0)
+        err, fields = self._transact(hand_id, HAND_CMD_GET_FW_VERSION, (), remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_FW_VERSION, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS:
-                revision[0] = out[0] | (out[1] << 8)
-                minor[0] = out[2]
-                major[0] = out[3]
+            revision[0], minor[0], major[0] = fields
         return err, major[0], minor[0], revision[0]
 
     def HAND_GetHardwareVersion(self, hand_id, hw_type, hw_ver, boot_version, remote_err):
-        out = bytearray(4)  # Assuming boot_version is 2 bytes, and hw_type/hw_ver are 1 byte each
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_HW_VERSION, None, 0)
+        err, fields = self._transact(hand_id, HAND_CMD_GET_HW_VERSION, (), remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_HW_VERSION, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS:
-                hw_type[0] = out[0]
-                hw_ver[0] = out[1]
-                boot_version[0] = (out[2] << 8) | out[3]
+            hw_type[0], hw_ver[0], boot_version[0] = fields
         return err, hw_type[0], hw_ver[0], boot_version[0]
 
     def HAND_GetCaliData(self, hand_id, end_pos, start_pos, motor_cnt, thumb_root_pos, thumb_root_pos_cnt, remote_err):
-        out = bytearray(2 + 2 * MAX_MOTOR_CNT + 2 * MAX_MOTOR_CNT + 1 + 2 * MAX_THUMB_ROOT_POS)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_CALI_DATA, None, 0)
+        err, out = self._transact(hand_id, HAND_CMD_GET_CALI_DATA, (), remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_CALI_DATA, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS:
-                p_data = iter(out)
-                motor_cnt_ret = next(p_data)
-                thumb_root_pos_cnt_ret = next(p_data)
-                if motor_cnt[0] < motor_cnt_ret or thumb_root_pos_cnt[0] < thumb_root_pos_cnt_ret:
-                    return HAND_RESP_DATA_SIZE_TOO_BIG
-                motor_cnt[0] = motor_cnt_ret
-                thumb_root_pos_cnt[0] = thumb_root_pos_cnt_ret
-
-                end_pos_size = 2 * motor_cnt_ret
-                start_pos_size = 2 * motor_cnt_ret
-                thumb_root_pos_size = 2 * thumb_root_pos_cnt_ret
-
-                if end_pos:
-                    for i in range(motor_cnt_ret):
-                        end_pos[i] = next(p_data) | (next(p_data) << 8)
-
-                if start_pos:
-                    for i in range(motor_cnt_ret):
-                        start_pos[i] = next(p_data) | (next(p_data) << 8)
-
-                if thumb_root_pos:
-                    for i in range(thumb_root_pos_cnt_ret):
-                        thumb_root_pos[i] = next(p_data) | (next(p_data) << 8)
-
+            motor_cnt_ret = out[0]
+            thumb_root_pos_cnt_ret = out[1]
+            if motor_cnt[0] < motor_cnt_ret or thumb_root_pos_cnt[0] < thumb_root_pos_cnt_ret:
+                return HAND_RESP_DATA_SIZE_TOO_BIG, end_pos, start_pos, thumb_root_pos
+            motor_cnt[0] = motor_cnt_ret
+            thumb_root_pos_cnt[0] = thumb_root_pos_cnt_ret
+
+            try:
+                values = array_struct("H", 2 * motor_cnt_ret + thumb_root_pos_cnt_ret).unpack_from(out, 2)
+            except struct.error:
+                return HAND_RESP_DATA_INVALID, end_pos, start_pos, thumb_root_pos
+            if end_pos:
+                end_pos[:motor_cnt_ret] = values[:motor_cnt_ret]
+            if start_pos:
+                start_pos[:motor_cnt_ret] = values[motor_cnt_ret : 2 * motor_cnt_ret]
+            if thumb_root_pos:
+                thumb_root_pos[:thumb_root_pos_cnt_ret] = values[2 * motor_cnt_ret :]
         return err, end_pos, start_pos, thumb_root_pos
 
     def HAND_GetFingerPID(self, hand_id, finger_id, p, i, d, g, remote_err):
-        if not match_data_type(finger_id, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(1)
-        data[0] = finger_id
-        out = bytearray(1 + 4 + 4 + 4 + 4)  # Assuming float is 4 bytes
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_FINGER_PID, data, len(data))
+        err, fields = self._finger_transact(hand_id, HAND_CMD_GET_FINGER_PID, finger_id, remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_FINGER_PID, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS and out[0] == finger_id:
-                p[0] = struct.unpack('f', out[1:5])
-                i[0] = struct.unpack('f', out[5:9])
-                d[0] = struct.unpack('f', out[9:13])
-                g[0] = struct.unpack('f', out[13:17])
-            else:
-                err = HAND_RESP_DATA_INVALID
-        return err, p[0][0], i[0][0], d[0][0], g[0][0]
+            _, p[0], i[0], d[0], g[0] = fields
+        return err, p[0], i[0], d[0], g[0]
 
     def HAND_GetFingerCurrentLimit(self, hand_id, finger_id, current_limit, remote_err):
-        if not match_data_type(finger_id, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(1)
-        data[0] = finger_id
-        out = bytearray(3)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_FINGER_CURRENT_LIMIT, data, len(data))
+        err, fields = self._finger_transact(hand_id, HAND_CMD_GET_FINGER_CURRENT_LIMIT, finger_id, remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_FINGER_CURRENT_LIMIT, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS and out[0] == finger_id:
-                current_limit[0] = out[1] | (out[2] << 8)
-            else:
-                err = HAND_RESP_DATA_INVALID
+            current_limit[0] = fields[1]
         return err, current_limit[0]
 
     def HAND_GetFingerCurrent(self, hand_id, finger_id, current, remote_err):
-        if not match_data_type(finger_id, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(1)
-        data[0] = finger_id
-        out = bytearray(3)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_FINGER_CURRENT, data, len(data))
+        err, fields = self._finger_transact(hand_id, HAND_CMD_GET_FINGER_CURRENT, finger_id, remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_FINGER_CURRENT, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS and out[0] == finger_id:
-                current[0] = out[1] | (out[2] << 8)
-            else:
-                err = HAND_RESP_DATA_INVALID
+            current[0] = fields[1]
         return err, current[0]
 
     def HAND_GetFingerForceTarget(self, hand_id, finger_id, force_target, remote_err):
-        if not match_data_type(finger_id, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(1)
-        data[0] = finger_id
-        out = bytearray(3)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_FINGER_FORCE_TARGET, data, len(data))
+        err, fields = self._finger_transact(hand_id, HAND_CMD_GET_FINGER_FORCE_TARGET, finger_id, remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_FINGER_FORCE_TARGET, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS and out[0] == finger_id:
-                force_target[0] = out[1] | (out[2] << 8)
-            else:
-                err = HAND_RESP_DATA_INVALID
+            force_target[0] = fields[1]
         return err, force_target[0]
 
     def HAND_GetFingerForce(self, hand_id, finger_id, force_entry_cnt, force, remote_err):
-        if not match_data_type(finger_id, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(1)
-        data[0] = finger_id
-        out = bytearray(1 + MAX_FORCE_ENTRIES * 2)  # Assuming each entry is 2 bytes
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_FINGER_FORCE, data, len(data))
+        err, out = self._transact(hand_id, HAND_CMD_GET_FINGER_FORCE, (finger_id,), remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_FINGER_FORCE, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS:
-                if finger_id != out[0]:
-                    err = HAND_RESP_DATA_INVALID
-                else:
-                    force_entry_cnt[0] = out[1]
-                    for i in range(force_entry_cnt[0]):
-                        if i < len(force):
-                            force[i] = out[2 + i]
+            if len(out) < 2 or out[0] != finger_id:
+                err = HAND_RESP_DATA_INVALID
+            else:
+                force_entry_cnt[0] = out[1]
+                count = min(out[1], len(force), len(out) - 2)
+                force[:count] = out[2 : 2 + count]
         return err, force
 
     def HAND_GetFingerPosLimit(self, hand_id, finger_id, low_limit, high_limit, remote_err):
-        if not match_data_type(finger_id, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(1)
-        data[0] = finger_id
-        out = bytearray(5)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_FINGER_POS_LIMIT, data, len(data))
+        err, fields = self._finger_transact(hand_id, HAND_CMD_GET_FINGER_POS_LIMIT, finger_id, remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_FINGER_POS_LIMIT, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS and out[0] == finger_id:
-                low_limit[0] = out[1] | (out[2] << 8)
-                high_limit[0] = out[3] | (out[4] << 8)
-            else:
-                err = HAND_RESP_DATA_INVALID
+            _, low_limit[0], high_limit[0] = fields
         return err, low_limit[0], high_limit[0]
 
     def HAND_GetFingerPosAbs(self, hand_id, finger_id, target_pos, current_pos, remote_err):
-        if not match_data_type(finger_id, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(1)
-        data[0] = finger_id
-        out = bytearray(5)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_FINGER_POS_ABS, data, len(data))
+        err, fields = self._finger_transact(hand_id, HAND_CMD_GET_FINGER_POS_ABS, finger_id, remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_FINGER_POS_ABS, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS and out[0] == finger_id:
-                if target_pos:
-                    target_pos[0] = out[1] | (out[2] << 8)
-                if current_pos:
-                    current_pos[0] = out[3] | (out[4] << 8)
-            else:
-                err = HAND_RESP_DATA_INVALID
+            if target_pos:
+                target_pos[0] = fields[1]
+            if current_pos:
+                current_pos[0] = fields[2]
         return err, target_pos[0], current_pos[0]
 
     def HAND_GetFingerPos(self, hand_id, finger_id, target_pos, current_pos, remote_err):
-        if not match_data_type(finger_id, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(1)
-        data[0] = finger_id
-        out = bytearray(5)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_FINGER_POS, data, len(data))
+        err, fields = self._finger_transact(hand_id, HAND_CMD_GET_FINGER_POS, finger_id, remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_FINGER_POS, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS and out[0] == finger_id:
-                if target_pos:
-                    target_pos[0] = out[1] | (out[2] << 8)
-                if current_pos:
-                    current_pos[0] = out[3] | (out[4] << 8)
-            else:
-                err = HAND_RESP_DATA_INVALID
+            if target_pos:
+                target_pos[0] = fields[1]
+            if current_pos:
+                current_pos[0] = fields[2]
         return err, target_pos[0], current_pos[0]
 
     def HAND_GetFingerAngle(self, hand_id, finger_id, target_angle, current_angle, remote_err):
-        if not match_data_type(finger_id, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(1)
-        data[0] = finger_id
-        out = bytearray(5)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_FINGER_ANGLE, data, len(data))
+        err, fields = self._finger_transact(hand_id, HAND_CMD_GET_FINGER_ANGLE, finger_id, remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_FINGER_ANGLE, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS and out[0] == finger_id:
-                if target_angle:
-                    target_angle[0] = int.from_bytes(out[1:3], byteorder="little", signed=True)
-                if current_angle:
-                    current_angle[0] = int.from_bytes(out[3:5], byteorder="little", signed=True)
-            else:
-                err = HAND_RESP_DATA_INVALID
+            if target_angle:
+                target_angle[0] = fields[1]
+            if current_angle:
+                current_angle[0] = fields[2]
         return err, target_angle[0], current_angle[0]
 
     def HAND_GetThumbRootPos(self, hand_id, raw_encoder, pos, remote_err):
-        out = bytearray(3)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_THUMB_ROOT_POS, None, 0)
+        err, fields = self._transact(hand_id, HAND_CMD_GET_THUMB_ROOT_POS, (), remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_THUMB_ROOT_POS, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS:
-                raw_encoder[0] = out[0] | (out[1] << 8)
-                pos[0] = out[2]
+            raw_encoder[0], pos[0] = fields
         return err, raw_encoder[0], pos[0]
 
     def HAND_GetFingerPosAbsAll(self, hand_id, target_pos, current_pos, motor_cnt, remote_err):
-        out = bytearray(2 * MAX_MOTOR_CNT * 2)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_FINGER_POS_ABS_ALL, None, 0)
-        if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_FINGER_POS_ABS_ALL, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS:
-                motor_cnt_ret = byte_count // (2 + 2)
-                if motor_cnt[0] < motor_cnt_ret:
-                    return HAND_RESP_DATA_SIZE_TOO_BIG
-                motor_cnt[0] = motor_cnt_ret
-                if target_pos:
-                    for i in range(motor_cnt_ret):
-                        target_pos[i] = out[2 * i] | (out[2 * i + 1] << 8)
-                if current_pos:
-                    for i in range(motor_cnt_ret):
-                        current_pos[i] = out[2 * motor_cnt_ret + 2 * i] | (out[2 * motor_cnt_ret + 2 * i + 1] << 8)
-        return err, target_pos, current_pos
+        return self._get_all(hand_id, HAND_CMD_GET_FINGER_POS_ABS_ALL, "H", target_pos, current_pos, motor_cnt, remote_err)
 
     def HAND_GetFingerPosAll(self, hand_id, target_pos, current_pos, motor_cnt, remote_err):
-        out = bytearray(2 * MAX_MOTOR_CNT * 2)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_FINGER_POS_ALL, None, 0)
-        if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_FINGER_POS_ALL, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS:
-                motor_cnt_ret = byte_count // (2 + 2)
-                if motor_cnt[0] < motor_cnt_ret:
-                    return HAND_RESP_DATA_SIZE_TOO_BIG
-                motor_cnt[0] = motor_cnt_ret
-                if target_pos:
-                    for i in range(motor_cnt_ret):
-                        target_pos[i] = out[2 * i] | (out[2 * i + 1] << 8)
-                if current_pos:
-                    for i in range(motor_cnt_ret):
-                        current_pos[i] = out[2 * motor_cnt_ret + 2 * i] | (out[2 * motor_cnt_ret + 2 * i + 1] << 8)
-        return err, target_pos, current_pos
+        return self._get_all(hand_id, HAND_CMD_GET_FINGER_POS_ALL, "H", target_pos, current_pos, motor_cnt, remote_err)
 
     def HAND_GetFingerAngleAll(self, hand_id, target_angle, current_angle, motor_cnt, remote_err):
-        out = bytearray(2 * MAX_MOTOR_CNT * 2)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_FINGER_ANGLE_ALL, None, 0)
-        if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_FINGER_ANGLE_ALL, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS:
-                motor_cnt_ret = byte_count // (2 + 2)
-                if motor_cnt[0] < motor_cnt_ret:
-                    return HAND_RESP_DATA_SIZE_TOO_BIG
-                motor_cnt[0] = motor_cnt_ret
-                if target_angle:
-                    for i in range(motor_cnt_ret):
-                        target_angle[i] = int.from_bytes(out[2 * i : 2 * i + 2], byteorder="little", signed=True)
-                if current_angle:
-                    for i in range(motor_cnt_ret):
-                        current_angle[i] = int.from_bytes(
-                            out[2 * motor_cnt_ret + 2 * i : 2 * motor_cnt_ret + 2 * i + 2], byteorder="little", signed=True
-                        )
-        return err, target_angle, current_angle
+        return self._get_all(hand_id, HAND_CMD_GET_FINGER_ANGLE_ALL, "h", target_angle, current_angle, motor_cnt, remote_err)
 
     def HAND_GetFingerStopParams(self, hand_id, finger_id, speed, stop_current, stop_after_period, retry_interval, remote_err):
-        if not match_data_type(finger_id, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(1)
-        data[0] = finger_id
-        out = bytearray(9)  # Assuming 4 bytes of stop params
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_FINGER_STOP_PARAMS, data, len(data))
+        err, fields = self._finger_transact(hand_id, HAND_CMD_GET_FINGER_STOP_PARAMS, finger_id, remote_err)
         if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_FINGER_STOP_PARAMS, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS and out[0] == finger_id:
-                speed[0] = out[1] | (out[2] << 8)
-                stop_current[0] = out[3] | (out[4] << 8)
-                stop_after_period[0] = out[5] | (out[6] << 8)
-                retry_interval[0] = out[7] | (out[8] << 8)
-            else:
-                err = HAND_RESP_DATA_INVALID
+            _, speed[0], stop_current[0], stop_after_period[0], retry_interval[0] = fields
         return err, speed[0], stop_current[0], stop_after_period[0], retry_interval[0]
 
     def HAND_GetFingerForcePID(self, hand_id, finger_id, p, i, d, g, remote_err):
-        if not match_data_type(finger_id, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(1)
-        data[0] = finger_id
-        out = bytearray(1 + 4 + 4 + 4 + 4)  # Assuming float is 4 bytes
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_FINGER_FORCE_PID, data, len(data))
+        err, fields = self._finger_transact(hand_id, HAND_CMD_GET_FINGER_FORCE_PID, finger_id, remote_err)
         if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_FINGER_FORCE_PID, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS and out[0] == finger_id:
-                p[0] = struct.unpack('f', out[1:5])
-                i[0] = struct.unpack('f', out[5:9])
-                d[0] = struct.unpack('f', out[9:13])
-                g[0] = struct.unpack('f', out[13:17])
-            else:
-                err = HAND_RESP_DATA_INVALID
-        return err, p[0][0], i[0][0], d[0][0], g[0][0]
+            _, p[0], i[0], d[0], g[0] = fields
+        return err, p[0], i[0], d[0], g[0]
 
     def HAND_GetSelfTestLevel(self, hand_id, self_test_level, remote_err):
-        out = bytearray(1)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_SELF_TEST_LEVEL, None, 0)
+        err, fields = self._transact(hand_id, HAND_CMD_GET_SELF_TEST_LEVEL, (), remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_SELF_TEST_LEVEL, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS:
-                self_test_level[0] = out[0]
+            self_test_level[0] = fields[0]
         return err, self_test_level[0]
 
     def HAND_GetBeepSwitch(self, hand_id, beep_switch, remote_err):
-        out = bytearray(1)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_BEEP_SWITCH, None, 0)
+        err, fields = self._transact(hand_id, HAND_CMD_GET_BEEP_SWITCH, (), remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_BEEP_SWITCH, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS:
-                beep_switch[0] = out[0]
+            beep_switch[0] = fields[0]
         return err, beep_switch[0]
 
     def HAND_GetButtonPressedCnt(self, hand_id, pressed_cnt, remote_err):
-        out = bytearray(1)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_BUTTON_PRESSED_CNT, None, 0)
+        err, fields = self._transact(hand_id, HAND_CMD_GET_BUTTON_PRESSED_CNT, (), remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_BUTTON_PRESSED_CNT, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS:
-                pressed_cnt[0] = out[0]
+            pressed_cnt[0] = fields[0]
         return err, pressed_cnt[0]
 
     def HAND_GetUID(self, hand_id, uid_w0, uid_w1, uid_w2, remote_err):
-        out = bytearray(12)  # 96 bits UID
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_UID, None, 0)
+        err, fields = self._transact(hand_id, HAND_CMD_GET_UID, (), remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_UID, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS:
-                uid_w0[0] = out[0] | (out[1] << 8) | (out[2] << 16) | (out[3] << 24)
-                uid_w1[0] = out[4] | (out[5] << 8) | (out[6] << 16) | (out[7] << 24)
-                uid_w2[0] = out[8] | (out[9] << 8) | (out[10] << 16) | (out[11] << 24)
+            uid_w0[0], uid_w1[0], uid_w2[0] = fields
         return err, uid_w0[0], uid_w1[0], uid_w2[0]
 
     def HAND_GetBatteryVoltage(self, hand_id, voltage, remote_err):
-        out = bytearray(2)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_BATTERY_VOLTAGE, None, 0)
+        err, fields = self._transact(hand_id, HAND_CMD_GET_BATTERY_VOLTAGE, (), remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_BATTERY_VOLTAGE, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS:
-                voltage[0] = out[0] | (out[1] << 8)
+            voltage[0] = fields[0]
         return err
 
     def HAND_GetUsageStat(self, hand_id, total_use_time, total_open_times, motor_cnt, remote_err):
-        data = bytearray(1)
-        data[0] = motor_cnt
-        out = bytearray(4 + 4 * MAX_MOTOR_CNT)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_USAGE_STAT, data, len(data))
+        err, out = self._transact(hand_id, HAND_CMD_GET_USAGE_STAT, (motor_cnt,), remote_err)
         if err == HAND_RESP_SUCCESS:
-            byte_count = len(out)
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_USAGE_STAT, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS:
-                total_use_time[0] = out[0] | (out[1] << 8) | (out[2] << 16) | (out[3] << 24)
-                for i in range(MAX_MOTOR_CNT):
-                    index = 4 + i * 4
-                    total_open_times[i] = out[index] | (out[index + 1] << 8) | (out[index + 2] << 16) | (out[index + 3] << 24)
+            motor_cnt_ret = min((len(out) - 4) // 4, MAX_MOTOR_CNT)
+            if motor_cnt_ret < 0:
+                return HAND_RESP_DATA_INVALID
+            values = array_struct("I", 1 + motor_cnt_ret).unpack_from(out)
+            total_use_time[0] = values[0]
+            total_open_times[:motor_cnt_ret] = values[1:]
         return err
 
     def HAND_GetManufactureData(self, hand_id, sub_model, hw_revision, serial_number, customer_tag, remote_err):
-        out = bytearray(26)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_MANUFACTURE_DATA, None, 0)
+        err, fields = self._transact(hand_id, HAND_CMD_GET_MANUFACTURE_DATA, (), remote_err)
         if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_MANUFACTURE_DATA, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS:
-                sub_model[0] = out[0]
-                hw_revision[0] = out[1]
-                serial_bytes = out[2:18]
-                customer_bytes = out[18:26]
-
-                serial_numbers = [int(byte) for byte in serial_bytes]
-                serial_number_str = ''.join(map(str, serial_numbers))
-                serial_number[0] = serial_number_str
-
-                customer_numbers = [int(byte) for byte in customer_bytes]
-                customer_numbers_str = ''.join(map(str, customer_numbers))
-                customer_tag[0] = customer_numbers_str
-            else:
-                err = HAND_RESP_DATA_INVALID
+            sub_model[0], hw_revision[0], serial_bytes, customer_bytes = fields
+            serial_number[0] = "".join(map(str, serial_bytes))
+            customer_tag[0] = "".join(map(str, customer_bytes))
         return err, sub_model[0], hw_revision[0], serial_number[0], customer_tag[0]
 
     def HAND_GetFingerSpeedCtrlParams(self, hand_id, brake_distance, accel_distance, speed_ratio, remote_err):
-        out = bytearray(2 + 2 + 4)
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_GET_SPEED_CTRL_PARAMS, None, 0)
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_GET_SPEED_CTRL_PARAMS, self.timeout, out, remote_err)
-            if err == HAND_RESP_SUCCESS:
-                brake_distance[0] = out[0] | (out[1] << 8)
-                accel_distance[0] = out[2] | (out[3] << 8)
-                speed_ratio[0] = struct.unpack('f', out[4:8])
-            else:
-                err = HAND_RESP_DATA_INVALID
-
-        return err, brake_distance[0], accel_distance[0], speed_ratio[0][0]
-
-    def HAND_Reset(self, hand_id, mode, remote_err):
-        if not match_data_type(mode, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(1)
-        data[0] = mode
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_RESET, data, len(data))
+        err, fields = self._transact(hand_id, HAND_CMD_GET_SPEED_CTRL_PARAMS, (), remote_err)
         if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_RESET, self.timeout, None, remote_err)
-        return err
-
-    def HAND_PowerOff(self, hand_id, remote_err):
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_POWER_OFF, None, 0)
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_POWER_OFF, self.timeout, None, remote_err)
-        return err
-
-    def HAND_SetID(self, hand_id, new_id, remote_err):
-        if not match_data_type(new_id, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(1)
-        data[0] = new_id
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_NODE_ID, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_NODE_ID, self.timeout, None, remote_err)
-        return err
+            brake_distance[0], accel_distance[0], speed_ratio[0] = fields
+        return err, brake_distance[0], accel_distance[0], speed_ratio[0]
+
+    # Typed alternatives of the HAND_Get* commands above, returning one HandResult instead of filling out-parameter lists
+    HAND_ReadProtocolVersion = _read_command(HAND_CMD_GET_PROTOCOL_VERSION, ProtocolVersion)
+    HAND_ReadFirmwareVersion = _read_command(HAND_CMD_GET_FW_VERSION, FirmwareVersion)
+    HAND_ReadHardwareVersion = _read_command(HAND_CMD_GET_HW_VERSION, HardwareVersion)
+    HAND_ReadFingerPID = _read_command(HAND_CMD_GET_FINGER_PID, FingerPID, per_finger=True)
+    HAND_ReadFingerCurrentLimit = _read_command(HAND_CMD_GET_FINGER_CURRENT_LIMIT, FingerCurrentLimit, per_finger=True)
+    HAND_ReadFingerCurrent = _read_command(HAND_CMD_GET_FINGER_CURRENT, FingerCurrent, per_finger=True)
+    HAND_ReadFingerForceTarget = _read_command(HAND_CMD_GET_FINGER_FORCE_TARGET, FingerForceTarget, per_finger=True)
+    HAND_ReadFingerPosLimit = _read_command(HAND_CMD_GET_FINGER_POS_LIMIT, FingerPosLimit, per_finger=True)
+    HAND_ReadFingerPosAbs = _read_command(HAND_CMD_GET_FINGER_POS_ABS, FingerPos, per_finger=True)
+    HAND_ReadFingerPos = _read_command(HAND_CMD_GET_FINGER_POS, FingerPos, per_finger=True)
+    HAND_ReadFingerAngle = _read_command(HAND_CMD_GET_FINGER_ANGLE, FingerAngle, per_finger=True)
+    HAND_ReadThumbRootPos = _read_command(HAND_CMD_GET_THUMB_ROOT_POS, ThumbRootPos)
+    HAND_ReadFingerPosAbsAll = _read_all_command(HAND_CMD_GET_FINGER_POS_ABS_ALL, "H")
+    HAND_ReadFingerPosAll = _read_all_command(HAND_CMD_GET_FINGER_POS_ALL, "H")
+    HAND_ReadFingerAngleAll = _read_all_command(HAND_CMD_GET_FINGER_ANGLE_ALL, "h")
+    HAND_ReadFingerStopParams = _read_command(HAND_CMD_GET_FINGER_STOP_PARAMS, FingerStopParams, per_finger=True)
+    HAND_ReadFingerForcePID = _read_command(HAND_CMD_GET_FINGER_FORCE_PID, FingerPID, per_finger=True)
+    HAND_ReadSelfTestLevel = _read_command(HAND_CMD_GET_SELF_TEST_LEVEL, SelfTestLevel)
+    HAND_ReadBeepSwitch = _read_command(HAND_CMD_GET_BEEP_SWITCH, BeepSwitch)
+    HAND_ReadButtonPressedCnt = _read_command(HAND_CMD_GET_BUTTON_PRESSED_CNT, ButtonPressedCnt)
+    HAND_ReadUID = _read_command(HAND_CMD_GET_UID, UID)
+    HAND_ReadBatteryVoltage = _read_command(HAND_CMD_GET_BATTERY_VOLTAGE, BatteryVoltage)
+    HAND_ReadFingerSpeedCtrlParams = _read_command(HAND_CMD_GET_SPEED_CTRL_PARAMS, SpeedCtrlParams)
+
+    HAND_Reset = _set_command(HAND_CMD_RESET, "mode")
+    HAND_PowerOff = _set_command(HAND_CMD_POWER_OFF)
+    HAND_SetID = _set_command(HAND_CMD_SET_NODE_ID, "new_id")
 
     def HAND_Calibrate(self, hand_id, key, remote_err):
-        data = bytearray(2)
-        data[0] = key & 0xFF
-        data[1] = (key >> 8) & 0xFF
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_CALIBRATE, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_CALIBRATE, self.timeout, None, remote_err)
-        return err
+        return self._transact(hand_id, HAND_CMD_CALIBRATE, (key & 0xFFFF,), remote_err)[0]
 
     def HAND_SetCaliData(self, hand_id, end_pos, start_pos, motor_cnt, thumb_root_pos, thumb_root_pos_cnt, remote_err):
         if not match_data_type(motor_cnt, UINT8_T) or not match_data_type(thumb_root_pos_cnt, UINT8_T):
             return HAND_RESP_DATA_INVALID
 
-        data = bytearray(1 + 2 * MAX_MOTOR_CNT + 2 * MAX_MOTOR_CNT + 1 + 2 * MAX_THUMB_ROOT_POS)
-        p_data = 0
-        data[p_data] = motor_cnt
-        p_data += 1
-
-        for i in range(motor_cnt):
-            data[p_data] = end_pos[i] & 0xFF
-            data[p_data + 1] = (end_pos[i] >> 8) & 0xFF
-            p_data += 2
-
-        for i in range(motor_cnt):
-            data[p_data] = start_pos[i] & 0xFF
-            data[p_data + 1] = (start_pos[i] >> 8) & 0xFF
-            p_data += 2
-
-        data[p_data] = thumb_root_pos_cnt
-        p_data += 1
-
-        for i in range(thumb_root_pos_cnt):
-            data[p_data] = thumb_root_pos[i] & 0xFF
-            data[p_data + 1] = (thumb_root_pos[i] >> 8) & 0xFF
-            p_data += 2
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_CALI_DATA, data, p_data)
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_CALI_DATA, self.timeout, None, remote_err)
-        return err
+        try:
+            data = (
+                bytes((motor_cnt,))
+                + array_struct("H", 2 * motor_cnt).pack(*end_pos[:motor_cnt], *start_pos[:motor_cnt])
+                + bytes((thumb_root_pos_cnt,))
+                + array_struct("H", thumb_root_pos_cnt).pack(*thumb_root_pos[:thumb_root_pos_cnt])
+            )
+        except struct.error:
+            return HAND_RESP_DATA_INVALID
+        return self._transact(hand_id, HAND_CMD_SET_CALI_DATA, None, remote_err, data)[0]
 
     def HAND_SetFingerPID(self, hand_id, finger_id, p, i, d, g, remote_err):
-        if not match_data_type(finger_id, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-        
         if not (1.0 <= p <= 500.0):
             return HAND_RESP_DATA_INVALID
         if not (0.0 <= i <= 100.0):
@@ -840,249 +1157,32 @@ class OHandSerialAPI:
             return HAND_RESP_DATA_INVALID
         if not (0.01 <= g <= 1.0):
             return HAND_RESP_DATA_INVALID
-
-        data = bytearray(1 + 4 + 4 + 4 + 4)
-        data[0] = finger_id
-        data[1:5] =   struct.pack('f', p)
-        data[5:9] =   struct.pack('f', i)
-        data[9:13] =  struct.pack('f', d)
-        data[13:17] = struct.pack('f', g)
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_FINGER_PID, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_FINGER_PID, self.timeout, None, remote_err)
-        return err
-
-    def HAND_SetFingerCurrentLimit(self, hand_id, finger_id, current_limit, remote_err):
-        if not match_data_type(finger_id, UINT8_T) or not match_data_type(current_limit, UINT16_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(3)
-        data[0] = finger_id
-        data[1] = current_limit & 0xFF
-        data[2] = (current_limit >> 8) & 0xFF
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_FINGER_CURRENT_LIMIT, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_FINGER_CURRENT_LIMIT, self.timeout, None, remote_err)
-        return err
-
-    def HAND_SetFingerForceTarget(self, hand_id, finger_id, force_limit, remote_err):
-        if not match_data_type(finger_id, UINT8_T) or not match_data_type(force_limit, UINT16_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(3)
-        data[0] = finger_id
-        data[1] = force_limit & 0xFF
-        data[2] = (force_limit >> 8) & 0xFF
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_FINGER_FORCE_TARGET, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_FINGER_FORCE_TARGET, self.timeout, None, remote_err)
-        return err
-
-    def HAND_SetFingerPosLimit(self, hand_id, finger_id, pos_limit_low, pos_limit_high, remote_err):
-        if (
-            not match_data_type(finger_id, UINT8_T)
-            or not match_data_type(pos_limit_low, UINT16_T)
-            or not match_data_type(pos_limit_high, UINT16_T)
-        ):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(5)
-        data[0] = finger_id
-        data[1] = pos_limit_low & 0xFF
-        data[2] = (pos_limit_low >> 8) & 0xFF
-        data[3] = pos_limit_high & 0xFF
-        data[4] = (pos_limit_high >> 8) & 0xFF
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_FINGER_POS_LIMIT, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_FINGER_POS_LIMIT, self.timeout, None, remote_err)
-        return err
-
-    def HAND_FingerStart(self, hand_id, finger_id_bits, remote_err):
-        if not match_data_type(finger_id_bits, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(1)
-        data[0] = finger_id_bits
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_FINGER_START, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_FINGER_START, self.timeout, None, remote_err)
-        return err
-
-    def HAND_FingerStop(self, hand_id, finger_id_bits, remote_err):
-        if not match_data_type(finger_id_bits, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(1)
-        data[0] = finger_id_bits
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_FINGER_STOP, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_FINGER_STOP, self.timeout, None, remote_err)
-        return err
-
-    def HAND_SetFingerPosAbs(self, hand_id, finger_id, raw_pos, speed, remote_err):
-        if (
-            not match_data_type(finger_id, UINT8_T)
-            or not match_data_type(raw_pos, UINT16_T)
-            or not match_data_type(speed, UINT8_T)
-        ):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(4)
-        data[0] = finger_id
-        data[1] = raw_pos & 0xFF
-        data[2] = (raw_pos >> 8) & 0xFF
-        data[3] = speed
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_FINGER_POS_ABS, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_FINGER_POS_ABS, self.timeout, None, remote_err)
-        return err
-
-    def HAND_SetFingerPos(self, hand_id, finger_id, pos, speed, remote_err):
-        if not match_data_type(finger_id, UINT8_T) or not match_data_type(pos, UINT16_T) or not match_data_type(speed, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(4)
-        data[0] = finger_id
-        data[1] = pos & 0xFF
-        data[2] = (pos >> 8) & 0xFF
-        data[3] = speed
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_FINGER_POS, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_FINGER_POS, self.timeout, None, remote_err)
-        return err
-
-    def HAND_SetFingerAngle(self, hand_id, finger_id, angle, speed, remote_err):
-        if not match_data_type(finger_id, UINT8_T) or not match_data_type(angle, INT16_T) or not match_data_type(speed, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(4)
-        data[0] = finger_id
-        data[1] = angle & 0xFF
-        data[2] = (angle >> 8) & 0xFF
-        data[3] = speed
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_FINGER_ANGLE, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_FINGER_ANGLE, self.timeout, None, remote_err)
-        return err
-
-    def HAND_SetThumbRootPos(self, hand_id, pos, speed, remote_err):
-        if not match_data_type(pos, UINT8_T) or not match_data_type(speed, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(2)
-        data[0] = pos
-        data[1] = speed
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_THUMB_ROOT_POS, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_THUMB_ROOT_POS, self.timeout, None, remote_err)
-        return err
+        return self._transact(hand_id, HAND_CMD_SET_FINGER_PID, (finger_id, p, i, d, g), remote_err)[0]
+
+    HAND_SetFingerCurrentLimit = _set_command(HAND_CMD_SET_FINGER_CURRENT_LIMIT, "finger_id", "current_limit")
+    HAND_SetFingerForceTarget = _set_command(HAND_CMD_SET_FINGER_FORCE_TARGET, "finger_id", "force_limit")
+    HAND_SetFingerPosLimit = _set_command(HAND_CMD_SET_FINGER_POS_LIMIT, "finger_id", "pos_limit_low", "pos_limit_high")
+    HAND_FingerStart = _set_command(HAND_CMD_FINGER_START, "finger_id_bits")
+    HAND_FingerStop = _set_command(HAND_CMD_FINGER_STOP, "finger_id_bits")
+    HAND_SetFingerPosAbs = _set_command(HAND_CMD_SET_FINGER_POS_ABS, "finger_id", "raw_pos", "speed")
+    HAND_SetFingerPos = _set_command(HAND_CMD_SET_FINGER_POS, "finger_id", "pos", "speed")
+    HAND_SetFingerAngle = _set_command(HAND_CMD_SET_FINGER_ANGLE, "finger_id", "angle", "speed")
+    HAND_SetThumbRootPos = _set_command(HAND_CMD_SET_THUMB_ROOT_POS, "pos", "speed")
 
     def HAND_SetFingerPosAbsAll(self, hand_id, raw_pos, speed, motor_cnt, remote_err):
-        if (
-            not match_list_type(raw_pos, UINT16_T)
-            or not match_list_type(speed, UINT8_T)
-            or not match_data_type(motor_cnt, UINT8_T)
-            or motor_cnt > MAX_MOTOR_CNT
-        ):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(3 * motor_cnt)
-        p_data = 0
-        for i in range(motor_cnt):
-            data[p_data] = raw_pos[i] & 0xFF
-            data[p_data + 1] = (raw_pos[i] >> 8) & 0xFF
-            data[p_data + 2] = speed[i]
-            p_data += 3
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_FINGER_POS_ABS_ALL, data, p_data)
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_FINGER_POS_ABS_ALL, self.timeout, None, remote_err)
-        return err
+        return self._set_all(hand_id, HAND_CMD_SET_FINGER_POS_ABS_ALL, "H", raw_pos, speed, motor_cnt, remote_err)
 
     def HAND_SetFingerPosAll(self, hand_id, pos, speed, motor_cnt, remote_err):
-        if (
-            not match_list_type(pos, UINT16_T)
-            or not match_list_type(speed, UINT8_T)
-            or not match_data_type(motor_cnt, UINT8_T)
-            or motor_cnt > MAX_MOTOR_CNT
-        ):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(3 * motor_cnt)
-        p_data = 0
-        for i in range(motor_cnt):
-            data[p_data] = pos[i] & 0xFF
-            data[p_data + 1] = (pos[i] >> 8) & 0xFF
-            data[p_data + 2] = speed[i]
-            p_data += 3
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_FINGER_POS_ALL, data, p_data)
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_FINGER_POS_ALL, self.timeout, None, remote_err)
-        return err
+        return self._set_all(hand_id, HAND_CMD_SET_FINGER_POS_ALL, "H", pos, speed, motor_cnt, remote_err)
 
     def HAND_SetFingerAngleAll(self, hand_id, angle, speed, motor_cnt, remote_err):
-        if (
-            not match_list_type(angle, INT16_T)
-            or not match_list_type(speed, UINT8_T)
-            or not match_data_type(motor_cnt, UINT8_T)
-            or motor_cnt > MAX_MOTOR_CNT
-        ):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(3 * motor_cnt)
-        p_data = 0
-        for i in range(motor_cnt):
-            data[p_data] = angle[i] & 0xFF
-            data[p_data + 1] = (angle[i] >> 8) & 0xFF
-            data[p_data + 2] = speed[i]
-            p_data += 3
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_FINGER_ANGLE_ALL, data, p_data)
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_FINGER_ANGLE_ALL, self.timeout, None, remote_err)
-        return err
+        return self._set_all(hand_id, HAND_CMD_SET_FINGER_ANGLE_ALL, "h", angle, speed, motor_cnt, remote_err)
 
-    def HAND_SetFingerStopParams(self, hand_id, finger_id, speed, stop_current, stop_after_period, retry_interval, remote_err):
-        if (
-            not match_data_type(finger_id, UINT8_T)
-            or not match_data_type(speed, UINT16_T)
-            or not match_data_type(stop_current, UINT16_T)
-            or not match_data_type(stop_after_period, UINT16_T)
-            or not match_data_type(retry_interval, UINT16_T)
-        ):
-            return HAND_RESP_DATA_INVALID
-
-        data = bytearray(1 + 2 + 2 + 2 + 2)
-        data[0] = finger_id
-        data[1] = speed & 0xFF
-        data[2] = (speed >> 8) & 0xFF
-        data[3] = stop_current & 0xFF
-        data[4] = (stop_current >> 8) & 0xFF
-        data[5] = stop_after_period & 0xFF
-        data[6] = (stop_after_period >> 8) & 0xFF
-        data[7] = retry_interval & 0xFF
-        data[8] = (retry_interval >> 8) & 0xFF
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_FINGER_STOP_PARAMS, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_FINGER_STOP_PARAMS, self.timeout, None, remote_err)
-        return err
+    HAND_SetFingerStopParams = _set_command(
+        HAND_CMD_SET_FINGER_STOP_PARAMS, "finger_id", "speed", "stop_current", "stop_after_period", "retry_interval"
+    )
 
     def HAND_SetFingerForcePID(self, hand_id, finger_id, p, i, d, g, remote_err):
-        if not match_data_type(finger_id, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-        
         if not (1.0 <= p <= 500.0):
             return HAND_RESP_DATA_INVALID
         if not (0.0 <= i <= 100.0):
@@ -1091,111 +1191,110 @@ class OHandSerialAPI:
             return HAND_RESP_DATA_INVALID
         if not (0.01 <= g <= 1.0):
             return HAND_RESP_DATA_INVALID
-        
-        data = bytearray(1 + 4 + 4 + 4 + 4)
-        data[0] = finger_id
-        data[1:5] =   struct.pack('f', p)
-        data[5:9] =   struct.pack('f', i)
-        data[9:13] =  struct.pack('f', d)
-        data[13:17] = struct.pack('f', g)
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_FINGER_FORCE_PID, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_FINGER_FORCE_PID, self.timeout, None, remote_err)
-        return err
+        return self._transact(hand_id, HAND_CMD_SET_FINGER_FORCE_PID, (finger_id, p, i, d, g), remote_err)[0]
 
-    def HAND_ResetForce(self, hand_id, remote_err):
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_RESET_FORCE, None, 0)
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_RESET_FORCE, self.timeout, None, remote_err)
-        return err
+    HAND_ResetForce = _set_command(HAND_CMD_RESET_FORCE)
 
     def HAND_SetCustom(self, hand_id, data, send_data_size, recv_data_size, remote_err):
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_CUSTOM, data, send_data_size)
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_CUSTOM, self.timeout, data, recv_data_size, remote_err)
-        return err
-
-    def HAND_SetSelfTestLevel(self, hand_id, self_test_level, remote_err):
-        if not match_data_type(self_test_level, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-        
-        data = bytearray(1)
-        data[0] = self_test_level
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_SELF_TEST_LEVEL, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_SELF_TEST_LEVEL, self.timeout, None, remote_err)
-        return err
-
-    def HAND_SetBeepSwitch(self, hand_id, beep_on, remote_err):
-        if not match_data_type(beep_on, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-        
-        data = bytearray(1)
-        data[0] = beep_on
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_BEEP_SWITCH, data, len(data))
+        # data: [sub_cmd, SET fields...], replaced by the response data (at most recv_data_size bytes) on success
+        err, response = self._transact(hand_id, HAND_CMD_SET_CUSTOM, None, remote_err, memoryview(data)[:send_data_size])
         if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_BEEP_SWITCH, self.timeout, None, remote_err)
-        return err
-
-    def HAND_Beep(self, hand_id, duration, remote_err):
-        if not match_data_type(duration, UINT16_T):
-            return HAND_RESP_DATA_INVALID
-        
-        data = bytearray(2)
-        data[0] = duration & 0xFF
-        data[1] = (duration >> 8) & 0xFF
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_BEEP, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_BEEP, self.timeout, None, remote_err)
+            if len(response) > recv_data_size:
+                return HAND_RESP_INVALID_OUT_BUFFER_SIZE
+            data[:] = response
         return err
 
-    def HAND_SetButtonPressedCnt(self, hand_id, pressed_cnt, remote_err):
-        if not match_data_type(pressed_cnt, UINT8_T):
-            return HAND_RESP_DATA_INVALID
-        
-        data = bytearray(1)
-        data[0] = pressed_cnt
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_BUTTON_PRESSED_CNT, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_BUTTON_PRESSED_CNT, self.timeout, None, remote_err)
-        return err
+    def HAND_GetSnapshot(self, hand_id, set_pos=None, fields=SNAPSHOT_FIELDS, remote_err=None):
+        # Optionally move all fingers and read the requested SUB_CMD_GET_* fields of all motors in one transaction
+        sub_cmd = fields & CUSTOM_GET_MASK
+        if set_pos is None:
+            data = bytes((sub_cmd,))
+        else:
+            if len(set_pos) > MAX_MOTOR_CNT:
+                return HAND_RESP_DATA_INVALID, None
+            try:
+                data = bytes((sub_cmd | SUB_CMD_SET_POS,)) + array_struct("H", len(set_pos)).pack(*set_pos)
+            except struct.error:
+                return HAND_RESP_DATA_INVALID, None
+
+        err, response = self._transact(hand_id, HAND_CMD_SET_CUSTOM, None, remote_err, data)
+        if err != HAND_RESP_SUCCESS:
+            return err, None
+
+        motor_size = custom_response_layout(sub_cmd, 1)[0].size
+        if motor_size == 0:
+            return err, HandSnapshot()
+        motor_cnt, remainder = divmod(len(response), motor_size)
+        if remainder or motor_cnt > MAX_MOTOR_CNT:
+            return HAND_RESP_DATA_INVALID, None
+
+        layout, slices = custom_response_layout(sub_cmd, motor_cnt)
+        values = layout.unpack_from(response)
+        snapshot = HandSnapshot()
+        for name, start, end in slices:
+            setattr(snapshot, name, values[start:end])
+        return err, snapshot
+
+    def HAND_WaitUntilSettled(self, hand_id, targets=None, tolerance=0, timeout=RTO_CEILING * 8,
+                              poll_interval=SETTLE_POLL_INTERVAL, remote_err=None):
+        # Poll HAND_ReadFingerPosAll() until every motor is within tolerance of targets and stationary, instead of sleeping
+        # for the worst-case motion time. Returns (err, current positions of the last successful poll or None):
+        # HAND_RESP_SUCCESS once settled, HAND_RESP_TIMEOUT after timeout ms, or the error of a poll the hand rejected
+        if not self._delay_milli_seconds_impl or not self._get_milli_seconds_impl:
+            return HAND_RESP_TIMER_FUNC_NOT_SET, None
+        tracker = SettleTracker(targets, tolerance)
+        deadline = self.HAND_GetTick() + timeout
+        while True:
+            result = self.HAND_ReadFingerPosAll(hand_id, remote_err)
+            if tracker.update(result):
+                return HAND_RESP_SUCCESS, tracker.positions
+            if result.err == HAND_RESP_HAND_ERROR:
+                return result.err, tracker.positions  # e.g. GET_FINGER_POS_ALL not supported, polling will not help
+            remaining = deadline - self.HAND_GetTick()
+            if remaining <= 0:
+                return HAND_RESP_TIMEOUT, tracker.positions
+            self._delay_milli_seconds_impl(min(poll_interval, remaining))
+
+    def HAND_WaitUntilReady(self, hand_id, timeout, probe_cmd=HAND_CMD_GET_SELF_TEST_LEVEL, probe_timeout=READY_PROBE_TIMEOUT,
+                            poll_interval=READY_POLL_INTERVAL, remote_err=None):
+        # Probe the hand with a cheap GET until it accepts commands again,
+        # e.g. after HAND_Reset(), HAND_StartInit() or HAND_Calibrate(), instead of sleeping for the worst-case reboot time.
+        # No response and ERR_STATUS_INIT / ERR_STATUS_CALI mean not ready yet, any other response means ready.
+        # Returns HAND_RESP_SUCCESS, or HAND_RESP_TIMEOUT after timeout ms with the last remote status in remote_err
+        if not self._delay_milli_seconds_impl or not self._get_milli_seconds_impl:
+            return HAND_RESP_TIMER_FUNC_NOT_SET
+        prepared = self.HAND_PrepareCmd(hand_id, probe_cmd)
+        deadline = self.HAND_GetTick() + timeout
+        status = None
+        while True:
+            err = self.HAND_SendPreparedCmd(prepared)
+            if err == HAND_RESP_SUCCESS:
+                probe_err = []
+                err = self.HAND_GetResponse(prepared.addr, prepared.cmd, probe_timeout, None, probe_err)
+                if err == HAND_RESP_HAND_ERROR and probe_err:
+                    status = probe_err[0]
+                    if status not in NOT_READY_STATUS:
+                        return HAND_RESP_SUCCESS  # Busy with something else, but answering
+                elif err == HAND_RESP_SUCCESS:
+                    return err
+            remaining = deadline - self.HAND_GetTick()
+            if remaining <= 0:
+                if status is not None and remote_err is not None:
+                    remote_err.append(status)
+                return HAND_RESP_TIMEOUT
+            self._delay_milli_seconds_impl(min(poll_interval, remaining))
 
-    def HAND_StartInit(self, hand_id, remote_err):
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_START_INIT, None, 0)
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_START_INIT, self.timeout, None, remote_err)
-        return err
+    HAND_SetSelfTestLevel = _set_command(HAND_CMD_SET_SELF_TEST_LEVEL, "self_test_level")
+    HAND_SetBeepSwitch = _set_command(HAND_CMD_SET_BEEP_SWITCH, "beep_on")
+    HAND_Beep = _set_command(HAND_CMD_BEEP, "duration")
+    HAND_SetButtonPressedCnt = _set_command(HAND_CMD_SET_BUTTON_PRESSED_CNT, "pressed_cnt")
+    HAND_StartInit = _set_command(HAND_CMD_START_INIT)
 
     def HAND_SetManufactureData(self, hand_id, key, sub_model, hw_revision, serial_number, customer_tag, remote_err):
-        data = bytearray(28)
-        data[0:2] = key
-        data[2] = sub_model
-        data[3] = hw_revision
-        data[4:20] = serial_number
-        data[20:28] = customer_tag
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_MANUFACTURE_DATA, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_MANUFACTURE_DATA, self.timeout, None, remote_err)
-        return err
-
-    def HAND_SetFingerSpeedCtrlParams(self, hand_id, brake_distance, accel_distance, speed_ratio, remote_err):
-        if not match_data_type(brake_distance, UINT16_T) or not match_data_type(accel_distance, UINT16_T):
+        try:
+            args = (bytes(key), sub_model, hw_revision, bytes(serial_number), bytes(customer_tag))
+        except (TypeError, ValueError):
             return HAND_RESP_DATA_INVALID
-        
-        data = bytearray(8)
-        data[0] = brake_distance & 0xFF
-        data[1] = brake_distance >> 8 & 0xFF
-        data[2] = accel_distance & 0xFF
-        data[3] = accel_distance >> 8 & 0xFF
-        data[4:8] = struct.pack('f', speed_ratio)
-
-        err = self.HAND_SendCmd(hand_id, HAND_CMD_SET_SPEED_CTRL_PARAMS, data, len(data))
-        if err == HAND_RESP_SUCCESS:
-            err = self.HAND_GetResponse(hand_id, HAND_CMD_SET_SPEED_CTRL_PARAMS, self.timeout, None, remote_err)
-        return err
+        return self._transact(hand_id, HAND_CMD_SET_MANUFACTURE_DATA, args, remote_err)[0]
+
+    HAND_SetFingerSpeedCtrlParams = _set_command(HAND_CMD_SET_SPEED_CTRL_PARAMS, "brake_distance", "accel_distance", "speed_ratio")
@@ -1,5 +1,4 @@
 import datetime
-import json
 import logging
 import concurrent.futures
 import os
@@ -7,8 +6,17 @@ import re
 import sys
 import time
 from typing import List, Optional, Tuple
-from OHandSerialAPI import HAND_RESP_SUCCESS, HAND_PROTOCOL_UART, MAX_MOTOR_CNT, MAX_THUMB_ROOT_POS, MAX_FORCE_ENTRIES, OHandSerialAPI
+from OHandSerialAPI import HAND_CMD_SET_FINGER_POS, HAND_RESP_SUCCESS, HAND_PROTOCOL_UART, MAX_MOTOR_CNT, MAX_THUMB_ROOT_POS, MAX_FORCE_ENTRIES, HAND_RESP_DATA_INVALID, HAND_RESP_HAND_ERROR, SUB_CMD_GET_POS, SUB_CMD_GET_CURRENT, OHandSerialAPI
 from can_interface import *
+from run_control import CONTROL
+from transport_pool import TRANSPORTS
+from current_sampler import CurrentSampler
+from device_runner import DeviceRunner
+from process_runner import ProcessRunner
+from farm import FARM
+from result_sink import ResultSink
+from result_store import ResultStore
+from checkpoint import RunCheckpoint
 
 # 设置日志级别为INFO，获取日志记录器实例
 logger = logging.getLogger(__name__)
@@ -25,6 +33,10 @@ timestamp = str(int(time.time()))
 current_date = time.strftime("%Y-%m-%d", time.localtime())
 # 构建完整的文件名，包含路径、日期和时间戳
 log_file_name = f'./log/AgingTest_log_{current_date}_{timestamp}.txt'
+# 逐轮测试结果文件（JSON Lines），内存中只保留各端口的汇总
+result_file_name = f'./log/AgingTest_results_{current_date}_{timestamp}.jsonl'
+# 检查点文件，定期保存测试状态，程序崩溃或关闭界面后可从中断处继续
+checkpoint_file_name = './log/AgingTest_checkpoint.json'
 
 # 创建一个文件处理器，用于将日志写入文件
 file_handler = logging.FileHandler(log_file_name)
@@ -42,7 +54,9 @@ logger.addHandler(stream_handler)
 
 fail_port_list = set()
 class AgingTest:
-    
+    # 预编译的手势请求帧，所有端口的测试实例共享：(节点ID, 手势, 速度) -> 6条PreparedCommand
+    prepared_gestures = {}
+
     def __init__(self):
         """
         初始化AgeTest类的实例。
@@ -53,8 +67,10 @@ class AgingTest:
         self.node_id = 2
         self.port = 'PCAN_USBBUS1'
         self.ADDRESS_MASTER = 0x01
-        self.can_interface_instance = None
+        self.session = None
         self.serial_api_instance = None
+        self.snapshot_supported = True  # 固件是否支持HAND_CMD_SET_CUSTOM，不支持时退回逐指读取
+        self.settle_supported = True  # 固件是否支持HAND_CMD_GET_FINGER_POS_ALL，不支持时退回固定等待
         self.DELAY_MS = 200
         # self.DELAY_MS_FUN = 6000
         self.POS_MAX_LOSS = 200
@@ -65,53 +81,72 @@ class AgingTest:
         self.initial_gesture = [[26069, 31499, 36569, 32949, 28966, 62258],[0, 0, 0, 0, 0, 62258]]  # 自然展开手势
         self.grasp_gesture = [[0,  31499, 36569, 32949, 28966, 62258], [26069, 31499, 36569, 32949, 28966, 62258]]
         self.FINGER_POS_TARGET_MAX_LOSS = 32
-        self.max_average_times = 3
+        self.CURRENT_SAMPLE_HZ = 100  # 电流采样频率
+        self.CURRENT_SAMPLE_S = 0.5  # 每次统计电流的采样时长（秒）
+        self.current_stats = []  # 最近一次count_motor_curtent各电机的MotorStats
+        self.finger_positions = []  # 最近一次judge_if_hand_broken读取的各手指位置
         self.current_standard = 100
         
+    def compile_gestures(self):
+        """启动时一次性编译抓握和展开手势，测试过程中只发送预编译的请求帧"""
+        for gesture in self.grasp_gesture + self.initial_gesture:
+            self.prepare_gesture(gesture)
+
+    def prepare_gesture(self, gesture):
+        """将手势编译为6条HAND_SetFingerPos请求帧，同一节点ID、手势和速度在进程内只编译一次"""
+        key = (self.node_id, tuple(gesture), self.DEFAULT_SPEED)
+        prepared = self.prepared_gestures.get(key)
+        if prepared is None:
+            prepared = tuple(
+                self.serial_api_instance.HAND_PrepareCmd(
+                    self.node_id, HAND_CMD_SET_FINGER_POS, (finger_id, gesture[finger_id], self.DEFAULT_SPEED)
+                )
+                for finger_id in range(MAX_MOTOR_CNT)
+            )
+            self.prepared_gestures[key] = prepared
+        return prepared
+
     def do_gesture(self, gesture):
+        prepared = self.prepare_gesture(gesture)
         for finger_id in range(MAX_MOTOR_CNT):
+            CONTROL.checkpoint()  # 停止时在两条命令之间立即中断手势，暂停时在此等待恢复
             remote_err = []
-            err = self.serial_api_instance.HAND_SetFingerPos(
-                    self.node_id, finger_id, 
-                    gesture[finger_id],          # 测试变量位置值
-                    self.DEFAULT_SPEED,  # 速度固定为默认值
-                    remote_err
-                )
+            # 预编译的请求帧直接发送，不再重复校验参数、打包和计算LRC
+            err = self.serial_api_instance.HAND_SendPrepared(prepared[finger_id], remote_err)
         return err == HAND_RESP_SUCCESS
     
-    def count_motor_curtent(self):
+    def wait_settled(self, gesture, timeout):
         """
-        计算各电机电流限制的平均值
-        返回：各手指（MAX_MOTOR_CNT个）的电流限制平均值列表
+        等待手指到达手势位置并停止运动，代替按最慢情况设置的固定等待，最多等待timeout毫秒。
+        第六指写入<728时按728判断。固件不支持HAND_CMD_GET_FINGER_POS_ALL时退回固定等待。
+        返回是否在超时前到位，超时不代表失败，由之后的判断决定
         """
-        sum_currents = [0.0] * MAX_MOTOR_CNT  # 用float避免整数除法精度丢失
-        average_times = self.max_average_times if self.max_average_times > 0 else 1  # 防止除以0
-        delay_milli_seconds_impl(self.DELAY_MS*5)
-        # 循环采集电流限制值并累加
-        for i in range(average_times):
-            for finger_id in range(MAX_MOTOR_CNT):
-                delay_milli_seconds_impl(self.DELAY_MS)  # 缩短采集间隔
-                current_limit = [0]
-                err, current_limit_get = self.serial_api_instance.HAND_GetFingerCurrent(
-                    self.node_id,
-                    finger_id,
-                    current_limit,
-                    []
-                )
-                # 仅当采集成功时累加（排除错误数据）
-                if err == HAND_RESP_SUCCESS:
-                    # 兼容current_limit_get是列表/单个值的情况
-                    current_val = current_limit_get[0] if isinstance(current_limit_get, list) else current_limit_get
-                    sum_currents[finger_id] += current_val
-                else:
-                    logger.warning(f"端口{self.port} 手指{finger_id} 第{i+1}次采集电流失败，错误码:{err}")
+        targets = list(gesture[:MAX_MOTOR_CNT])
+        targets[-1] = max(targets[-1], self.SIXTH_FINGER_MIN_POS)
+        if self.settle_supported:
+            start = get_milli_seconds_impl()
+            err, _ = self.serial_api_instance.HAND_WaitUntilSettled(self.node_id, targets, self.POS_MAX_LOSS, timeout)
+            if err != HAND_RESP_HAND_ERROR:
+                return err == HAND_RESP_SUCCESS
+            self.settle_supported = False
+            timeout -= get_milli_seconds_impl() - start
+        CONTROL.delay_ms(max(timeout, 0))
+        return False
 
-         # 计算平均值 + 四舍五入保留三位小数（核心修改）
-        self.motor_currents = [round(sum_val / average_times, 3) for sum_val in sum_currents]
-        
-        # 日志输出（格式统一）
-        # formatted_currents = [f"{c:.3f}" for c in self.motor_currents]
-        # logger.info(f"端口{self.port} 电机电流平均值: [{', '.join(formatted_currents)}] mA")
+    def count_motor_curtent(self):
+        """
+        以CURRENT_SAMPLE_HZ的频率采集CURRENT_SAMPLE_S秒全部电机电流，在线统计均值、标准差、最小/最大值和P95，
+        不保存原始样本。返回：各手指（MAX_MOTOR_CNT个）的电流平均值列表，完整统计见self.current_stats
+        """
+        self.wait_settled(self.grasp_gesture[-1], self.DELAY_MS*5)
+        sampler = CurrentSampler(self.read_finger_currents, rate_hz=self.CURRENT_SAMPLE_HZ, sleep=CONTROL.sleep)
+        self.current_stats = sampler.run(duration_s=self.CURRENT_SAMPLE_S)
+        for finger_id, stats in enumerate(self.current_stats):
+            if stats.failures:
+                logger.warning(f"端口{self.port} 手指{finger_id} 采集电流失败 {stats.failures}/{sampler.ticks} 次")
+        logger.debug(f"端口{self.port} 电机电流统计: {[stats.summary() for stats in self.current_stats]}")
+        motor_currents = [round(stats.mean, 3) for stats in self.current_stats]
+        self.motor_currents = motor_currents
         return self.motor_currents
                 
     def check_current(self, curs):
@@ -125,14 +160,15 @@ class AgingTest:
     def set_max_current(self):
         value = [200]*MAX_MOTOR_CNT
         for finger_id in range(MAX_MOTOR_CNT):
+            CONTROL.checkpoint()
             remote_err = []
-            delay_milli_seconds_impl(self.DELAY_MS*5)
+            CONTROL.delay_ms(self.DELAY_MS*5)
             err = self.serial_api_instance.HAND_SetFingerCurrentLimit(
                     self.node_id, finger_id, 
                     value[finger_id], 
                     remote_err
                 )
-            delay_milli_seconds_impl(self.DELAY_MS)
+            CONTROL.delay_ms(self.DELAY_MS)
             return  err == HAND_RESP_SUCCESS
 
     def get_HAND_FingerPos(self,serial_api_instance,finger_id):
@@ -141,6 +177,40 @@ class AgingTest:
         current_pos = [0]
         return serial_api_instance.HAND_GetFingerPos(self.node_id, finger_id, target_pos, current_pos, [])
 
+    def read_finger_positions(self):
+        """
+        读取全部手指的当前位置：优先通过HAND_GetSnapshot一次事务读取，
+        固件不支持定制命令时退回逐指HAND_ReadFingerPos。读取失败的手指为None
+        """
+        if self.snapshot_supported:
+            err, snapshot = self.serial_api_instance.HAND_GetSnapshot(self.node_id, fields=SUB_CMD_GET_POS, remote_err=[])
+            if err == HAND_RESP_SUCCESS and len(snapshot.pos) >= MAX_MOTOR_CNT:
+                return list(snapshot.pos[:MAX_MOTOR_CNT])
+            if err in (HAND_RESP_HAND_ERROR, HAND_RESP_DATA_INVALID):
+                self.snapshot_supported = False
+        positions = []
+        for finger_id in range(MAX_MOTOR_CNT):
+            result = self.serial_api_instance.HAND_ReadFingerPos(self.node_id, finger_id)
+            positions.append(result.current_pos if result.ok else None)
+        return positions
+
+    def read_finger_currents(self):
+        """
+        读取全部手指的电机电流：优先通过HAND_GetSnapshot一次事务读取，
+        固件不支持定制命令时退回逐指HAND_ReadFingerCurrent。读取失败的手指为None
+        """
+        if self.snapshot_supported:
+            err, snapshot = self.serial_api_instance.HAND_GetSnapshot(self.node_id, fields=SUB_CMD_GET_CURRENT, remote_err=[])
+            if err == HAND_RESP_SUCCESS and len(snapshot.current) >= MAX_MOTOR_CNT:
+                return list(snapshot.current[:MAX_MOTOR_CNT])
+            if err in (HAND_RESP_HAND_ERROR, HAND_RESP_DATA_INVALID):
+                self.snapshot_supported = False
+        currents = []
+        for finger_id in range(MAX_MOTOR_CNT):
+            result = self.serial_api_instance.HAND_ReadFingerCurrent(self.node_id, finger_id)
+            currents.append(result.current if result.ok else None)
+        return currents
+
     def judge_if_hand_broken(self, gesture):
         """
         判断设备是否损坏。
@@ -151,29 +221,30 @@ class AgingTest:
         :param gesture: 用于对比的手势数据。
         :return: 一个布尔值，表示设备是否损坏。
         """
-        delay_milli_seconds_impl(self.DELAY_MS*6)
+        self.wait_settled(gesture, self.DELAY_MS*6)
         is_broken = False
+        positions = self.read_finger_positions()
+        self.finger_positions = positions
         for finger_id in range(MAX_MOTOR_CNT):
-            # delay_milli_seconds_impl(self.DELAY_MS)
-            value = self.get_HAND_FingerPos(self.serial_api_instance,finger_id)
-            if value[0] == HAND_RESP_SUCCESS:
+            current_pos = positions[finger_id]
+            if current_pos is not None:
                 if finger_id == MAX_MOTOR_CNT-1:
                     # 第六指特殊逻辑：写入<728时，读取值应为728；否则校验与写入值一致
                     if gesture[finger_id] < self.SIXTH_FINGER_MIN_POS:
-                        if value[2] == self.SIXTH_FINGER_MIN_POS:
+                        if current_pos == self.SIXTH_FINGER_MIN_POS:
                             continue
                         else:
                             is_broken = True
                             break
                     else:
-                        if abs(value[2] - gesture[finger_id]) < self.POS_MAX_LOSS:
+                        if abs(current_pos - gesture[finger_id]) < self.POS_MAX_LOSS:
                             continue
                         else:
                             is_broken = True
                             break
                 else:
                         # 其他手指：常规容差校验
-                        if abs(value[2] - gesture[finger_id]) <self.POS_MAX_LOSS:
+                        if abs(current_pos - gesture[finger_id]) <self.POS_MAX_LOSS:
                             continue
                         else:
                             is_broken = True
@@ -186,62 +257,35 @@ class AgingTest:
     def connect_device(self):
         connect_status = True
         try:
-            port_num = port_num = int(re.findall(r'\d+', self.port)[0])
-            self.can_interface_instance = CAN_Init(port_name=port_num, baudrate=1000000)
-            if self.can_interface_instance is None:
-                connect_status = False
+            # 从进程内会话池借用通道：多轮测试和多个脚本复用同一个已打开的PCAN通道及其接收线程，
+            # 不再每轮打开和关闭
+            self.session = TRANSPORTS.acquire_can(self.port, baudrate=1000000)
+            if self.session is None:
                 logger.info("port init failed\n")
-            protocol = HAND_PROTOCOL_UART
-            self.serial_api_instance = OHandSerialAPI(self.can_interface_instance, protocol, self.ADDRESS_MASTER,
-                                                    send_data_impl,
-                                                    recv_data_impl)
-            self.serial_api_instance.HAND_SetTimerFunction(get_milli_seconds_impl, delay_milli_seconds_impl)
+                return False
+            # 同一节点ID在会话内复用同一个API实例，应答由会话的接收线程分发
+            self.serial_api_instance = self.session.open_node(self.node_id)
+            # 节点API内部的等待（如HAND_WaitUntilSettled的轮询间隔）在停止测试时立即中断
+            self.serial_api_instance.HAND_SetTimerFunction(get_milli_seconds_impl, CONTROL.delay_ms)
             self.serial_api_instance.HAND_SetCommandTimeOut(255)
+            # 按实测往返时间设置每个命令的超时（上限255ms），掉线的手不再每个手指都等满255ms
+            self.serial_api_instance.HAND_SetAdaptiveTimeout(True)
+            self.compile_gestures()
         except Exception as e:
             logger.info(f"\n初始化异常: {str(e)}")
             connect_status = False
         return connect_status
 
     def disConnect_device(self):
-        if self.serial_api_instance and hasattr(self.serial_api_instance, "shutdown"):  # 检查是否有自定义关闭方法
-            try:
-                self.serial_api_instance.shutdown()
-                self.serial_api_instance = None
-                logger.info("API shutdown successfully")
-                
-            except Exception as e:
-                logger.error(f"Error during API shutdown: {e}")
-
-        if self.can_interface_instance and hasattr(self.can_interface_instance, "shutdown"):
-            try:
-                self.can_interface_instance.shutdown()
-                self.can_interface_instance = None
-                logger.info("CAN bus connection closed")
-            except Exception as e:
-                logger.error(f"Error closing CAN bus: {e}")
-
-def read_from_json_file():
-        """
-        从json文件读取标志位，判断是否继续执行测试
-        Returns:
-            返回fasle则终止测试，true继续测试
-        """
-        try:
-            with open('shared_data.json', 'r') as f:
-                data = json.load(f)
-                stop_test = data['stop_test']
-                pause_test = data['pause_test']
-                return stop_test,pause_test
-        except FileNotFoundError:
-            # logger.error("共享的json文件不存在")
-            return False,False
-        except json.JSONDecodeError:
-            # logger.error("json文件数据格式错误")
-            return False,False
-        except Exception as e:
-            # logger.error(f"读取JSON文件时出现其他未知错误: {e}")
-            return False, False
+        """归还会话，通道保持打开供下一轮使用"""
+        if self.session is not None:
+            TRANSPORTS.release(self.port)
+            self.session = None
+            self.serial_api_instance = None
+
 
+CURRENT_TREND_WINDOW = 100  # 电流趋势按每多少轮求一次平均
+STORE_ROWS_PER_PORT = 10000  # ResultStore每个端口最多保存的行数（约0.7MB），超过后按轮次均匀降采样
 test_title = '老化测试报告\n标准：各个手头无异常，手指不脱线，并记录各个电机的电流值 < 单位 mA >'
 expected = [100, 100, 100, 100, 100, 100]
 description = '重复抓握手势,记录各个电机的电流值'  # 用例描述
@@ -279,107 +323,165 @@ def check_port(valid_port: set = {}, total_port: list = {}, node_ids: list = [])
     result_ports = [total_port[i] for i in valid_indices]
     return result_ports, result_node_ids
 
-def main(ports: list = [], node_ids: list = [], aging_duration: float = 1.5) -> Tuple[str, List, str, bool]:
+def main(ports: list = [], node_ids: list = [], aging_duration: float = 1.5, worker_processes: int = 0,
+         resume: Optional[dict] = None) -> Tuple[str, List, str, bool]:
     """
     测试的主函数。
     :param ports: 端口列表
     :param node_ids: 设备id列表,与端口号一一对应
+    :param worker_processes: >0时把端口分给该数目的子进程运行（ProcessRunner），0为本进程内每台设备一个线程
+    :param resume: load_checkpoint()返回的检查点状态，从中断处继续测试，端口、时长和已完成的轮次取自检查点
     :return: 测试标题,测试结果数据,测试结论,是否需要显示电机电流(false)
     """
-    overall_result = []
-    final_result = '通过'
+    checkpoint = RunCheckpoint(checkpoint_file_name)
+    elapsed_s = 0
+    if resume:
+        ports, node_ids = list(resume['ports']), list(resume['node_ids'])
+        aging_duration = resume['aging_duration']
+        elapsed_s = resume['elapsed_s']
+        fail_port_list.update(resume['quarantined'])
+        final_result = resume['final_result']
+        sink = ResultSink.resume(resume['sink'], store=ResultStore(max_rows_per_port=STORE_ROWS_PER_PORT))
+    else:
+        # 每轮结果写入文件，内存中只保留各端口汇总，电流和位置按列存入有上限的ResultStore用于统计变化趋势
+        sink = ResultSink(result_file_name, store=ResultStore(max_rows_per_port=STORE_ROWS_PER_PORT))
+        final_result = '通过'
+    run_start = time.time()
+
+    def run_state():
+        return {
+            'ports': ports,
+            'node_ids': node_ids,
+            'aging_duration': aging_duration,
+            'elapsed_s': elapsed_s + time.time() - run_start,
+            'quarantined': sorted(fail_port_list),
+            'final_result': final_result,
+            'sink': sink.state(),
+        }
+
     start_time = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     logger.info(f'---------------------------------------------开始老化测试<开始时间：{start_time}>----------------------------------------------\n')
+    if resume:
+        logger.info(f'从检查点继续测试，已运行 {elapsed_s / SECONDS_PER_HOUR:.2f} 小时，结果继续写入{sink.path}')
     logger.info('测试目的：循环做抓握手势，进行压测')
     logger.info('标准：各个手头无异常，手指不脱线，并记录各个电机的电流值 < 单位 mA >\n')
+    interrupted = False
     try:
-        end_time = time.time() + aging_duration * SECONDS_PER_HOUR
-        round_num = 0
-        while time.time() < end_time:
-            ports,node_ids = check_port(valid_port=fail_port_list,total_port=ports,node_ids=node_ids)
-            if len(ports)==0:
-                logger.info('无可测试设备')
-                break
-            round_num += 1
-            logger.info(f"##########################第 {round_num} 轮测试开始######################\n")
-            result = '通过'
-            stop_test,pause_test = read_from_json_file()
-            if stop_test:
-                logger.info('测试已停止')
-                break
-                
-            if pause_test:
-                logger.info('测试暂停')
-                time.sleep(2)
+        end_time = run_start + aging_duration * SECONDS_PER_HOUR - elapsed_s
+        checkpoint.save(run_state())
+        ports,node_ids = check_port(valid_port=fail_port_list,total_port=ports,node_ids=node_ids)
+        if len(ports)==0:
+            logger.info('无可测试设备')
+        # 每台设备一个常驻线程循环执行测试轮次，先完成的设备直接开始下一轮，结果按完成顺序汇总
+        if worker_processes > 0:
+            runner = ProcessRunner(__name__, processes=worker_processes, control=CONTROL, log=logger)
+        else:
+            runner = DeviceRunner(create_test, run_port_round, control=CONTROL, should_retire=should_retire, log=logger)
+        if FARM.owns_any(ports):
+            # 其他主机上的端口（"代理名/端口"）由对应的代理运行，结果与本机端口合并
+            runner = FARM.runner(__name__, local_runner=runner, processes=worker_processes, log=logger)
+        # 续测时各端口从检查点记录的轮次接着编号
+        for record in runner.run(zip(ports, node_ids), end_time, sink.last_rounds()):
+            result = sink.add(record)
+            if checkpoint.due():
+                checkpoint.save(run_state())
+            if not record.connected:
+                logger.info(f"[port = {record.port}]设备连接失败，稍后重试\n")
                 continue
-
-            round_results = []
-            with concurrent.futures.ThreadPoolExecutor(max_workers=64) as executor:
-                futures = [executor.submit(test_single_port, port, node_id) for port, node_id in zip(ports, node_ids)]
-                for future in concurrent.futures.as_completed(futures):
-                    port_result, _ = future.result()
-                    round_results.append(port_result)
-                    for gesture_result in port_result["gestures"]:
-                        if gesture_result["result"]!= "通过":
-                            result = '不通过'
-                            final_result = '不通过'
-                            break
-            overall_result.extend(round_results)
-            
-            logger.info(f"#################第 {round_num} 轮测试结束，测试结果：{result}#############\n")
+            if result != '通过':
+                final_result = '不通过'
+            logger.info(f"#################[port = {record.port}]第 {record.round_num} 轮测试结束，测试结果：{result}#############\n")
+        interrupted = CONTROL.stopped and CONTROL.resumable
     except Exception as e:
         final_result = '不通过'
+        interrupted = True
         logger.error(f"Error: {e}")
     # finally:
     #     logger.info("执行测试结束后的清理操作（如有）")
+    if interrupted:
+        checkpoint.save(run_state())
+        logger.info(f'测试未完成，检查点已保存至{checkpoint.path}，下次启动可继续测试')
+    else:
+        checkpoint.finish()
     end_time = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     logger.info(f'---------------------------------------------老化测试结束，测试结果：{final_result}<结束时间：{end_time}>----------------------------------------------\n')
+    sink.close()
+    overall_result = sink.results()
+    logger.info(f'各轮测试结果已保存至{sink.path}')
     print_overall_result(overall_result)
+    print_current_trend(sink.store)
     return test_title, overall_result, False
 
-def test_single_port(port, node_id):
-    """
-    针对单个端口进行测试，返回该端口测试结果的字典，包含端口号、是否通过及具体手势测试结果等信息。
-    """
+def load_checkpoint():
+    """返回上次未完成测试的检查点状态，没有时返回None；界面据此询问是否继续，并作为main(resume=...)传入"""
+    return RunCheckpoint(checkpoint_file_name).load()
+
+def discard_checkpoint():
+    """放弃继续上次未完成的测试"""
+    RunCheckpoint(checkpoint_file_name).finish()
+
+def should_retire(port):
+    return port in fail_port_list
+
+def create_test(port, node_id):
     aging_test = AgingTest()
     aging_test.port = port
     aging_test.node_id = node_id
-    
-    connected_status = aging_test.connect_device()
-    
+    return aging_test
+
+def run_port_round(aging_test):
+    """
+    在已连接的测试实例上执行一轮老化测试，返回该端口本轮测试结果的字典，包含端口号及具体手势测试结果等信息。
+    """
+    port = aging_test.port
     port_result = {
         'port': port,
         'gestures': []
     }
-    
-    if connected_status:
-        timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        grasp_gesture = aging_test.grasp_gesture
-        initial_gesture = aging_test.initial_gesture
-        try:
-            if aging_test.set_max_current(): # 设置最大的电量限制为200ma
-                if aging_test.do_gesture(grasp_gesture[0]) and aging_test.do_gesture(grasp_gesture[1]):
-                    aging_test.count_motor_curtent()
-                    logger.info(f'[port = {port}]执行抓握手势，电机电流为 -->{aging_test.motor_currents}\n')
-                if aging_test.do_gesture(initial_gesture[0]) and aging_test.do_gesture(initial_gesture[1]):
-                    if not aging_test.judge_if_hand_broken(initial_gesture[1]):
-                        motor_currents = aging_test.motor_currents
-                        if aging_test.check_current(motor_currents):
-                            gesture_result = build_gesture_result(timestamp =timestamp,content=motor_currents,result='通过',comment='无')
-                        else:
-                            gesture_result = build_gesture_result(timestamp =timestamp,content=motor_currents,result='不通过',comment='电流超标')
+    timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    grasp_gesture = aging_test.grasp_gesture
+    initial_gesture = aging_test.initial_gesture
+    try:
+        if aging_test.set_max_current(): # 设置最大的电量限制为200ma
+            if aging_test.do_gesture(grasp_gesture[0]) and aging_test.do_gesture(grasp_gesture[1]):
+                aging_test.count_motor_curtent()
+                logger.info(f'[port = {port}]执行抓握手势，电机电流为 -->{aging_test.motor_currents}\n')
+            if aging_test.do_gesture(initial_gesture[0]) and aging_test.do_gesture(initial_gesture[1]):
+                if not aging_test.judge_if_hand_broken(initial_gesture[1]):
+                    motor_currents = aging_test.motor_currents
+                    if aging_test.check_current(motor_currents):
                         gesture_result = build_gesture_result(timestamp =timestamp,content=motor_currents,result='通过',comment='无')
                     else:
-                        gesture_result = build_gesture_result(timestamp =timestamp,content='',result='不通过',comment='手指出现异常')
+                        gesture_result = build_gesture_result(timestamp =timestamp,content=motor_currents,result='不通过',comment='电流超标')
+                    gesture_result = build_gesture_result(timestamp =timestamp,content=motor_currents,result='通过',comment='无')
+                    gesture_result['positions'] = aging_test.finger_positions
                 else:
                     gesture_result = build_gesture_result(timestamp =timestamp,content='',result='不通过',comment='手指出现异常')
+                    gesture_result['positions'] = aging_test.finger_positions
             else:
-                gesture_result = build_gesture_result(timestamp =timestamp,content='',result='不通过',comment='设置手指最大电流失败')
-                    
-            port_result['gestures'].append(gesture_result)
-        except Exception as e:
-            error_gesture_result = build_gesture_result(timestamp =timestamp,content='',result='不通过',comment=f'出现错误：{e}')
-            port_result['gestures'].append(error_gesture_result)
+                gesture_result = build_gesture_result(timestamp =timestamp,content='',result='不通过',comment='手指出现异常')
+        else:
+            gesture_result = build_gesture_result(timestamp =timestamp,content='',result='不通过',comment='设置手指最大电流失败')
+
+        port_result['gestures'].append(gesture_result)
+    except Exception as e:
+        error_gesture_result = build_gesture_result(timestamp =timestamp,content='',result='不通过',comment=f'出现错误：{e}')
+        port_result['gestures'].append(error_gesture_result)
+    return port_result
+
+def test_single_port(port, node_id):
+    """
+    针对单个端口进行一轮测试（连接、测试、断开），返回该端口测试结果的字典及是否连接成功。
+    """
+    aging_test = create_test(port, node_id)
+    connected_status = aging_test.connect_device()
+    port_result = {
+        'port': port,
+        'gestures': []
+    }
+    if connected_status:
+        try:
+            port_result = run_port_round(aging_test)
         finally:
             aging_test.disConnect_device()
     return port_result,connected_status
@@ -409,6 +511,23 @@ def print_overall_result(overall_result):
             for timestamp, description, expected, content, result, comment in data_list:
                 logger.info(f" timestamp:{timestamp} ,description:{description},expected:{expected},content: {content}, Result: {result},comment:{comment}")
                 
+def print_current_trend(store, window=CURRENT_TREND_WINDOW):
+        """
+        按端口输出各电机电流的整体统计，以及约每window轮的平均电流，用于观察老化过程中电流的变化。
+        长时间测试降采样后统计基于每stride轮保存的一轮
+        """
+        for port, summary in store.summary().items():
+            columns = store.port(port)
+            stride = summary['stride']
+            sampled = f"（每{stride}轮保存一轮）" if stride > 1 else ""
+            logger.info(f"Port: {port}, 共{summary['rows']}条记录{sampled}，不通过{summary['failures']}条")
+            rows = max(1, window // stride)
+            for motor, current in enumerate(summary['currents']):
+                if not current['count']:
+                    continue
+                trend = ', '.join(f'{mean:.1f}' for mean in columns.current_trend(motor, rows))
+                logger.info(f" motor {motor}: mean={current['mean']:.1f}mA, min={current['min']:.1f}mA, max={current['max']:.1f}mA, 每{rows * stride}轮均值: [{trend}]")
+
 if __name__ == "__main__":
     ports = ['PCAN_USBBUS1']
     node_ids = [2]
@@ -1,5 +1,4 @@
 import datetime
-import json
 import logging
 import concurrent.futures
 import os
@@ -7,7 +6,8 @@ import sys
 import time
 from typing import List, Optional, Tuple
 from pymodbus import FramerType
-from pymodbus.client import ModbusSerialClient
+from run_control import CONTROL, StopRequested
+from transport_pool import TRANSPORTS
 from pymodbus.exceptions import ConnectionException, ModbusIOException
 
 # 设置日志级别为INFO，获取日志记录器实例
@@ -107,6 +107,7 @@ class AgingTest:
         self.port = 'COM4'
         self.FRAMER_TYPE = FramerType.RTU
         self.BAUDRATE = 115200
+        self.session = None
         self.client = None
         self.ROH_FINGER_POS_TARGET0 = 1135
         self.ROH_FINGER_CURRENT0 = 1105
@@ -149,6 +150,7 @@ class AgingTest:
         :param value: 要写入的值。
         :return: 如果写入成功则返回True，否则返回False。
         """
+        CONTROL.checkpoint()  # 停止时在两次写寄存器之间立即中断，暂停时在此等待恢复
         try:
             response = self.client.write_registers(address, value, self.node_id)
             if not response.isError():
@@ -169,7 +171,7 @@ class AgingTest:
         :param gesture: 要执行的手势数据。
         :return: 调用write_to_regesister方法的结果，即写入是否成功的布尔值。
         """
-        time.sleep(self.aging_speed) # 防止大拇指和食指打架，值需要大于0.4
+        CONTROL.sleep(self.aging_speed) # 防止大拇指和食指打架，值需要大于0.4
         return self.write_to_regesister(address=self.ROH_FINGER_POS_TARGET0, value=gesture)
     
     def count_motor_curtent(self):
@@ -195,7 +197,7 @@ class AgingTest:
             else:
                 currents_list = currents.registers if currents else []
                 sum_currents = [sum_currents[j] + currents_list[j] for j in range(len(sum_currents))]
-                time.sleep(0.2)
+                CONTROL.sleep(0.2)
         ave_currents = [sum_currents[k] / self.max_average_times for k in range(len(sum_currents))]
         self.motor_currents = ave_currents
 
@@ -246,14 +248,17 @@ class AgingTest:
         """
         连接到Modbus设备。
 
-        创建ModbusSerialClient实例并尝试连接到指定端口的设备，根据连接结果记录日志并返回连接是否成功的布尔值。
+        从进程内会话池借用指定端口的Modbus连接（多轮测试复用同一个已打开的串口），根据结果记录日志并返回连接是否成功的布尔值。
 
         :return: 一个布尔值，表示是否成功连接到设备。
         """
         connect_status = False
         try:
-            self.client = ModbusSerialClient(port=self.port, framer=self.FRAMER_TYPE, baudrate=self.BAUDRATE)
-            connect_status = self.client.connect()
+            self.session = TRANSPORTS.acquire_modbus(self.port, baudrate=self.BAUDRATE)
+            if self.session is None:
+                raise ConnectionException("Could not connect to Modbus device.")
+            self.client = self.session.client
+            connect_status = True
             logger.info(f"[port = {self.port}]Successfully connected to Modbus device.\n")
         except ConnectionException as e:
             logger.error(f"Error during setup[port = {self.port}]: {e}\n")
@@ -265,37 +270,17 @@ class AgingTest:
         """
         断开与Modbus设备的连接。
 
-        如果存在client实例则关闭连接并将client设置为None，同时记录日志，如果出现异常也会记录。
+        将连接归还会话池（串口保持打开供下一轮使用）并将client设置为None，同时记录日志，如果出现异常也会记录。
         """
-        if self.client:
+        if self.session:
             try:
-                self.client.close()
+                TRANSPORTS.release(self.port)
+                self.session = None
                 self.client = None
-                logger.info(f"[port = {self.port}]Connection to Modbus device closed.\n")
+                logger.info(f"[port = {self.port}]Modbus connection returned to pool.\n")
             except Exception as e:
                 logger.error(f"[port = {self.port}]Error during dis connect device: {e}\n")
 
-def read_from_json_file():
-        """
-        从json文件读取标志位，判断是否继续执行测试
-        Returns:
-            返回fasle则终止测试，true继续测试
-        """
-        try:
-            with open('shared_data.json', 'r') as f:
-                data = json.load(f)
-                stop_test = data['stop_test']
-                pause_test = data['pause_test']
-                return stop_test,pause_test
-        except FileNotFoundError:
-            # logger.error("共享的json文件不存在")
-            return False,False
-        except json.JSONDecodeError:
-            # logger.error("json文件数据格式错误")
-            return False,False
-        except Exception as e:
-            # logger.error(f"读取JSON文件时出现其他未知错误: {e}")
-            return False, False
 
 test_title = '老化测试报告\n标准：各个手头无异常，手指不脱线，并记录各个电机的电流值 < 单位 mA >'
 expected = [100, 100, 100, 100, 100, 100]
@@ -351,6 +336,13 @@ def main(ports: list = [], node_ids: list = [], aging_duration: float = 1.5) ->
         end_time = time.time() + aging_duration * SECONDS_PER_HOUR
         round_num = 0
         while time.time() < end_time:
+            # 轮次之间检查停止/暂停：暂停时阻塞在恢复事件上，恢复或停止后继续
+            if CONTROL.paused:
+                logger.info('测试暂停')
+                CONTROL.resume_event.wait()
+            if CONTROL.stopped:
+                logger.info('测试已停止')
+                break
             ports,node_ids = check_port(valid_port=fail_port_list,total_port=ports,node_ids=node_ids)
             if len(ports)==0:
                 logger.info('无可测试设备')
@@ -358,16 +350,6 @@ def main(ports: list = [], node_ids: list = [], aging_duration: float = 1.5) ->
             round_num += 1
             logger.info(f"##########################第 {round_num} 轮测试开始######################\n")
             result = '通过'
-            stop_test,pause_test = read_from_json_file()
-            if stop_test:
-                logger.info('测试已停止')
-                break
-                
-            if pause_test:
-                logger.info('测试暂停')
-                time.sleep(2)
-                continue
-
             round_results = []
             with concurrent.futures.ThreadPoolExecutor(max_workers=64) as executor:
                 futures = [executor.submit(test_single_port, port, node_id) for port, node_id in zip(ports, node_ids)]
@@ -382,6 +364,8 @@ def main(ports: list = [], node_ids: list = [], aging_duration: float = 1.5) ->
             overall_result.extend(round_results)
             
             logger.info(f"#################第 {round_num} 轮测试结束，测试结果：{result}#############\n")
+    except StopRequested:
+        logger.info('测试已停止')
     except Exception as e:
         final_result = '不通过'
         logger.error(f"Error: {e}")
@@ -1,14 +1,20 @@
 import datetime
-import json
 import logging
 import os
 import re
 import sys
 import time
 import concurrent.futures
-from typing import List, Tuple
-from OHandSerialAPI import HAND_RESP_SUCCESS, HAND_PROTOCOL_UART, MAX_MOTOR_CNT, MAX_THUMB_ROOT_POS, MAX_FORCE_ENTRIES, OHandSerialAPI
+from typing import List, Optional, Tuple
+from OHandSerialAPI import HAND_CMD_SET_FINGER_POS, HAND_RESP_SUCCESS, HAND_PROTOCOL_UART, MAX_MOTOR_CNT, MAX_THUMB_ROOT_POS, MAX_FORCE_ENTRIES, HAND_RESP_DATA_INVALID, HAND_RESP_HAND_ERROR, SUB_CMD_GET_POS, OHandSerialAPI
 from can_interface import *
+from run_control import CONTROL
+from transport_pool import TRANSPORTS
+from device_runner import DeviceRunner
+from process_runner import ProcessRunner
+from farm import FARM
+from result_sink import ResultSink
+from checkpoint import RunCheckpoint
 
 # 设置日志级别为INFO，获取日志记录器实例
 logger = logging.getLogger(__name__)
@@ -25,6 +31,10 @@ timestamp = str(int(time.time()))
 current_date = time.strftime("%Y-%m-%d", time.localtime())
 # 构建完整的文件名，包含路径、日期和时间戳
 log_file_name = f'./log/GestureStressTest_log_{current_date}_{timestamp}.txt'
+# 逐轮测试结果文件（JSON Lines），内存中只保留各端口的汇总
+result_file_name = f'./log/GestureStressTest_results_{current_date}_{timestamp}.jsonl'
+# 检查点文件，定期保存测试状态，程序崩溃或关闭界面后可从中断处继续
+checkpoint_file_name = './log/GestureStressTest_checkpoint.json'
 
 # 创建一个文件处理器，用于将日志写入文件
 file_handler = logging.FileHandler(log_file_name)
@@ -41,12 +51,17 @@ stream_handler = logging.StreamHandler(stream=sys.stdout)
 logger.addHandler(stream_handler)
 
 class GestureStressTest:
+    # 预编译的手势请求帧，所有端口的测试实例共享：(节点ID, 手势, 速度) -> 6条PreparedCommand
+    prepared_gestures = {}
+
     def __init__(self):
         self.node_id = 2
         self.port = 'PCAN_USBBUS1'
         self.ADDRESS_MASTER = 0x01
-        self.can_interface_instance = None
+        self.session = None
         self.serial_api_instance = None
+        self.snapshot_supported = True  # 固件是否支持HAND_CMD_SET_CUSTOM，不支持时退回逐指读取
+        self.settle_supported = True  # 固件是否支持HAND_CMD_GET_FINGER_POS_ALL，不支持时退回固定等待
         self.DELAY_MS = 200
         # self.DELAY_MS_FUN = 6000
         self.POS_MAX_LOSS = 200
@@ -129,62 +144,108 @@ class GestureStressTest:
     def connect_device(self):
         connect_status = True
         try:
-            port_num = port_num = int(re.findall(r'\d+', self.port)[0])
-            self.can_interface_instance = CAN_Init(port_name=port_num, baudrate=1000000)
-            if self.can_interface_instance is None:
-                connect_status = False
+            # 从进程内会话池借用通道：多轮测试和多个脚本复用同一个已打开的PCAN通道及其接收线程，
+            # 不再每轮打开和关闭
+            self.session = TRANSPORTS.acquire_can(self.port, baudrate=1000000)
+            if self.session is None:
                 logger.info("port init failed\n")
-            protocol = HAND_PROTOCOL_UART
-            self.serial_api_instance = OHandSerialAPI(self.can_interface_instance, protocol, self.ADDRESS_MASTER,
-                                                    send_data_impl,
-                                                    recv_data_impl)
-            self.serial_api_instance.HAND_SetTimerFunction(get_milli_seconds_impl, delay_milli_seconds_impl)
+                return False
+            # 同一节点ID在会话内复用同一个API实例，应答由会话的接收线程分发
+            self.serial_api_instance = self.session.open_node(self.node_id)
+            # 节点API内部的等待（如HAND_WaitUntilSettled的轮询间隔）在停止测试时立即中断
+            self.serial_api_instance.HAND_SetTimerFunction(get_milli_seconds_impl, CONTROL.delay_ms)
             self.serial_api_instance.HAND_SetCommandTimeOut(255)
+            # 按实测往返时间设置每个命令的超时（上限255ms），掉线的手不再每个手指都等满255ms
+            self.serial_api_instance.HAND_SetAdaptiveTimeout(True)
+            self.compile_gestures()
         except Exception as e:
             logger.info(f"\n初始化异常: {str(e)}")
             connect_status = False
         return connect_status
 
     def disConnect_device(self):
-        if self.serial_api_instance and hasattr(self.serial_api_instance, "shutdown"):  # 检查是否有自定义关闭方法
-            try:
-                self.serial_api_instance.shutdown()
-                self.serial_api_instance = None
-                logger.info("API shutdown successfully")
-                
-            except Exception as e:
-                logger.error(f"Error during API shutdown: {e}")
-
-        if self.can_interface_instance and hasattr(self.can_interface_instance, "shutdown"):
-            try:
-                self.can_interface_instance.shutdown()
-                self.can_interface_instance = None
-                logger.info("CAN bus connection closed")
-            except Exception as e:
-                logger.error(f"Error closing CAN bus: {e}")
+        """归还会话，通道保持打开供下一轮使用"""
+        if self.session is not None:
+            TRANSPORTS.release(self.port)
+            self.session = None
+            self.serial_api_instance = None
                 
+    def compile_gestures(self):
+        """启动时一次性编译全部手势表，测试过程中只发送预编译的请求帧"""
+        self.prepare_gesture(self.initial_gesture)
+        for gesture in self.gestures.values():
+            for ges in gesture:
+                self.prepare_gesture(ges)
+
+    def prepare_gesture(self, gesture):
+        """将手势编译为6条HAND_SetFingerPos请求帧，同一节点ID、手势和速度在进程内只编译一次"""
+        key = (self.node_id, tuple(gesture), self.DEFAULT_SPEED)
+        prepared = self.prepared_gestures.get(key)
+        if prepared is None:
+            prepared = tuple(
+                self.serial_api_instance.HAND_PrepareCmd(
+                    self.node_id, HAND_CMD_SET_FINGER_POS, (finger_id, gesture[finger_id], self.DEFAULT_SPEED)
+                )
+                for finger_id in range(MAX_MOTOR_CNT)
+            )
+            self.prepared_gestures[key] = prepared
+        return prepared
+
     def do_gesture(self, gesture):
         """
         执行特定的手势动作。
         :param gesture: 要执行的手势数据。
         :return: 调用write_to_regesister方法的结果，即写入是否成功的布尔值。
         """
-        delay_milli_seconds_impl(self.DELAY_MS*5)
+        prepared = self.prepare_gesture(gesture)
         for finger_id in range(MAX_MOTOR_CNT):
+            CONTROL.checkpoint()  # 停止时在两条命令之间立即中断手势，暂停时在此等待恢复
             remote_err = []
-            err = self.serial_api_instance.HAND_SetFingerPos(
-                    self.node_id, finger_id, 
-                    gesture[finger_id],          # 测试变量位置值
-                    self.DEFAULT_SPEED,  # 速度固定为默认值
-                    remote_err
-                )
+            # 预编译的请求帧直接发送，不再重复校验参数、打包和计算LRC
+            err = self.serial_api_instance.HAND_SendPrepared(prepared[finger_id], remote_err)
+        self.wait_settled(gesture, self.DELAY_MS*5)
         return err == HAND_RESP_SUCCESS
+
+    def wait_settled(self, gesture, timeout):
+        """
+        等待手指到达手势位置并停止运动，代替按最慢情况设置的固定等待，最多等待timeout毫秒。
+        第六指写入<728时按728判断。固件不支持HAND_CMD_GET_FINGER_POS_ALL时退回固定等待。
+        返回是否在超时前到位，超时不代表失败，由之后的判断决定
+        """
+        targets = list(gesture[:MAX_MOTOR_CNT])
+        targets[-1] = max(targets[-1], self.SIXTH_FINGER_MIN_POS)
+        if self.settle_supported:
+            start = get_milli_seconds_impl()
+            err, _ = self.serial_api_instance.HAND_WaitUntilSettled(self.node_id, targets, self.POS_MAX_LOSS, timeout)
+            if err != HAND_RESP_HAND_ERROR:
+                return err == HAND_RESP_SUCCESS
+            self.settle_supported = False
+            timeout -= get_milli_seconds_impl() - start
+        CONTROL.delay_ms(max(timeout, 0))
+        return False
     
     def get_HAND_FingerPos(self,serial_api_instance,finger_id):
         target_pos = [0]
         current_pos = [0]
         return serial_api_instance.HAND_GetFingerPos(self.node_id, finger_id, target_pos, current_pos, [])
 
+    def read_finger_positions(self):
+        """
+        读取全部手指的当前位置：优先通过HAND_GetSnapshot一次事务读取，
+        固件不支持定制命令时退回逐指HAND_ReadFingerPos。读取失败的手指为None
+        """
+        if self.snapshot_supported:
+            err, snapshot = self.serial_api_instance.HAND_GetSnapshot(self.node_id, fields=SUB_CMD_GET_POS, remote_err=[])
+            if err == HAND_RESP_SUCCESS and len(snapshot.pos) >= MAX_MOTOR_CNT:
+                return list(snapshot.pos[:MAX_MOTOR_CNT])
+            if err in (HAND_RESP_HAND_ERROR, HAND_RESP_DATA_INVALID):
+                self.snapshot_supported = False
+        positions = []
+        for finger_id in range(MAX_MOTOR_CNT):
+            result = self.serial_api_instance.HAND_ReadFingerPos(self.node_id, finger_id)
+            positions.append(result.current_pos if result.ok else None)
+        return positions
+
     def judge_if_hand_broken(self, gesture):
         """
         判断设备是否损坏。
@@ -195,28 +256,29 @@ class GestureStressTest:
         :param gesture: 用于对比的手势数据。
         :return: 一个布尔值，表示设备是否损坏。
         """
-        delay_milli_seconds_impl(self.DELAY_MS*10)
+        self.wait_settled(gesture, self.DELAY_MS*10)
         is_broken = False
+        positions = self.read_finger_positions()
         for finger_id in range(MAX_MOTOR_CNT):
-            value = self.get_HAND_FingerPos(self.serial_api_instance,finger_id)
-            if value[0] == HAND_RESP_SUCCESS:
+            current_pos = positions[finger_id]
+            if current_pos is not None:
                 if finger_id == MAX_MOTOR_CNT-1:
                     # 第六指特殊逻辑：写入<728时，读取值应为728；否则校验与写入值一致
                     if gesture[finger_id] < self.SIXTH_FINGER_MIN_POS:
-                        if value[2] == self.SIXTH_FINGER_MIN_POS:
+                        if current_pos == self.SIXTH_FINGER_MIN_POS:
                             continue
                         else:
                             is_broken = True
                             break
                     else:
-                        if abs(value[2] - gesture[finger_id]) < self.POS_MAX_LOSS:
+                        if abs(current_pos - gesture[finger_id]) < self.POS_MAX_LOSS:
                             continue
                         else:
                             is_broken = True
                             break
                 else:
                         # 其他手指：常规容差校验
-                        if abs(value[2] - gesture[finger_id]) <self.POS_MAX_LOSS:
+                        if abs(current_pos - gesture[finger_id]) <self.POS_MAX_LOSS:
                             continue
                         else:
                             is_broken = True
@@ -225,35 +287,14 @@ class GestureStressTest:
                 is_broken = False
         return is_broken
     
-def read_from_json_file():
-        """
-        从json文件读取标志位，判断是否继续执行测试
-        Returns:
-            返回fasle则终止测试，true继续测试
-        """
-        try:
-            with open('shared_data.json', 'r') as f:
-                data = json.load(f)
-                stop_test = data['stop_test']
-                pause_test = data['pause_test']
-                return stop_test,pause_test
-        except FileNotFoundError:
-            # logger.error("共享的json文件不存在")
-            return False,False
-        except json.JSONDecodeError:
-            # logger.error("json文件数据格式错误")
-            return False,False
-        except Exception as e:
-            # logger.error(f"读取JSON文件时出现其他未知错误: {e}")
-            return False, False
-    
 test_title = '循环做28个手势，进行压测\n标准：各个手头无异常，手指不脱线'
 expected = []
 description = '循环做28个手势'
 # 定义一个常量用于表示老化测试的时长单位转换（从小时转换为秒）
 SECONDS_PER_HOUR = 3600
 
-def main(ports: list = [], node_ids: list = [], aging_duration: float = 1.5) -> Tuple[str, List, str, bool]:
+def main(ports: list = [], node_ids: list = [], aging_duration: float = 1.5, worker_processes: int = 0,
+         resume: Optional[dict] = None) -> Tuple[str, List, str, bool]:
     """
     测试的主函数。
 
@@ -263,64 +304,102 @@ def main(ports: list = [], node_ids: list = [], aging_duration: float = 1.5) ->
     :param ports: 要连接的设备端口号列表，默认为空列表。
     :param node_ids: 与端口号对应的设备节点ID列表，默认为空列表。
     :param aging_duration: 测试持续时长，默认为1，单位根据具体业务逻辑确定（可能是小时等）。
+    :param worker_processes: 大于0时把端口分给该数目的子进程运行（ProcessRunner），0为本进程内每台设备一个线程。
+    :param resume: load_checkpoint()返回的检查点状态，从中断处继续测试，端口、时长和已完成的轮次取自检查点。
     :return: 包含测试标题、整体测试结果、最终测试结果、是否显示电流的元组。
     """
-    final_result = '通过'
-    overall_result = []
-    connected_status = False
+    checkpoint = RunCheckpoint(checkpoint_file_name)
+    elapsed_s = 0
+    if resume:
+        ports, node_ids = list(resume['ports']), list(resume['node_ids'])
+        aging_duration = resume['aging_duration']
+        elapsed_s = resume['elapsed_s']
+        final_result = resume['final_result']
+        sink = ResultSink.resume(resume['sink'])
+    else:
+        final_result = '通过'
+        sink = ResultSink(result_file_name)  # 每轮结果写入文件，内存中只保留各端口汇总
     need_show_current = False
+    run_start = time.time()
+
+    def run_state():
+        return {
+            'ports': ports,
+            'node_ids': node_ids,
+            'aging_duration': aging_duration,
+            'elapsed_s': elapsed_s + time.time() - run_start,
+            'final_result': final_result,
+            'sink': sink.state(),
+        }
 
     start_time = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     logger.info(f'---------------------------------------------开始老化测试<开始时间：{start_time}>----------------------------------------------\n')
+    if resume:
+        logger.info(f'从检查点继续测试，已运行 {elapsed_s / 3600:.2f} 小时，结果继续写入{sink.path}')
     logger.info('测试目的：循环做28个手势，进行压测')
     logger.info('标准：各个手头无异常，手指不脱线\n')
+    interrupted = False
     try:
-        start_time = time.time()
-        end_time = start_time + aging_duration * 3600
-        # end_time1 = start_time1 + 60
-        round_num = 0
-        while time.time() < end_time:
-            round_num += 1
-            logger.info(f"##########################第 {round_num} 轮测试开始######################\n")
-            result = '通过'
-            stop_test,pause_test = read_from_json_file()
-            if stop_test:
-                logger.info('测试已停止')
-                break
-                
-            if pause_test:
-                logger.info('测试暂停')
-                time.sleep(2)
+        end_time = run_start + aging_duration * 3600 - elapsed_s
+        checkpoint.save(run_state())
+        # 每台设备一个常驻线程循环执行测试轮次，先完成的设备直接开始下一轮，结果按完成顺序汇总
+        if worker_processes > 0:
+            runner = ProcessRunner(__name__, processes=worker_processes, control=CONTROL, log=logger)
+        else:
+            runner = DeviceRunner(create_test, run_port_round, control=CONTROL, log=logger)
+        if FARM.owns_any(ports):
+            # 其他主机上的端口（"代理名/端口"）由对应的代理运行，结果与本机端口合并
+            runner = FARM.runner(__name__, local_runner=runner, processes=worker_processes, log=logger)
+        # 续测时各端口从检查点记录的轮次接着编号
+        for record in runner.run(zip(ports, node_ids), end_time, sink.last_rounds()):
+            result = sink.add(record)
+            if checkpoint.due():
+                checkpoint.save(run_state())
+            if not record.connected:
+                logger.info(f"[port = {record.port}]设备连接失败，稍后重试\n")
                 continue
-            with concurrent.futures.ThreadPoolExecutor(max_workers=64) as executor:
-                futures = [executor.submit(test_single_port, port, node_id, connected_status) for port, node_id in zip(ports, node_ids)]
-                for future in concurrent.futures.as_completed(futures):
-                    port_result, _ = future.result()
-                    overall_result.append(port_result)
-                    for gesture_result in port_result["gestures"]:
-                        if gesture_result["result"]!= "通过":
-                            result = '不通过'
-                            final_result = '不通过'
-                            break
-            logger.info(f"#################第 {round_num} 轮测试结束，测试结果：{result}#############\n")
+            if result != '通过':
+                final_result = '不通过'
+            logger.info(f"#################[port = {record.port}]第 {record.round_num} 轮测试结束，测试结果：{result}#############\n")
+        interrupted = CONTROL.stopped and CONTROL.resumable
     except concurrent.futures.TimeoutError:
         logger.error("测试超时异常，部分任务未能按时完成")
         final_result = '不通过'
     except ConnectionError as conn_err:
         logger.error(f"设备连接出现问题：{conn_err}")
         final_result = '不通过'
+        interrupted = True
     except Exception as e:
         logger.exception("未知异常发生，测试出现错误")
         final_result = '不通过'
+        interrupted = True
     # finally:
     #     # 可以添加资源清理相关操作，比如关闭文件句柄等（如果有相关操作）
     #     logger.info("执行测试结束后的清理操作")
+    if interrupted:
+        checkpoint.save(run_state())
+        logger.info(f'测试未完成，检查点已保存至{checkpoint.path}，下次启动可继续测试')
+    else:
+        checkpoint.finish()
     end_time = datetime.datetime.now().strftime('%Y-m-%d %H:%M:%S')
     logger.info(f'---------------------------------------------老化测试结束，测试结果：{final_result}<结束时间：{end_time}>----------------------------------------------\n')
+    sink.close()
+    overall_result = sink.results()
+    logger.info(f'各轮测试结果已保存至{sink.path}')
     print_overall_result(overall_result)
     return test_title, overall_result, need_show_current
 
 
+def load_checkpoint():
+    """返回上次未完成测试的检查点状态，没有时返回None；界面据此询问是否继续，并作为main(resume=...)传入"""
+    return RunCheckpoint(checkpoint_file_name).load()
+
+
+def discard_checkpoint():
+    """放弃继续上次未完成的测试"""
+    RunCheckpoint(checkpoint_file_name).finish()
+
+
 def build_gesture_result(timestamp, gesture_name, result):
     """
     根据给定的时间戳、手势名称以及测试结果构建手势结果字典。
@@ -335,11 +414,45 @@ def build_gesture_result(timestamp, gesture_name, result):
     }
 
 
-def test_single_port(port, node_id, connected_status):
+def create_test(port, node_id):
     gesture_stress_test = GestureStressTest()
     gesture_stress_test.set_port(port=port)
     gesture_stress_test.set_node_id(node_id=node_id)
+    return gesture_stress_test
+
+def run_port_round(gesture_stress_test):
+    """在已连接的测试实例上依次执行全部手势一轮，返回该端口本轮的测试结果字典"""
+    port = gesture_stress_test.port
+    port_result = {
+        "port": port,
+        "gestures": []
+    }
+    gesture_name = ''
+    try:
+        for gesture_name, gesture in gesture_stress_test.gestures.items():
+            logger.info(f"[port = {port}]执行    ---->  {gesture_name}")
+            timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        
+            # 做新的手势
+            for ges in gesture:
+                gesture_stress_test.do_gesture(gesture=ges) 
+                
+            # 复默认手势
+            default_gesture_result = gesture_stress_test.do_gesture(gesture=gesture_stress_test.initial_gesture) and \
+                                    not gesture_stress_test.judge_if_hand_broken(gesture=gesture_stress_test.initial_gesture)
+            gesture_result = build_gesture_result(timestamp, gesture_name, "通过" if default_gesture_result else "不通过")
+            port_result["gestures"].append(gesture_result)
+    except Exception as e:
+        logger.error(f"操作手势过程中发生错误：{e}\n")
+        timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        gesture_result = build_gesture_result(timestamp, gesture_name, "不通过")
+        gesture_result["comment"] = f'操作手势过程中发生错误：{e}'
+        port_result["gestures"].append(gesture_result)
+    return port_result
 
+def test_single_port(port, node_id, connected_status=False):
+    """针对单个端口进行一轮测试（连接、测试、断开），返回该端口测试结果的字典及是否连接成功"""
+    gesture_stress_test = create_test(port, node_id)
     connected_status = gesture_stress_test.connect_device()
     port_result = {
         "port": port,
@@ -347,25 +460,7 @@ def test_single_port(port, node_id, connected_status):
     }
     if connected_status:
         try:
-            for gesture_name, gesture in gesture_stress_test.gestures.items():
-                logger.info(f"[port = {port}]执行    ---->  {gesture_name}")
-                timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            
-                # 做新的手势
-                for ges in gesture:
-                    gesture_stress_test.do_gesture(gesture=ges) 
-                    
-                # 复默认手势
-                default_gesture_result = gesture_stress_test.do_gesture(gesture=gesture_stress_test.initial_gesture) and \
-                                        not gesture_stress_test.judge_if_hand_broken(gesture=gesture_stress_test.initial_gesture)
-                gesture_result = build_gesture_result(timestamp, gesture_name, "通过" if default_gesture_result else "不通过")
-                port_result["gestures"].append(gesture_result)
-        except Exception as e:
-            logger.error(f"操作手势过程中发生错误：{e}\n")
-            timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            gesture_result = build_gesture_result(timestamp, gesture_name, "不通过")
-            gesture_result["comment"] = f'操作手势过程中发生错误：{e}'
-            port_result["gestures"].append(gesture_result)
+            port_result = run_port_round(gesture_stress_test)
         finally:
             gesture_stress_test.disConnect_device()
     return port_result, connected_status
@@ -1,5 +1,4 @@
 import datetime
-import json
 import logging
 import os
 import sys
@@ -8,7 +7,8 @@ import concurrent.futures
 from typing import List, Tuple
 from pymodbus.exceptions import ConnectionException
 from pymodbus import FramerType
-from pymodbus.client import ModbusSerialClient
+from run_control import CONTROL, StopRequested
+from transport_pool import TRANSPORTS
 
 # 设置日志级别为INFO，获取日志记录器实例
 logger = logging.getLogger(__name__)
@@ -45,6 +45,7 @@ class GestureStressTest:
         self.node_id = 2
         self.port = 'COM4'
         self.FRAMER_TYPE = FramerType.RTU
+        self.session = None
         self.client = None
         self.BAUDRATE = 115200
         self.FINGER_POS_TARGET_MAX_LOSS = 32
@@ -147,6 +148,7 @@ class GestureStressTest:
         :param value: 要写入的值。
         :return: 如果写入成功则返回True，否则返回False。
         """
+        CONTROL.checkpoint()  # 停止时在两次写寄存器之间立即中断，暂停时在此等待恢复
         try:
             response = self.client.write_registers(address, value, self.node_id)
             if not response.isError():
@@ -163,14 +165,17 @@ class GestureStressTest:
         """
         连接到Modbus设备。
 
-        创建ModbusSerialClient实例并尝试连接到指定端口的设备，根据连接结果记录日志并返回连接是否成功的布尔值。
+        从进程内会话池借用指定端口的Modbus连接（多轮测试复用同一个已打开的串口），根据结果记录日志并返回连接是否成功的布尔值。
 
         :return: 一个布尔值，表示是否成功连接到设备。
         """
         connect_status = False
         try:
-            self.client = ModbusSerialClient(port=self.port, framer=self.FRAMER_TYPE, baudrate=self.BAUDRATE)
-            connect_status = self.client.connect()
+            self.session = TRANSPORTS.acquire_modbus(self.port, baudrate=self.BAUDRATE)
+            if self.session is None:
+                raise ConnectionException("Could not connect to Modbus device.")
+            self.client = self.session.client
+            connect_status = True
             logger.info(f"[port = {self.port}]Successfully connected to Modbus device.")
         except ConnectionException as e:
             logger.error(f"[port = {self.port}]Error during setup: {e}")
@@ -182,13 +187,14 @@ class GestureStressTest:
         """
         断开与Modbus设备的连接。
 
-        如果存在client实例则关闭连接并将client设置为None，同时记录日志，如果出现异常也会记录。
+        将连接归还会话池（串口保持打开供下一轮使用）并将client设置为None，同时记录日志，如果出现异常也会记录。
         """
-        if self.client:
+        if self.session:
             try:
-                self.client.close()
+                TRANSPORTS.release(self.port)
+                self.session = None
                 self.client = None
-                logger.info(f"[port = {self.port}]Connection to Modbus device closed.")
+                logger.info(f"[port = {self.port}]Modbus connection returned to pool.")
             except Exception as e:
                 logger.error(f"[port = {self.port}]Error during dis connect device: {e}")
                 
@@ -201,7 +207,7 @@ class GestureStressTest:
         :param gesture: 要执行的手势数据。
         :return: 调用write_to_regesister方法的结果，即写入是否成功的布尔值。
         """
-        time.sleep(self.interval)
+        CONTROL.sleep(self.interval)
         return self.write_to_regesister(address=self.ROH_FINGER_POS_TARGET0, value=gesture)
 
     def judge_if_hand_broken(self, gesture):
@@ -222,27 +228,6 @@ class GestureStressTest:
                     is_broken = True
         return is_broken
     
-def read_from_json_file():
-        """
-        从json文件读取标志位，判断是否继续执行测试
-        Returns:
-            返回fasle则终止测试，true继续测试
-        """
-        try:
-            with open('shared_data.json', 'r') as f:
-                data = json.load(f)
-                stop_test = data['stop_test']
-                pause_test = data['pause_test']
-                return stop_test,pause_test
-        except FileNotFoundError:
-            # logger.error("共享的json文件不存在")
-            return False,False
-        except json.JSONDecodeError:
-            # logger.error("json文件数据格式错误")
-            return False,False
-        except Exception as e:
-            # logger.error(f"读取JSON文件时出现其他未知错误: {e}")
-            return False, False
     
 test_title = '循环做28个手势，进行压测\n标准：各个手头无异常，手指不脱线'
 expected = []
@@ -277,18 +262,16 @@ def main(ports: list = [], node_ids: list = [], aging_duration: float = 1.5) ->
         # end_time1 = start_time1 + 60
         round_num = 0
         while time.time() < end_time:
+            # 轮次之间检查停止/暂停：暂停时阻塞在恢复事件上，恢复或停止后继续
+            if CONTROL.paused:
+                logger.info('测试暂停')
+                CONTROL.resume_event.wait()
+            if CONTROL.stopped:
+                logger.info('测试已停止')
+                break
             round_num += 1
             logger.info(f"##########################第 {round_num} 轮测试开始######################\n")
             result = '通过'
-            stop_test,pause_test = read_from_json_file()
-            if stop_test:
-                logger.info('测试已停止')
-                break
-                
-            if pause_test:
-                logger.info('测试暂停')
-                time.sleep(2)
-                continue
             with concurrent.futures.ThreadPoolExecutor(max_workers=64) as executor:
                 futures = [executor.submit(test_single_port, port, node_id, connected_status) for port, node_id in zip(ports, node_ids)]
                 for future in concurrent.futures.as_completed(futures):
@@ -300,6 +283,8 @@ def main(ports: list = [], node_ids: list = [], aging_duration: float = 1.5) ->
                             final_result = '不通过'
                             break
             logger.info(f"#################第 {round_num} 轮测试结束，测试结果：{result}#############\n")
+    except StopRequested:
+        logger.info('测试已停止')
     except concurrent.futures.TimeoutError:
         logger.error("测试超时异常，部分任务未能按时完成")
         final_result = '不通过'
@@ -9,8 +9,11 @@ import time
 from typing import List, Tuple
 import logging
 
-from OHandSerialAPI import HAND_RESP_SUCCESS, HAND_PROTOCOL_UART, MAX_MOTOR_CNT, MAX_THUMB_ROOT_POS, MAX_FORCE_ENTRIES, OHandSerialAPI
+from OHandSerialAPI import HAND_RESP_SUCCESS, HAND_PROTOCOL_UART, MAX_MOTOR_CNT, MAX_THUMB_ROOT_POS, MAX_FORCE_ENTRIES, HAND_RESP_DATA_INVALID, HAND_RESP_HAND_ERROR, SUB_CMD_GET_CURRENT, OHandSerialAPI
 from can_interface import *
+from run_control import CONTROL, StopRequested
+from transport_pool import TRANSPORTS
+from current_sampler import CurrentSampler
 
 # 设置日志级别为INFO，获取日志记录器实例
 logger = logging.getLogger(__name__)
@@ -47,14 +50,19 @@ class MotorCurrentTest:
         self.node_id = 2
         self.port = 'PCAN_USBBUS1'
         self.ADDRESS_MASTER = 0x01
-        self.can_interface_instance = None
+        self.session = None
         self.serial_api_instance = None
+        self.snapshot_supported = True  # 固件是否支持HAND_CMD_SET_CUSTOM，不支持时退回逐指读取
+        self.settle_supported = True  # 固件是否支持HAND_CMD_GET_FINGER_POS_ALL，不支持时退回固定等待
         self.DELAY_MS = 200
         # self.DELAY_MS_FUN = 6000
         self.POS_MAX_LOSS = 200
         self.DEFAULT_SPEED = 100
         self.SIXTH_FINGER_MIN_POS = 728
-        self.max_average_times = 5
+        self.SETTLE_TIMEOUT_MS = 5000 + self.DELAY_MS*15  # 采集电流前等待到位的上限
+        self.CURRENT_SAMPLE_HZ = 100  # 电流采样频率
+        self.CURRENT_SAMPLE_S = 0.5  # 每次统计电流的采样时长（秒）
+        self.current_stats = []  # 最近一次count_motor_curtent各电机的MotorStats
         self.initial_gesture = [[0,0,0,0,0,728],[0,0,0,0,0,728]] #自然展开2°对应的值1456
         self.thumb_up_gesture = [[0,0,0,0,0,728],[0, 65535, 65535, 65535, 65535, 728]] # 四指弯曲
         self.thumb_bend_gesture = [[0,0,0,0,0,728],[65535, 0, 0, 0, 0, 728]] # 大拇值弯曲
@@ -103,39 +111,30 @@ class MotorCurrentTest:
     def connect_device(self):
         connect_status = True
         try:
-            port_num = port_num = int(re.findall(r'\d+', self.port)[0])
-            self.can_interface_instance = CAN_Init(port_name=port_num, baudrate=1000000)
-            if self.can_interface_instance is None:
-                connect_status = False
+            # 从进程内会话池借用通道：多轮测试和多个脚本复用同一个已打开的PCAN通道及其接收线程，
+            # 不再每轮打开和关闭
+            self.session = TRANSPORTS.acquire_can(self.port, baudrate=1000000)
+            if self.session is None:
                 logger.info("port init failed\n")
-            protocol = HAND_PROTOCOL_UART
-            self.serial_api_instance = OHandSerialAPI(self.can_interface_instance, protocol, self.ADDRESS_MASTER,
-                                                    send_data_impl,
-                                                    recv_data_impl)
-            self.serial_api_instance.HAND_SetTimerFunction(get_milli_seconds_impl, delay_milli_seconds_impl)
+                return False
+            # 同一节点ID在会话内复用同一个API实例，应答由会话的接收线程分发
+            self.serial_api_instance = self.session.open_node(self.node_id)
+            # 节点API内部的等待（如HAND_WaitUntilSettled的轮询间隔）在停止测试时立即中断
+            self.serial_api_instance.HAND_SetTimerFunction(get_milli_seconds_impl, CONTROL.delay_ms)
             self.serial_api_instance.HAND_SetCommandTimeOut(255)
+            # 按实测往返时间设置每个命令的超时（上限255ms），掉线的手不再每个手指都等满255ms
+            self.serial_api_instance.HAND_SetAdaptiveTimeout(True)
         except Exception as e:
             logger.info(f"\n初始化异常: {str(e)}")
             connect_status = False
         return connect_status
 
     def disConnect_device(self):
-        if self.serial_api_instance and hasattr(self.serial_api_instance, "shutdown"):  # 检查是否有自定义关闭方法
-            try:
-                self.serial_api_instance.shutdown()
-                self.serial_api_instance = None
-                logger.info("API shutdown successfully")
-                
-            except Exception as e:
-                logger.error(f"Error during API shutdown: {e}")
-
-        if self.can_interface_instance and hasattr(self.can_interface_instance, "shutdown"):
-            try:
-                self.can_interface_instance.shutdown()
-                self.can_interface_instance = None
-                logger.info("CAN bus connection closed")
-            except Exception as e:
-                logger.error(f"Error closing CAN bus: {e}")
+        """归还会话，通道保持打开供下一轮使用"""
+        if self.session is not None:
+            TRANSPORTS.release(self.port)
+            self.session = None
+            self.serial_api_instance = None
 
     def do_gesture(self, gesture):
         """
@@ -151,8 +150,8 @@ class MotorCurrentTest:
     def do_gesture(self, gesture):
         result = True
         for ges in gesture:
-            delay_milli_seconds_impl(self.DELAY_MS*5)
             for finger_id in range(MAX_MOTOR_CNT):
+                CONTROL.checkpoint()  # 停止时在两条命令之间立即中断手势，暂停时在此等待恢复
                 remote_err = []
                 # delay_milli_seconds_impl(self.DELAY_MS)
                 err = self.serial_api_instance.HAND_SetFingerPos(
@@ -164,37 +163,57 @@ class MotorCurrentTest:
                 if err != HAND_RESP_SUCCESS:
                     result = False
                     break
+            # 等待本步到位后再执行下一步；最后一步到位后即可采集电流，最多等待原固定等待的总时长
+            self.wait_settled(ges, self.DELAY_MS*5 if ges is not gesture[-1] else self.SETTLE_TIMEOUT_MS)
         return result
+
+    def wait_settled(self, gesture, timeout):
+        """
+        等待手指到达手势位置并停止运动，代替按最慢情况设置的固定等待，最多等待timeout毫秒。
+        第六指写入<728时按728判断。固件不支持HAND_CMD_GET_FINGER_POS_ALL时退回固定等待。
+        返回是否在超时前到位，超时不代表失败，由之后的判断决定
+        """
+        targets = list(gesture[:MAX_MOTOR_CNT])
+        targets[-1] = max(targets[-1], self.SIXTH_FINGER_MIN_POS)
+        if self.settle_supported:
+            start = get_milli_seconds_impl()
+            err, _ = self.serial_api_instance.HAND_WaitUntilSettled(self.node_id, targets, self.POS_MAX_LOSS, timeout)
+            if err != HAND_RESP_HAND_ERROR:
+                return err == HAND_RESP_SUCCESS
+            self.settle_supported = False
+            timeout -= get_milli_seconds_impl() - start
+        CONTROL.delay_ms(max(timeout, 0))
+        return False
     
-    def count_motor_curtent(self):
+    def read_finger_currents(self):
         """
-        计算各电机电流限制的平均值
-        返回：各手指（MAX_MOTOR_CNT个）的电流限制平均值列表
+        读取全部手指的电机电流：优先通过HAND_GetSnapshot一次事务读取，
+        固件不支持定制命令时退回逐指HAND_ReadFingerCurrent。读取失败的手指为None
         """
-        sum_currents = [0.0] * MAX_MOTOR_CNT  # 用float避免整数除法精度丢失
-        average_times = self.max_average_times if self.max_average_times > 0 else 1  # 防止除以0
-        delay_milli_seconds_impl(self.DELAY_MS*10)
-        # 循环采集电流限制值并累加
-        for i in range(average_times):
-            for finger_id in range(MAX_MOTOR_CNT):
-                delay_milli_seconds_impl(self.DELAY_MS)  # 缩短采集间隔
-                current_limit = [0]
-                err, current_limit_get = self.serial_api_instance.HAND_GetFingerCurrent(
-                    self.node_id,
-                    finger_id,
-                    current_limit,
-                    []
-                )
-                # 仅当采集成功时累加（排除错误数据）
-                if err == HAND_RESP_SUCCESS:
-                    # 兼容current_limit_get是列表/单个值的情况
-                    current_val = current_limit_get[0] if isinstance(current_limit_get, list) else current_limit_get
-                    sum_currents[finger_id] += current_val
-                else:
-                    logger.warning(f"端口{self.port} 手指{finger_id} 第{i+1}次采集电流失败，错误码:{err}")
+        if self.snapshot_supported:
+            err, snapshot = self.serial_api_instance.HAND_GetSnapshot(self.node_id, fields=SUB_CMD_GET_CURRENT, remote_err=[])
+            if err == HAND_RESP_SUCCESS and len(snapshot.current) >= MAX_MOTOR_CNT:
+                return list(snapshot.current[:MAX_MOTOR_CNT])
+            if err in (HAND_RESP_HAND_ERROR, HAND_RESP_DATA_INVALID):
+                self.snapshot_supported = False
+        currents = []
+        for finger_id in range(MAX_MOTOR_CNT):
+            result = self.serial_api_instance.HAND_ReadFingerCurrent(self.node_id, finger_id)
+            currents.append(result.current if result.ok else None)
+        return currents
 
-        # 计算平均值（逐手指除法）
-        motor_currents = [sum_val / average_times for sum_val in sum_currents]
+    def count_motor_curtent(self):
+        """
+        以CURRENT_SAMPLE_HZ的频率采集CURRENT_SAMPLE_S秒全部电机电流，在线统计均值、标准差、最小/最大值和P95，
+        不保存原始样本。返回：各手指（MAX_MOTOR_CNT个）的电流平均值列表，完整统计见self.current_stats
+        """
+        sampler = CurrentSampler(self.read_finger_currents, rate_hz=self.CURRENT_SAMPLE_HZ, sleep=CONTROL.sleep)
+        self.current_stats = sampler.run(duration_s=self.CURRENT_SAMPLE_S)
+        for finger_id, stats in enumerate(self.current_stats):
+            if stats.failures:
+                logger.warning(f"端口{self.port} 手指{finger_id} 采集电流失败 {stats.failures}/{sampler.ticks} 次")
+        logger.debug(f"端口{self.port} 电机电流统计: {[stats.summary() for stats in self.current_stats]}")
+        motor_currents = [round(stats.mean, 3) for stats in self.current_stats]
         logger.info(f"端口{self.port} 电机电流平均值: {motor_currents}")
         return motor_currents
         
@@ -256,6 +275,8 @@ def main(ports: list = [], node_ids: list = [], aging_duration: float = 0) -> Tu
                         final_result = '不通过'
                         break
         logger.info(f"#################测试结束，测试结果：{final_result}#############\n")
+    except StopRequested:
+        logger.info('测试已停止')
     except concurrent.futures.TimeoutError:
         logger.error("测试超时异常，部分任务未能按时完成")
         final_result = '不通过'
@@ -305,7 +326,6 @@ def test_single_port(port, node_id, connected_status):
             for gesture_name, gesture in motor_current_test.gestures.items():
                 if motor_current_test.do_gesture(gesture=gesture):
                     logger.info(f'[port = {port}]执行    ---->  {gesture_name}')
-                    time.sleep(5)
                     motors_current = motor_current_test.count_motor_curtent()
                     logger.info(f'[port = {port}]电机电流为 -->{motors_current}')
                     if  not motor_current_test.checkCurrent(motors_current):
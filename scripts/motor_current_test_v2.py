@@ -10,7 +10,8 @@ import logging
 
 from pymodbus.exceptions import ConnectionException
 from pymodbus import FramerType
-from pymodbus.client import ModbusSerialClient
+from run_control import CONTROL, StopRequested
+from transport_pool import TRANSPORTS
 
 # 设置日志级别为INFO，获取日志记录器实例
 logger = logging.getLogger(__name__)
@@ -48,6 +49,7 @@ class MotorCurrentTest:
         self.port = 'COM4'
         self.FRAMER_TYPE = FramerType.RTU
         self.BAUDRATE = 115200
+        self.session = None
         self.client = None
         self.ROH_FINGER_POS_TARGET0 = 1135
         self.ROH_FINGER_CURRENT0 = 1105
@@ -109,6 +111,7 @@ class MotorCurrentTest:
         :param value: 要写入的值。
         :return: 如果写入成功则返回True，否则返回False。
         """
+        CONTROL.checkpoint()  # 停止时在两次写寄存器之间立即中断，暂停时在此等待恢复
         try:
             response = self.client.write_registers(address, value, self.node_id)
             if not response.isError():
@@ -136,14 +139,17 @@ class MotorCurrentTest:
         """
         连接到Modbus设备。
 
-        创建ModbusSerialClient实例并尝试连接到指定端口的设备，根据连接结果记录日志并返回连接是否成功的布尔值。
+        从进程内会话池借用指定端口的Modbus连接（多轮测试复用同一个已打开的串口），根据结果记录日志并返回连接是否成功的布尔值。
 
         :return: 一个布尔值，表示是否成功连接到设备。
         """
         connect_status = False
         try:
-            self.client = ModbusSerialClient(port=self.port, framer=self.FRAMER_TYPE, baudrate=self.BAUDRATE)
-            connect_status = self.client.connect()
+            self.session = TRANSPORTS.acquire_modbus(self.port, baudrate=self.BAUDRATE)
+            if self.session is None:
+                raise ConnectionException("Could not connect to Modbus device.")
+            self.client = self.session.client
+            connect_status = True
             logger.info(f"[port = {self.port}]Successfully connected to Modbus device.")
         except ConnectionException as e:
             logger.error(f"[port = {self.port}]Error during setup: {e}")
@@ -155,13 +161,14 @@ class MotorCurrentTest:
         """
         断开与Modbus设备的连接。
 
-        如果存在client实例则关闭连接并将client设置为None，同时记录日志，如果出现异常也会记录。
+        将连接归还会话池（串口保持打开供下一轮使用）并将client设置为None，同时记录日志，如果出现异常也会记录。
         """
-        if self.client:
+        if self.session:
             try:
-                self.client.close()
+                TRANSPORTS.release(self.port)
+                self.session = None
                 self.client = None
-                logger.info(f"[port = {self.port}]Connection to Modbus device closed.")
+                logger.info(f"[port = {self.port}]Modbus connection returned to pool.")
             except Exception as e:
                 logger.error(f"[port = {self.port}]Error during dis connect device: {e}")
 
@@ -199,7 +206,7 @@ class MotorCurrentTest:
             else:
                 currents_list = currents.registers if currents else []
                 sum_currents = [sum_currents[j] + currents_list[j] for j in range(len(sum_currents))]
-                time.sleep(0.2)
+                CONTROL.sleep(0.2)
         ave_currents = [sum_currents[k] / self.max_average_times for k in range(len(sum_currents))]
 
         return ave_currents
@@ -262,6 +269,8 @@ def main(ports: list = [], node_ids: list = [], aging_duration: float = 0) -> Tu
                         final_result = '不通过'
                         break
         logger.info(f"#################测试结束，测试结果：{final_result}#############\n")
+    except StopRequested:
+        logger.info('测试已停止')
     except concurrent.futures.TimeoutError:
         logger.error("测试超时异常，部分任务未能按时完成")
         final_result = '不通过'
@@ -311,7 +320,7 @@ def test_single_port(port, node_id, connected_status):
             for gesture_name, gesture in motor_current_test.gestures.items():
                 if motor_current_test.do_gesture(gesture=gesture):
                     logger.info(f'[port = {port}]执行    ---->  {gesture_name}')
-                    time.sleep(5)
+                    CONTROL.sleep(5)
                     motors_current = motor_current_test.count_motor_curtent()
                     logger.info(f'[port = {port}]电机电流为 -->{motors_current}')
                     if  not motor_current_test.checkCurrent(motors_current):
@@ -337,7 +337,8 @@ def test_HAND_Reset(serial_api_instance):
     err = serial_api_instance.HAND_Reset(HAND_ID, RESET_MODE.get('工作模式'), remote_err)
     assert err == HAND_RESP_SUCCESS,f"设置手重置失败: err={err}"
     logger.info(f'设置手重置重启到工作模式成功')
-    delay_milli_seconds_impl(DELAY_MS_DEVICE_REBOOT)
+    err = serial_api_instance.HAND_WaitUntilReady(HAND_ID, DELAY_MS_DEVICE_REBOOT)
+    assert err == HAND_RESP_SUCCESS,f"重启后等待就绪超时: err={err}"
     
     err = serial_api_instance.HAND_Reset(HAND_ID, RESET_MODE.get('DFU模式'), remote_err)
     assert err == HAND_RESP_SUCCESS,f"设置手重置失败: err={err}"
@@ -348,7 +349,8 @@ def test_HAND_Reset(serial_api_instance):
     err = serial_api_instance.HAND_Reset(HAND_ID, RESET_MODE.get('工作模式'), remote_err)
     assert err == HAND_RESP_SUCCESS,f"恢复默认值失败: err={err}"
     logger.info('恢复默认值成功')
-    delay_milli_seconds_impl(DELAY_MS_DEVICE_REBOOT)
+    err = serial_api_instance.HAND_WaitUntilReady(HAND_ID, DELAY_MS_DEVICE_REBOOT)
+    assert err == HAND_RESP_SUCCESS,f"重启后等待就绪超时: err={err}"
     
 @pytest.mark.skipif(SKIP_CASE,reason='debug中,先跳过')
 def test_HAND_PowerOff(serial_api_instance):
@@ -2425,7 +2427,9 @@ def test_HAND_StartInit(serial_api_instance):
     err = serial_api_instance.HAND_StartInit(HAND_ID, remote_err)
     assert err == HAND_RESP_SUCCESS,f"初始化手失败，错误码: 错误码:err={err},remote_err={remote_err[0]}"
     logger.info(f'手初始化成功')
-    delay_milli_seconds_impl(DELAY_MS_FUN*2)
+    remote_err = []
+    err = serial_api_instance.HAND_WaitUntilReady(HAND_ID, DELAY_MS_FUN*2, remote_err=remote_err)
+    assert err == HAND_RESP_SUCCESS,f"初始化后等待就绪超时: err={err},remote_err={remote_err}"
     
     logger.info(f'恢复默认自检级别')
     remote_err = [0]
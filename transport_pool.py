@@ -0,0 +1,199 @@
+import atexit
+import re
+import threading
+import time
+from can_session import CanBusSession
+
+IDLE_TIMEOUT = 300  # 秒，无人借用超过该时间的会话在下次借用时关闭
+
+
+class ModbusSession:
+    """
+    Modbus RTU串口会话，client为已连接的pymodbus ModbusSerialClient
+    """
+
+    def __init__(self, port, baudrate=115200, timeout=None):
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.client = None
+
+    @classmethod
+    def open(cls, port, baudrate=115200, timeout=None):
+        """打开串口并创建会话，失败返回None"""
+        session = cls(port, baudrate, timeout)
+        return session if session.reconnect() else None
+
+    def healthy(self):
+        return self.client is not None and self.client.connected
+
+    def reconnect(self):
+        from pymodbus import FramerType
+        from pymodbus.client import ModbusSerialClient
+
+        self.shutdown()
+        kwargs = {} if self.timeout is None else {"timeout": self.timeout}
+        try:
+            client = ModbusSerialClient(port=self.port, framer=FramerType.RTU, baudrate=self.baudrate, **kwargs)
+            if not client.connect():
+                return False
+        except Exception as e:
+            print(f"[port = {self.port}]Modbus连接失败: {e}")
+            return False
+        self.client = client
+        return True
+
+    def shutdown(self):
+        if self.client is not None:
+            try:
+                self.client.close()
+            except Exception as e:
+                print(f"[port = {self.port}]Modbus关闭异常: {e}")
+            self.client = None
+
+
+class _PoolEntry:
+    __slots__ = ("lock", "session", "params", "refs", "idle_since", "suspect", "discarded", "opens", "borrows")
+
+    def __init__(self):
+        self.lock = threading.Lock()  # 串行化同一通道的打开、检查和关闭，不阻塞其他通道
+        self.session = None
+        self.params = None
+        self.refs = 0
+        self.idle_since = time.monotonic()
+        self.suspect = False
+        self.discarded = False
+        self.opens = 0
+        self.borrows = 0
+
+
+class TransportPool:
+    """
+    进程内共享的传输会话池：按通道名（PCAN通道名或串口名）引用计数地保存已打开的CanBusSession和ModbusSession。
+    测试脚本每轮、端口扫描和界面都从这里借用会话，归还后会话保持打开供下次借用，
+    不再每轮打开/关闭PCAN通道（每次数十毫秒且偶尔失败）。
+
+    借用时检查会话健康状态，异常时在原会话对象上重连；借用者报告通信失败(release(key, failed=True))后
+    下次借用强制重连。无人借用超过idle_timeout秒的会话在之后的借用中关闭，进程退出时关闭全部会话。
+
+        session = TRANSPORTS.acquire_can('PCAN_USBBUS1')
+        try:
+            api = session.open_node(2)
+            ...
+        finally:
+            TRANSPORTS.release('PCAN_USBBUS1')
+    """
+
+    def __init__(self, idle_timeout=IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self.lock = threading.Lock()
+        self.entries = {}  # key -> _PoolEntry
+
+    def acquire(self, key, open_session, params=None):
+        """
+        借用key对应的会话，不存在时调用open_session()打开。params为打开参数，
+        与已有会话不同且无人借用时按新参数重新打开。打开或重连失败返回None
+        """
+        self.close_idle()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = self.entries[key] = _PoolEntry()
+            entry.refs += 1  # 先占用，避免打开期间被close_idle关闭
+        with entry.lock:
+            session = entry.session
+            if session is not None and params != entry.params and entry.refs == 1:
+                session.shutdown()
+                session = entry.session = None
+            if session is None:
+                session = open_session()
+                if session is not None:
+                    entry.opens += 1
+                    entry.params = params
+            elif entry.suspect or not session.healthy():
+                print(f"[{key}]会话异常，重新连接")
+                entry.opens += 1
+                if not session.reconnect():
+                    session.shutdown()
+                    session = None
+            entry.session = session
+            entry.suspect = False
+            entry.discarded = False
+            if session is not None:
+                entry.borrows += 1
+        if session is None:
+            self.release(key)
+        return session
+
+    def release(self, key, failed=False):
+        """归还借用的会话，failed为True表示借用期间通信失败，下次借用时强制重连"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry.refs == 0:
+                return
+            entry.refs -= 1
+            entry.suspect = entry.suspect or failed
+            if entry.refs > 0:
+                return
+            entry.idle_since = time.monotonic()
+            if not entry.discarded and entry.session is not None:
+                return
+            del self.entries[key]
+        self._close(entry)
+
+    def discard(self, key):
+        """通道已移除（如热插拔拔出）：无人借用时立即关闭，否则在最后一次归还时关闭"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return
+            if entry.refs > 0:
+                entry.discarded = True
+                return
+            del self.entries[key]
+        self._close(entry)
+
+    def close_idle(self):
+        now = time.monotonic()
+        with self.lock:
+            idle = [key for key, entry in self.entries.items() if entry.refs == 0 and now - entry.idle_since > self.idle_timeout]
+            entries = [self.entries.pop(key) for key in idle]
+        for entry in entries:
+            self._close(entry)
+
+    def close_all(self):
+        """关闭所有会话（包括借用中的），用于进程退出"""
+        with self.lock:
+            entries = list(self.entries.values())
+            self.entries.clear()
+        for entry in entries:
+            self._close(entry)
+
+    def stats(self):
+        """返回 {key: (借用数, 打开次数, 累计借用次数)}"""
+        with self.lock:
+            return {key: (entry.refs, entry.opens, entry.borrows) for key, entry in self.entries.items()}
+
+    @staticmethod
+    def _close(entry):
+        with entry.lock:
+            if entry.session is not None:
+                try:
+                    entry.session.shutdown()
+                except Exception as e:
+                    print(f"会话关闭异常: {e}")
+                entry.session = None
+
+    def acquire_can(self, channel, baudrate=1000000):
+        """借用PCAN通道（如'PCAN_USBBUS1'）的CanBusSession，节点API通过session.open_node(node_id)获取"""
+        port_num = int(re.findall(r'\d+', channel)[0])
+        return self.acquire(channel, lambda: CanBusSession.open(port_name=port_num, baudrate=baudrate), ("can", baudrate))
+
+    def acquire_modbus(self, port, baudrate=115200, timeout=None):
+        """借用串口的ModbusSession，session.client为已连接的ModbusSerialClient"""
+        return self.acquire(port, lambda: ModbusSession.open(port, baudrate, timeout), ("modbus", baudrate, timeout))
+
+
+# 进程内唯一的会话池，脚本、端口扫描和界面共用
+TRANSPORTS = TransportPool()
+atexit.register(TRANSPORTS.close_all)